@@ -0,0 +1,249 @@
+"""Batch scoring of whole-institution TNA files.
+
+Reads a CSV shaped like ``tna_scores_dataset.csv`` (columns A11..D32, any extra
+columns such as a faculty id are passed through) in chunks, scores each chunk
+with one ``predict_proba`` pass and writes the recommendations as CSV or Parquet.
+
+    python batch_score.py tna_scores_dataset.csv scored.parquet --chunksize 50000
+
+``--explain`` adds ``base_probability`` and one ``contrib_<code>`` column per
+subdomain; they sum to ``probability`` (see fdp_explain.py). ``--tenant`` scores
+with an institution's own model, topic map and rules (see fdp_tenants.py).
+"""
+import argparse
+import json
+import sys
+
+import numpy as np
+import pandas as pd
+
+import fdp_core
+from fdp_cache import RecommendationCache
+from fdp_store import read_chunks
+
+TOP_K = 3
+LIST_SEP = "; "
+
+
+def score_frame(classifier, frame, cache=None, explainer=None, index=fdp_core.SUBDOMAIN_INDEX, rules=fdp_core.RULES,
+                monitor=None, first_row=0):
+    """Score one chunk of TNA rows and return the recommendation frame.
+
+    With a ``RecommendationCache`` only profiles not seen before are scored. With
+    a ``PathExplainer`` per-subdomain probability contributions are appended. A
+    ``DriftMonitor`` is fed the scores and probabilities of every chunk.
+
+    Raises ValueError, naming the input row (``first_row`` is the 0-based
+    position of the chunk's first row in the file), if any score is blank,
+    non-numeric or outside 1-10.
+    """
+    codes = list(index.codes)
+    missing = [c for c in codes if c not in frame.columns]
+    if missing:
+        raise ValueError(f"Input is missing score columns: {', '.join(missing)}")
+
+    X = _score_matrix(frame, codes, first_row)
+    if cache is not None:
+        bundles = cache.get_many(X, lambda M: fdp_core.recommend(classifier, M, TOP_K, index, rules))
+        out = _frame_from_bundles(frame.drop(columns=codes), bundles)
+        if monitor is not None:
+            monitor.update(X, out["probability"].to_numpy())
+        return out if explainer is None else _add_contributions(out, explainer, X, codes)
+
+    scored = fdp_core.score(classifier, X, TOP_K, index, rules)
+
+    out = frame.drop(columns=codes).reset_index(drop=True)
+    out["prediction"] = scored.prediction
+    out["probability"] = scored.probability
+
+    subdomains = np.array(index.keys, dtype=object)
+    topics = np.array([LIST_SEP.join(index.topics(i)) for i in range(len(index))], dtype=object)
+    rows = np.arange(len(X))
+    for rank in range(TOP_K):
+        idx = scored.top[:, rank]
+        out[f"top{rank + 1}"] = subdomains[idx]
+        out[f"top{rank + 1}_score"] = X[rows, idx]
+        out[f"top{rank + 1}_topics"] = topics[idx]
+
+    out["rule_based_fdps"], out["triggered_rules"] = rules.joined(scored.hits, LIST_SEP)
+    if monitor is not None:
+        monitor.update(X, scored.probability)
+    return out if explainer is None else _add_contributions(out, explainer, X, codes)
+
+
+def _score_matrix(frame, codes, first_row):
+    try:
+        X = frame[codes].to_numpy(dtype=fdp_core.DTYPE)
+    except ValueError:
+        # Non-numeric cells: locate them through the same check as blank ones
+        X = frame[codes].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=fdp_core.DTYPE)
+    errors = fdp_core.score_errors(X, codes)
+    if errors:
+        row, reason = next(iter(errors.items()))
+        raise ValueError(f"Input row {first_row + row + 1}: {reason} "
+                         f"({len(errors)} invalid row(s) in rows {first_row + 1}-{first_row + len(X)})")
+    return X
+
+
+def _add_contributions(out, explainer, X, codes):
+    _, contrib = explainer.explain(X)
+    columns = {"base_probability": np.full(len(X), explainer.bias)}
+    columns.update((f"contrib_{code}", contrib[:, j]) for j, code in enumerate(codes))
+    return pd.concat([out, pd.DataFrame(columns)], axis=1)
+
+
+def _frame_from_bundles(passthrough, bundles):
+    out = passthrough.reset_index(drop=True)
+    out["prediction"] = [b["prediction"] for b in bundles]
+    out["probability"] = [b["probability"] for b in bundles]
+    for rank in range(TOP_K):
+        keys = [b["top_subdomains"][rank][0] for b in bundles]
+        out[f"top{rank + 1}"] = keys
+        out[f"top{rank + 1}_score"] = np.array([b["top_subdomains"][rank][1] for b in bundles], dtype=fdp_core.DTYPE)
+        out[f"top{rank + 1}_topics"] = [LIST_SEP.join(b["topics"][k]) for b, k in zip(bundles, keys)]
+    out["rule_based_fdps"] = [LIST_SEP.join(b["rule_based_fdps"]) for b in bundles]
+    out["triggered_rules"] = [LIST_SEP.join(b["triggered_rules"]) for b in bundles]
+    return out
+
+
+def output_format(path, fmt=None):
+    if fmt:
+        return fmt
+    return "parquet" if str(path).lower().endswith((".parquet", ".pq")) else "csv"
+
+
+def render(out, fmt, header=True):
+    """Serialise a scored chunk: CSV bytes, or an Arrow table for Parquet."""
+    if fmt == "parquet":
+        import pyarrow as pa
+
+        return pa.Table.from_pandas(out, preserve_index=False)
+    return out.to_csv(index=False, header=header).encode("utf-8")
+
+
+class ChunkWriter:
+    """Appends rendered chunks, in call order, to a single CSV or Parquet file."""
+
+    def __init__(self, path, fmt=None):
+        self.path = path
+        self.fmt = output_format(path, fmt)
+        self.n_rows = 0
+        self._parquet = None
+        self._file = None if self.fmt == "parquet" else open(path, "wb")
+
+    def write(self, rendered, n_rows):
+        if self.fmt == "parquet":
+            if self._parquet is None:
+                import pyarrow.parquet as pq
+
+                self._parquet = pq.ParquetWriter(self.path, rendered.schema)
+            self._parquet.write_table(rendered)
+        else:
+            self._file.write(rendered)
+        self.n_rows += n_rows
+
+    def write_frame(self, out):
+        self.write(render(out, self.fmt, header=self.n_rows == 0), len(out))
+
+    def close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+        if self._file is not None:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def score_file(input_path, output_path, classifier=None, chunksize=50_000, fmt=None, cache=None, explainer=None,
+               index=fdp_core.SUBDOMAIN_INDEX, rules=fdp_core.RULES, monitor=None):
+    """Score ``input_path`` (CSV or fdp_store directory) chunk by chunk into ``output_path``.
+
+    Memory stays bounded by ``chunksize`` rows regardless of the file size.
+    Returns the number of rows written. Stops with ValueError at the first chunk
+    holding an invalid score (see ``score_frame``).
+    """
+    if classifier is None:
+        classifier = fdp_core.load_model(fdp_core.BATCH_MODEL_PATH)
+    with ChunkWriter(output_path, fmt) as writer:
+        for chunk in read_chunks(input_path, chunksize):
+            writer.write_frame(score_frame(classifier, chunk, cache, explainer, index, rules, monitor, writer.n_rows))
+    return writer.n_rows
+
+
+def cache_namespace(classifier, index, rules):
+    """Disk-cache namespace that changes whenever the model, topic map or rule table does."""
+    from fdp_lookup import fingerprint
+
+    return f"{fingerprint(classifier)}:{index.fingerprint()}:{rules.fingerprint()}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a TNA CSV in batch.")
+    parser.add_argument("input", help="CSV with columns A11..D32, or an fdp_store directory")
+    parser.add_argument("output", help="output .csv or .parquet file")
+    parser.add_argument("--model", default=fdp_core.BATCH_MODEL_PATH)
+    parser.add_argument("--chunksize", type=int, default=50_000)
+    parser.add_argument("--format", choices=("csv", "parquet"), help="defaults to the output extension")
+    parser.add_argument("--cache-db", help="SQLite file caching recommendations across runs")
+    parser.add_argument("--explain", action="store_true", help="add per-subdomain probability contributions")
+    parser.add_argument("--tenant", help="score with this tenant's model, topic map and rules")
+    parser.add_argument("--tenants-dir", help="defaults to $FDP_TENANTS_DIR or tenants/")
+    parser.add_argument("--lookup", help="precomputed table from fdp_lookup.py build, checked against the model")
+    parser.add_argument("--drift-report", help="write a drift / data-quality report (JSON) against drift_reference.json")
+    args = parser.parse_args(argv)
+
+    index, rules = fdp_core.SUBDOMAIN_INDEX, fdp_core.RULES
+    if args.tenant:
+        from fdp_tenants import TENANTS_DIR, TenantRegistry
+
+        tenant = TenantRegistry(args.tenants_dir or TENANTS_DIR, default_model=args.model).get(args.tenant)
+        classifier, index, rules = tenant.classifier, tenant.index, tenant.rules
+    else:
+        classifier = fdp_core.load_model(args.model)
+    model = classifier
+    explainer = None
+    if args.explain:
+        from fdp_explain import PathExplainer
+
+        explainer = PathExplainer(classifier)
+    if args.lookup:
+        from fdp_lookup import load_table
+
+        classifier = load_table(args.lookup, classifier)
+
+    monitor = None
+    if args.drift_report:
+        from fdp_drift import DriftMonitor, load_reference
+
+        monitor = DriftMonitor(load_reference(), index.codes)
+
+    cache = None
+    if args.cache_db:
+        cache = RecommendationCache(maxsize=max(args.chunksize, 4096), disk_path=args.cache_db,
+                                    namespace=cache_namespace(model, index, rules))
+    try:
+        n_rows = score_file(args.input, args.output, classifier, args.chunksize, args.format, cache, explainer,
+                            index, rules, monitor)
+    except ValueError as exc:
+        sys.exit(f"{args.input}: {exc}")
+    finally:
+        if cache is not None:
+            print(f"Cache: {cache.stats()}", file=sys.stderr)
+            cache.close()
+    if args.lookup:
+        print(f"Lookup table: {classifier.stats()}", file=sys.stderr)
+    if monitor is not None:
+        report = monitor.report()
+        with open(args.drift_report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Drift: alerts {report['alerts']}, warnings {report['warnings']}, "
+              f"probability {report['probability']['status']} -> {args.drift_report}", file=sys.stderr)
+    print(f"Scored {n_rows} rows -> {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""The original if-chain of smart rules from streamlit_FDP_app.py, kept verbatim.
+
+It is the reference the compiled rule table (fdp_rules.json) is checked and
+benchmarked against; do not edit it to follow rule-table changes.
+"""
+
+
+def original_chain(scores):
+    """``(rule_based_fdps, triggered_rules)`` for one {subdomain: score} dict."""
+    rule_based_fdps = []
+    triggered_rules = []
+
+    if scores["A11:Subject Knowledge"] > 8 and scores["A21:Analyzing"] > 7:
+        rule_based_fdps.append("Advanced interdisciplinary FDPs combining subject expertise and cognitive challenges")
+        triggered_rules.append("A11:Subject Knowledge > 8 & A21:Analyzing > 7")
+
+    if scores["A31:Inquiring Mind"] > 8:
+        rule_based_fdps.append("Creative pedagogy, design thinking, gamification workshops")
+        triggered_rules.append("A31:Inquiring Mind > 8")
+
+    if scores["B21:Preparation and Prioritization"] > 7 and scores["B31:Continuing Professional Development"] > 7:
+        rule_based_fdps.append("Time management, career progression, leadership skills")
+        triggered_rules.append("B21:Preparation and Prioritization > 7 & B31:Continuing Professional Development > 7")
+
+    if scores["C21:Research Strategy"] > 8 or scores["C31:Income and Funding Generation"] > 8:
+        rule_based_fdps.append("Research proposal writing, grants & funding management")
+        triggered_rules.append("C21:Research Strategy > 8 or C31:Income and Funding Generation > 8")
+
+    if scores["D11:Team Working"] > 8 and scores["D21:Communication Methods"] > 7:
+        rule_based_fdps.append("Collaboration, communication, stakeholder negotiation")
+        triggered_rules.append("D11:Team Working > 8 & D21:Communication Methods > 7")
+
+    if scores["D31:Teaching"] > 7:
+        rule_based_fdps.append("Public engagement, impact creation, industry partnerships")
+        triggered_rules.append("D31:Teaching > 7")
+
+    if scores["B11:Enthusiasm"] > 8 and scores["A31:Inquiring Mind"] > 7:
+        rule_based_fdps.append("Motivation, resilience, innovative teaching FDPs")
+        triggered_rules.append("B11:Enthusiasm > 8 & A31:Inquiring Mind > 7")
+
+    if scores["C11:Ethics, Principles, and Sustainability"] > 8 and scores["B11:Enthusiasm"] > 7:
+        rule_based_fdps.append("Ethics, professional integrity, mentoring workshops")
+        triggered_rules.append("C11:Ethics, Principles, and Sustainability > 8 & B11:Enthusiasm > 7")
+
+    # Any two domains > 8
+    domains_over_8 = sum(1 for v in scores.values() if v > 8)
+    if domains_over_8 >= 2:
+        rule_based_fdps.append("Integrated FDPs covering teaching + research + engagement")
+        triggered_rules.append("Any two domains > 8")
+
+    return rule_based_fdps, triggered_rules
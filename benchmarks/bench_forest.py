@@ -0,0 +1,42 @@
+"""Latency of sklearn predict + predict_proba vs. the flat-array forest.
+
+    python -m benchmarks.bench_forest --sizes 1 100 100000
+"""
+import argparse
+import time
+import warnings
+
+import numpy as np
+
+import fdp_core
+from benchmarks.timing import best_of
+from fdp_forest import FlatForest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default=fdp_core.PICKLE_PATH, help="pickled sklearn forest")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 100, 100_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+    warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+    model = fdp_core.load_model(args.model)
+    start = time.perf_counter()
+    flat = FlatForest.from_sklearn(model)
+    print(f"export: {flat.n_trees} trees, {flat.n_nodes} nodes, depth {flat.max_depth} "
+          f"in {(time.perf_counter() - start) * 1e3:.1f} ms")
+
+    rng = np.random.default_rng(0)
+    print(f"{'batch':>8} {'sklearn ms':>12} {'flat ms':>10} {'speedup':>8} {'max |dp|':>10}")
+    for n in args.sizes:
+        X = rng.integers(1, 11, size=(n, flat.n_features_in_)).astype(np.float32)
+        repeat = args.repeat if n < 10_000 else 1
+        t_sk = best_of(lambda: (model.predict(X), model.predict_proba(X)), repeat)
+        t_flat = best_of(lambda: flat.predict_proba(X), repeat)
+        diff = np.abs(model.predict_proba(X) - flat.predict_proba(X)).max()
+        print(f"{n:>8} {t_sk * 1e3:>12.3f} {t_flat * 1e3:>10.3f} {t_sk / t_flat:>7.1f}x {diff:>10.2e}")
+
+
+if __name__ == "__main__":
+    main()
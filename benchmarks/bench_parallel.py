@@ -0,0 +1,44 @@
+"""Scaling of fdp_parallel over 1/2/4/8 workers on a synthetic TNA export.
+
+    python -m benchmarks.bench_parallel --rows 1000000 --workers 1 2 4 8
+"""
+import argparse
+import hashlib
+import os
+import tempfile
+import time
+
+from benchmarks.synthetic import synthetic_csv
+from fdp_parallel import score_file_parallel
+
+
+def _digest(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:12]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--chunksize", type=int, default=50_000)
+    parser.add_argument("--format", choices=("csv", "parquet"), default="csv")
+    args = parser.parse_args(argv)
+
+    print(f"CPUs available: {os.cpu_count()}")
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "tna.csv")
+        synthetic_csv(source, args.rows)
+        print(f"{'workers':>8} {'seconds':>9} {'rows/s':>10} {'speedup':>8} {'output':>13}")
+        base = None
+        for workers in args.workers:
+            output = os.path.join(tmp, f"scored_{workers}.{args.format}")
+            start = time.perf_counter()
+            score_file_parallel(source, output, workers=workers, chunksize=args.chunksize, fmt=args.format)
+            elapsed = time.perf_counter() - start
+            base = base or elapsed
+            print(f"{workers:>8} {elapsed:>9.2f} {args.rows / elapsed:>10,.0f} {base / elapsed:>7.2f}x {_digest(output):>13}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Rule engine throughput: compiled NumPy masks vs. the original per-profile if-chain.
+
+    python -m benchmarks.bench_rules --rows 1000000
+"""
+import argparse
+import time
+
+import numpy as np
+
+import fdp_core
+from benchmarks.baseline_rules import original_chain
+
+
+def _python_chain(X):
+    for row in X:
+        original_chain(dict(zip(fdp_core.SUBDOMAINS, row.tolist())))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--python-rows", type=int, default=10_000,
+                        help="rows for the original if-chain (it is slow)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    X = rng.integers(1, 11, size=(args.rows, len(fdp_core.SUBDOMAINS))).astype(np.float32)
+
+    best = float("inf")
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        hits = fdp_core.RULES.evaluate(X)
+        best = min(best, time.perf_counter() - start)
+    print(f"compiled rules : {args.rows:>9} rows in {best:.3f}s -> {args.rows / best:,.0f} rows/s")
+
+    start = time.perf_counter()
+    fdp_core.RULES.joined(hits)
+    elapsed = time.perf_counter() - start
+    print(f"joined strings : {args.rows:>9} rows in {elapsed:.3f}s -> {args.rows / elapsed:,.0f} rows/s")
+
+    n = min(args.python_rows, args.rows)
+    start = time.perf_counter()
+    _python_chain(X[:n].astype(np.float64))
+    elapsed = time.perf_counter() - start
+    print(f"original chain : {n:>9} rows in {elapsed:.3f}s -> {n / elapsed:,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""fdp_schedule: heuristic run time at full scale and coverage gap to the MILP optimum on small instances.
+
+    python -m benchmarks.bench_schedule --faculty 10000 --slots 20 --rooms 150 --instances 20
+
+The large instance uses real topic needs (top-3 subdomain topics plus rule
+FDPs) of synthetic profiles; it is compared with ``upper_bound`` as it is too
+large to solve exactly. Small instances draw random needs and
+availability; the gap is (optimum - heuristic) / optimum.
+"""
+import argparse
+
+import numpy as np
+
+import fdp_core
+from benchmarks.synthetic import synthetic_profiles
+from benchmarks.timing import timed
+from fdp_schedule import exact_schedule, schedule, topic_needs, upper_bound
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--faculty", type=int, default=10_000)
+    parser.add_argument("--slots", type=int, default=20)
+    parser.add_argument("--rooms", type=int, default=150, help="rooms per slot")
+    parser.add_argument("--runs", type=int, default=12, help="sessions per topic")
+    parser.add_argument("--capacity", type=int, default=40, help="seats per session")
+    parser.add_argument("--availability", type=float, default=0.6, help="share of slots each member can attend")
+    parser.add_argument("--time-limit", type=float, default=5.0)
+    parser.add_argument("--instances", type=int, default=20, help="small instances solved exactly")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    classifier = fdp_core.load_model(fdp_core.MODEL_PATH)
+    needs, names = topic_needs(fdp_core.score(classifier, synthetic_profiles(args.faculty, seed=0)))
+    available = rng.random((args.faculty, args.slots)) < args.availability
+    bound = upper_bound(needs, available, args.rooms, args.runs, args.capacity)
+    for limit in (0.0, args.time_limit):
+        result, elapsed = timed(lambda: schedule(needs, available, args.rooms, args.runs, args.capacity, limit))
+        label = "greedy" if limit == 0 else f"greedy + local search ({limit:g}s budget)"
+        print(f"{args.faculty:,} faculty x {len(names)} topics x {args.slots} slots, {label}: "
+              f"{elapsed:.2f}s, {len(result.sessions)} sessions, "
+              f"{result.covered:,} of {int(needs.sum()):,} needs, {result.covered / bound:.1%} of upper bound {bound:,}")
+
+    print(f"\n{'faculty':>7} {'topics':>6} {'slots':>5} {'heur':>5} {'opt':>5} {'gap':>6} {'heur s':>7} {'milp s':>7}")
+    gaps = []
+    for i in range(args.instances):
+        F, T, S = 30, 10, 4
+        needs = rng.random((F, T)) < 0.25
+        available = rng.random((F, S)) < 0.7
+        result, heuristic_s = timed(lambda: schedule(needs, available, 3, 2, 8))
+        (optimum, _), milp_s = timed(lambda: exact_schedule(needs, available, 3, 2, 8))
+        gaps.append((optimum - result.covered) / max(optimum, 1))
+        print(f"{F:>7} {T:>6} {S:>5} {result.covered:>5} {optimum:>5} {gaps[-1]:>6.1%} "
+              f"{heuristic_s:>7.2f} {milp_s:>7.2f}")
+    if gaps:
+        print(f"gap: mean {np.mean(gaps):.1%}, max {np.max(gaps):.1%}, optimal in {np.mean(np.equal(gaps, 0)):.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Query latency of the 'faculty like me' index at large corpus sizes.
+
+    python -m benchmarks.bench_similarity --rows 1000000 --queries 200
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import synthetic_profiles
+from fdp_similarity import ProfileIndex
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--modes", nargs="+", default=["exact", "ivf"])
+    parser.add_argument("--nprobe", type=int, default=8)
+    args = parser.parse_args(argv)
+
+    corpus = synthetic_profiles(args.rows, seed=0)
+    queries = synthetic_profiles(args.queries, seed=1)
+    truth = None
+    print(f"{'mode':>9} {'build s':>8} {'ms/query':>9} {'recall@k':>9}")
+    for mode in args.modes:
+        index = ProfileIndex(mode=mode, nprobe=args.nprobe)
+        start = time.perf_counter()
+        index.add(corpus)
+        if mode == "ivf":
+            index.train()
+        # First query builds lazy structures (cell lists, ball tree)
+        index.search(queries[:1], args.k)
+        build = time.perf_counter() - start
+
+        n = args.queries if mode != "exact" else min(args.queries, 20)
+        start = time.perf_counter()
+        ids = np.vstack([index.search(q, args.k)[1] for q in queries[:n]])
+        per_query = (time.perf_counter() - start) / n * 1e3
+        if mode == "exact":
+            truth = ids
+        recall = np.nan if truth is None else np.mean(
+            [len(set(a) & set(b)) / args.k for a, b in zip(ids, truth)])
+        print(f"{mode:>9} {build:>8.2f} {per_query:>9.3f} {recall:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
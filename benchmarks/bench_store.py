@@ -0,0 +1,95 @@
+"""fdp_store vs CSV: size on disk, write/read throughput and peak RAM on synthetic TNA rounds.
+
+    python -m benchmarks.bench_store --rows 1000000 --rounds 4
+
+Peak MB is the traced allocation peak of each read (writes are not traced); rows/s is
+over all rows, including for the single-round read.
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+import fdp_core
+from benchmarks.synthetic import synthetic_profiles
+from benchmarks.timing import timed
+from fdp_store import ScoreStore, convert_csv
+
+CODES = list(fdp_core.SUBDOMAIN_CODES)
+DEPARTMENTS = np.array(["CSE", "ECE", "MBA", "MECH", "CIVIL", "EEE"], dtype=object)
+
+
+def _rounds(rows, rounds):
+    for r in range(rounds):
+        frame = pd.DataFrame(synthetic_profiles(rows // rounds, seed=r), columns=CODES)
+        frame.insert(0, "department", DEPARTMENTS[np.arange(len(frame)) % len(DEPARTMENTS)])
+        frame["round"] = 2021 + r
+        yield frame
+
+
+def _peak_mb(fn):
+    """Peak traced allocation of one call (traced separately: tracing slows pandas a lot)."""
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1] / 1e6
+    tracemalloc.stop()
+    return peak
+
+
+def _size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500_000, help="total rows over all rounds")
+    parser.add_argument("--rounds", type=int, default=4)
+    args = parser.parse_args(argv)
+
+    frames = list(_rounds(args.rows, args.rounds))
+    rows = sum(len(f) for f in frames)
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "history.csv")
+        store_path = os.path.join(tmp, "history_store")
+        converted = os.path.join(tmp, "converted_store")
+
+        def write_csv():
+            for i, frame in enumerate(frames):
+                frame.to_csv(csv_path, mode="a" if i else "w", header=not i, index=False)
+
+        def write_store():
+            store = ScoreStore(store_path, partition_by=["round"])
+            for frame in frames:
+                store.append(frame)
+
+        cases = [
+            ("write   csv (append rounds)", write_csv),
+            ("write   store (append rounds)", write_store),
+            ("convert csv -> store", lambda: convert_csv(csv_path, converted, ["round"])),
+            ("read    csv, all columns", lambda: pd.read_csv(csv_path)),
+            ("read    store, all columns", lambda: ScoreStore(store_path).read()),
+            ("read    csv -> 43-score matrix", lambda: pd.read_csv(csv_path, usecols=CODES)[CODES].to_numpy(np.float32)),
+            ("read    store -> 43-score matrix", lambda: ScoreStore(store_path).score_matrix()),
+            ("read    csv, 3 columns", lambda: pd.read_csv(csv_path, usecols=["department", "A11", "D32"])),
+            ("read    store, 3 columns", lambda: ScoreStore(store_path).read(["department", "A11", "D32"])),
+            ("read    store, 1 round of scores", lambda: ScoreStore(store_path).score_matrix(where={"round": 2021})),
+        ]
+        print(f"{rows:,} rows x {len(CODES)} subdomains in {args.rounds} rounds")
+        print(f"{'case':<34} {'seconds':>8} {'rows/s':>12} {'peak MB':>8}")
+        for name, fn in cases:
+            _, elapsed = timed(fn)
+            peak = f"{_peak_mb(fn):.1f}" if name.startswith("read") else "-"
+            print(f"{name:<34} {elapsed:>8.3f} {rows / elapsed:>12,.0f} {peak:>8}")
+            if name.startswith("convert"):
+                shutil.rmtree(converted)
+        print(f"size    csv {_size(csv_path) / 1e6:.1f} MB, store {_size(store_path) / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Load generator for fdp_service: p50/p99 latency and throughput.
+
+Starts the service in a subprocess (unless ``--url-port`` points at a running
+one) and fires single ``/recommend`` requests from concurrent keep-alive clients.
+
+    python -m benchmarks.load_service --requests 5000 --concurrency 64
+"""
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+import fdp_core
+
+
+async def _client(host, port, bodies, latencies):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for body in bodies:
+            start = time.perf_counter()
+            writer.write(
+                f"POST /recommend HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+            status = await reader.readline()
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":")[1])
+            await reader.readexactly(length)
+            if b" 200 " not in status:
+                raise RuntimeError(f"Request failed: {status!r}")
+            latencies.append(time.perf_counter() - start)
+    finally:
+        writer.close()
+
+
+async def _run(host, port, n_requests, concurrency, seed):
+    rng = np.random.default_rng(seed)
+    X = np.round(rng.uniform(1, 10, size=(n_requests, len(fdp_core.SUBDOMAIN_CODES))), 2)
+    bodies = [json.dumps({"scores": dict(zip(fdp_core.SUBDOMAIN_CODES, row.tolist()))}).encode() for row in X]
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(_client(host, port, bodies[i::concurrency], latencies) for i in range(concurrency)))
+    return np.array(latencies), time.perf_counter() - start
+
+
+async def _wait_ready(host, port, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.1)
+    raise RuntimeError("Service did not start")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--external", action="store_true", help="use an already running service")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    args = parser.parse_args(argv)
+
+    proc = None
+    if not args.external:
+        proc = subprocess.Popen([sys.executable, "fdp_service.py", "--host", args.host, "--port", str(args.port),
+                                 "--max-wait-ms", str(args.max_wait_ms)], stdout=subprocess.DEVNULL)
+    try:
+        asyncio.run(_wait_ready(args.host, args.port))
+        print(f"{'clients':>8} {'requests':>9} {'p50 ms':>8} {'p99 ms':>8} {'req/s':>9}")
+        for concurrency in args.concurrency:
+            latencies, elapsed = asyncio.run(_run(args.host, args.port, args.requests, concurrency, seed=concurrency))
+            p50, p99 = np.percentile(latencies, [50, 99]) * 1e3
+            print(f"{concurrency:>8} {len(latencies):>9} {p50:>8.2f} {p99:>8.2f} {len(latencies) / elapsed:>9.0f}")
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Headless benchmark suite for the recommender hot paths.
+
+Covers model cold-load time (fresh interpreter, artifact and pickle), single
+profile end-to-end latency, batch throughput at several sizes, rule engine and
+top-3 throughput, and peak RSS, on synthetic profiles drawn from the
+distribution of tna_scores_dataset.csv. Results are written as JSON; with
+``--baseline`` every metric is compared against a stored run and regressions
+beyond ``--tolerance`` are flagged (exit status 1).
+
+    python -m benchmarks.suite --output bench.json
+    python -m benchmarks.suite --baseline benchmarks/baseline.json
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+import fdp_core
+from benchmarks.synthetic import synthetic_profiles
+from benchmarks.timing import best_of, peak_rss_mb
+
+_COLD_LOAD = (
+    "import time; start = time.perf_counter(); import fdp_core; "
+    "fdp_core.load_model({path!r}); print(time.perf_counter() - start)"
+)
+
+
+def _metric(value, unit, better):
+    return {"value": round(float(value), 6), "unit": unit, "better": better}
+
+
+def cold_load(path, repeat=3):
+    """Best wall time to import fdp_core and load ``path`` in a fresh interpreter."""
+    times = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-W", "ignore", "-c", _COLD_LOAD.format(path=path)],
+                             capture_output=True, text=True, check=True)
+        times.append(float(out.stdout.strip().splitlines()[-1]))
+    return min(times)
+
+
+def run(quick=False):
+    results = {}
+    for label, path in (("artifact", fdp_core.ARTIFACT_PATH), ("pickle", fdp_core.PICKLE_PATH)):
+        results[f"cold_load_{label}_s"] = _metric(cold_load(path, 1 if quick else 3), "s", "lower")
+
+    classifier = fdp_core.load_model()
+    profiles = synthetic_profiles(200 if quick else 2000, seed=1).astype(fdp_core.DTYPE)
+    fdp_core.recommend(classifier, profiles[:1])
+    latencies = []
+    for x in profiles:
+        start = time.perf_counter()
+        fdp_core.recommend(classifier, x)
+        latencies.append(time.perf_counter() - start)
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1e3
+    results["single_profile_p50_ms"] = _metric(p50, "ms", "lower")
+    results["single_profile_p99_ms"] = _metric(p99, "ms", "lower")
+
+    for n in (100, 10_000) if quick else (100, 10_000, 100_000):
+        X = synthetic_profiles(n, seed=2).astype(fdp_core.DTYPE)
+        elapsed = best_of(lambda: fdp_core.score(classifier, X), 1 if n >= 10_000 else 5)
+        results[f"batch_{n}_rows_per_s"] = _metric(n / elapsed, "rows/s", "higher")
+
+    X = synthetic_profiles(100_000 if quick else 1_000_000, seed=3).astype(fdp_core.DTYPE)
+    results["rules_rows_per_s"] = _metric(len(X) / best_of(lambda: fdp_core.RULES.evaluate(X), 3), "rows/s", "higher")
+    results["top3_rows_per_s"] = _metric(len(X) / best_of(lambda: fdp_core.top_subdomains(X, 3), 3), "rows/s", "higher")
+
+    rss = peak_rss_mb()
+    if rss is not None:
+        results["peak_rss_mb"] = _metric(rss, "MB", "lower")
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Rows of (metric, baseline, current, relative change, regressed)."""
+    rows = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if base is None or not base["value"]:
+            continue
+        change = (current["value"] - base["value"]) / base["value"]
+        worse = change > tolerance if current["better"] == "lower" else change < -tolerance
+        rows.append((name, base["value"], current["value"], change, worse))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the recommender hot paths.")
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--baseline", help="compare against this results JSON")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown")
+    parser.add_argument("--quick", action="store_true", help="smaller sizes for a fast smoke run")
+    args = parser.parse_args(argv)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "model": fdp_core.MODEL_PATH,
+            "quick": args.quick,
+        },
+        "results": run(args.quick),
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        rows = compare(report["results"], baseline, args.tolerance)
+        print(f"{'metric':<26} {'baseline':>12} {'current':>12} {'change':>8}", file=sys.stderr)
+        for name, base, current, change, worse in rows:
+            flag = "  REGRESSION" if worse else ""
+            print(f"{name:<26} {base:>12.4g} {current:>12.4g} {change:>+7.1%}{flag}", file=sys.stderr)
+        if any(worse for *_, worse in rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+"""Synthetic TNA profiles drawn from tna_scores_dataset.csv's per-subdomain score distribution."""
+import numpy as np
+import pandas as pd
+
+import fdp_core
+
+_reference = None
+
+
+def reference_scores(path="tna_scores_dataset.csv"):
+    global _reference
+    if _reference is None:
+        _reference = pd.read_csv(path)[list(fdp_core.SUBDOMAIN_CODES)].to_numpy()
+    return _reference
+
+
+def synthetic_profiles(rows, seed=0):
+    """``rows`` x 43 integer score matrix; each column resampled independently."""
+    reference = reference_scores()
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(0, len(reference), size=(rows, reference.shape[1]))
+    return np.take_along_axis(reference, picks, axis=0)
+
+
+def synthetic_csv(path, rows, seed=0, chunk=200_000):
+    """Write ``rows`` synthetic profiles as a TNA scores CSV."""
+    with open(path, "w") as f:
+        f.write(",".join(fdp_core.SUBDOMAIN_CODES) + "\n")
+        for start in range(0, rows, chunk):
+            sample = synthetic_profiles(min(chunk, rows - start), seed=seed + start)
+            np.savetxt(f, sample, fmt="%d", delimiter=",")
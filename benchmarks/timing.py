@@ -0,0 +1,25 @@
+"""Timing and memory helpers shared by the benchmarks and the tools' built-in reports."""
+import sys
+import time
+
+
+def timed(fn):
+    """``(fn(), seconds)`` for one call."""
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def best_of(fn, repeat):
+    """Best wall time of ``repeat`` calls, in seconds."""
+    return min(timed(fn)[1] for _ in range(repeat))
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, or None where unavailable."""
+    try:
+        import resource
+    except ImportError:  # not available on Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / (1024 if sys.platform == "darwin" else 1)
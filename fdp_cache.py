@@ -0,0 +1,143 @@
+"""Recommendation cache keyed on quantized score vectors.
+
+Scores are entered in 0.01 steps over 1-10, so a profile is keyed on its scores
+rounded to hundredths (``int32`` bytes), and misses are computed from the rounded
+scores, so a key maps to the same bundle whichever raw row arrived first. The
+in-memory tier is a bounded LRU with hit/miss counters and is thread-safe, so one
+instance can be shared across Streamlit sessions; an optional SQLite file adds a
+disk tier that survives restarts, letting repeated institutional batch runs skip
+recomputation.
+"""
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+SCALE = 100
+
+
+def quantize(X):
+    """Integer hundredths of each score, shape (N, n_features); raises on non-finite scores."""
+    X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+    if not np.isfinite(X).all():
+        raise ValueError("Cannot cache non-finite scores")
+    return np.rint(X * SCALE).astype(np.int32)
+
+
+class RecommendationCache:
+    """LRU of recommendation bundles with an optional SQLite disk tier.
+
+    ``namespace`` is stored with every disk entry so bundles computed by a
+    different model or rule table are never served from the same file.
+    """
+
+    def __init__(self, maxsize=4096, disk_path=None, namespace=""):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.namespace = namespace
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if disk_path is not None:
+            self._db = sqlite3.connect(disk_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS bundles "
+                "(namespace TEXT, key BLOB, bundle TEXT, PRIMARY KEY (namespace, key))"
+            )
+            self._db.commit()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remember(self, key, bundle):
+        self._entries[key] = bundle
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def _disk_get(self, keys):
+        found = {}
+        for start in range(0, len(keys), 500):
+            part = keys[start:start + 500]
+            rows = self._db.execute(
+                f"SELECT key, bundle FROM bundles WHERE namespace = ? AND key IN ({','.join('?' * len(part))})",
+                [self.namespace, *part],
+            )
+            found.update((bytes(key), json.loads(bundle)) for key, bundle in rows)
+        return found
+
+    def get_many(self, X, compute):
+        """Bundles for every row of ``X``; ``compute(X_missing)`` fills misses.
+
+        ``compute`` receives only the distinct quantized rows (``quantize / SCALE``)
+        not found in either tier, as one matrix, and must return one bundle per row.
+        """
+        Q = quantize(X)
+        keys = [row.tobytes() for row in Q]
+        out = [None] * len(keys)
+        missing = {}
+        with self._lock:
+            for i, key in enumerate(keys):
+                bundle = self._entries.get(key)
+                if bundle is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    out[i] = bundle
+                else:
+                    missing.setdefault(key, []).append(i)
+            if missing and self._db is not None:
+                for key, bundle in self._disk_get(list(missing)).items():
+                    self.disk_hits += len(missing[key])
+                    self.hits += len(missing[key])
+                    for i in missing.pop(key):
+                        out[i] = bundle
+                    self._remember(key, bundle)
+
+        if missing:
+            rows = [idxs[0] for idxs in missing.values()]
+            computed = compute(Q[rows] / SCALE)
+            with self._lock:
+                for (key, idxs), bundle in zip(missing.items(), computed):
+                    self.misses += 1
+                    self.hits += len(idxs) - 1
+                    for i in idxs:
+                        out[i] = bundle
+                    self._remember(key, bundle)
+                if self._db is not None:
+                    self._db.executemany(
+                        "INSERT OR REPLACE INTO bundles VALUES (?, ?, ?)",
+                        [(self.namespace, key, json.dumps(bundle)) for key, bundle in zip(missing, computed)],
+                    )
+                    self._db.commit()
+        return out
+
+    def get(self, x, compute):
+        """Bundle for a single score vector."""
+        return self.get_many(np.asarray(x)[None, :] if np.ndim(x) == 1 else x, compute)[0]
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_hits": self.disk_hits,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.disk_hits = 0
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
@@ -0,0 +1,140 @@
+"""Size/latency trade-offs for the forest: fewer trees, capped depth, distillation.
+
+Starting from ``tna_model.pkl`` this produces smaller variants as flat-array
+artifacts and reports, on ``tna_scores_dataset.csv``, how closely each matches
+the original (prediction agreement, probability error) next to its size and
+single-row / full-dataset latency:
+
+* ``trees<N>``     - the first N trees of the forest.
+* ``depth<D>``     - every tree cut at depth D (cut nodes predict their own
+                     class distribution).
+* ``distill<D>``   - one regression tree of depth D fitted to the forest's own
+                     probabilities on the dataset plus resampled profiles.
+
+Any variant can then be served by pointing ``FDP_MODEL`` (or ``--model`` of the
+batch tools) at its directory.
+
+    python fdp_compress.py --out-dir model_variants --trees 10 25 50 --depths 6 8 --distill-depths 6 8
+"""
+import argparse
+import json
+import os
+import pickle
+import time
+
+import numpy as np
+import pandas as pd
+
+import fdp_core
+from fdp_forest import FlatForest, save_artifact
+
+
+def _flat_from_regressor(tree_model, forest):
+    """Single-tree FlatForest whose leaves hold [1 - p, p] from a regression tree."""
+    t = tree_model.tree_
+    leaf = t.children_left == -1
+    own = np.arange(t.node_count, dtype=np.int32)
+    p = np.clip(t.value[:, 0, 0], 0.0, 1.0)
+    return FlatForest(
+        feature=np.where(leaf, 0, t.feature).astype(np.int32),
+        threshold=t.threshold.astype(np.float64),
+        left=np.where(leaf, own, t.children_left).astype(np.int32),
+        right=np.where(leaf, own, t.children_right).astype(np.int32),
+        value=np.stack([1.0 - p, p], axis=1),
+        roots=np.zeros(1, dtype=np.int32),
+        max_depth=t.max_depth,
+        classes=forest.classes_,
+        n_features_in=forest.n_features_in_,
+        feature_names_in=getattr(forest, "feature_names_in_", None),
+    )
+
+
+def distill(forest, X, max_depth, n_synthetic=50_000, seed=0):
+    """Fit a depth-``max_depth`` regression tree to the forest's positive-class probability.
+
+    Training rows are ``X`` plus ``n_synthetic`` profiles resampled column-wise from it.
+    """
+    from sklearn.tree import DecisionTreeRegressor
+
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(0, len(X), size=(n_synthetic, X.shape[1]))
+    train = np.vstack([X, np.take_along_axis(X, picks, axis=0)]).astype(np.float32)
+    target = forest.predict_proba(train)[:, 1]
+    tree = DecisionTreeRegressor(max_depth=max_depth, random_state=seed).fit(train, target)
+    return _flat_from_regressor(tree, forest)
+
+
+def nbytes(forest):
+    return sum(np.asarray(getattr(forest, name)).nbytes
+               for name in ("feature", "threshold", "left", "right", "value", "roots"))
+
+
+def _latency_ms(forest, X, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        forest.predict_proba(X)
+        best = min(best, time.perf_counter() - start)
+    return best * 1e3
+
+
+def evaluate(name, forest, reference, X, repeat=20):
+    """Agreement with the reference probabilities plus size and latency."""
+    proba = forest.predict_proba(X)[:, 1]
+    return {
+        "variant": name,
+        "trees": forest.n_trees,
+        "nodes": forest.n_nodes,
+        "max_depth": forest.max_depth,
+        "kbytes": round(nbytes(forest) / 1024, 1),
+        "agreement": float(np.mean((proba >= 0.5) == (reference >= 0.5))),
+        "mean_abs_dp": float(np.mean(np.abs(proba - reference))),
+        "max_abs_dp": float(np.max(np.abs(proba - reference))),
+        "single_row_ms": round(_latency_ms(forest, X[:1], repeat), 4),
+        "dataset_ms": round(_latency_ms(forest, X, max(1, repeat // 4)), 3),
+    }
+
+
+def build_variants(forest, X, trees=(), depths=(), distill_depths=()):
+    variants = {"original": forest}
+    for n in trees:
+        variants[f"trees{n}"] = forest.subset(n)
+    for d in depths:
+        variants[f"depth{d}"] = forest.truncate(d)
+    for d in distill_depths:
+        variants[f"distill{d}"] = distill(forest, X, d)
+    return variants
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Produce and compare smaller forest variants.")
+    parser.add_argument("--model", default=fdp_core.PICKLE_PATH, help="pickled sklearn forest")
+    parser.add_argument("--data", default="tna_scores_dataset.csv")
+    parser.add_argument("--trees", type=int, nargs="*", default=[10, 25, 50])
+    parser.add_argument("--depths", type=int, nargs="*", default=[6, 8, 10])
+    parser.add_argument("--distill-depths", type=int, nargs="*", default=[6, 8])
+    parser.add_argument("--out-dir", help="save every variant as an artifact directory here")
+    args = parser.parse_args(argv)
+
+    with open(args.model, "rb") as f:
+        forest = FlatForest.from_sklearn(fdp_core.SUBDOMAIN_INDEX.validate(pickle.load(f)))
+    X = pd.read_csv(args.data)[list(fdp_core.SUBDOMAIN_CODES)].to_numpy(dtype=fdp_core.DTYPE)
+    reference = forest.predict_proba(X)[:, 1]
+
+    report = []
+    for name, variant in build_variants(forest, X, args.trees, args.depths, args.distill_depths).items():
+        row = evaluate(name, variant, reference, X)
+        report.append(row)
+        if args.out_dir:
+            save_artifact(variant, os.path.join(args.out_dir, name), metadata={"variant_of": args.model, **row})
+
+    columns = ["variant", "trees", "nodes", "max_depth", "kbytes", "agreement", "mean_abs_dp",
+               "max_abs_dp", "single_row_ms", "dataset_ms"]
+    print(pd.DataFrame(report, columns=columns).to_string(index=False))
+    if args.out_dir:
+        with open(os.path.join(args.out_dir, "report.json"), "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,415 @@
+"""Shared TNA FDP recommender logic: topic map, rule chain, model loading and scoring.
+
+Used by the Streamlit app and the batch tools so both produce identical output.
+"""
+import json
+import os
+import pickle
+import warnings
+from collections import namedtuple
+
+import numpy as np
+
+import fdp_forest
+import fdp_rules
+from fdp_metrics import METRICS
+from fdp_subdomains import DTYPE, SubdomainIndex
+
+# Model location: $FDP_MODEL if set, else the flat-array artifact directory,
+# falling back to the original pickle
+PICKLE_PATH = "tna_model.pkl"
+ARTIFACT_PATH = "tna_model"
+MODEL_PATH = os.environ.get("FDP_MODEL") or (ARTIFACT_PATH if os.path.isdir(ARTIFACT_PATH) else PICKLE_PATH)
+# File-scale tools default to the pickle instead: sklearn's compiled traversal is
+# ~3x faster than FlatForest from ~10k rows, while the artifact wins for single
+# profiles and small batches (benchmarks/bench_forest.py)
+BATCH_MODEL_PATH = os.environ.get("FDP_MODEL") or (PICKLE_PATH if os.path.exists(PICKLE_PATH) else MODEL_PATH)
+
+# TNA scores are entered on a 1-10 scale
+SCORE_MIN, SCORE_MAX = 1.0, 10.0
+
+# FDP topic mapping
+fdp_topic_map = {
+    "A11:Subject Knowledge": [
+        "Advanced Subject Masterclasses", "Emerging Interdisciplinary Trends", 
+        "AI Applications in Discipline", "Future Skills in Domain", 
+        "Deep Dive Conceptual Workshops", "Cutting-edge Innovations"
+    ],
+    "A12:Teaching Methods – Theoretical Knowledge": [
+        "AI-enhanced Teaching Strategies", "Flipped & Hybrid Classrooms", 
+        "Socratic & Case-based Learning", "Interactive Lecture Design", 
+        "Learning Analytics for Theory", "Digital Pedagogy Essentials"
+    ],
+    "A13:Teaching Methods – Practical Application": [
+        "Project-based & Experiential Learning", "AI Labs & Virtual Simulations", 
+        "Industry-aligned Practical Pedagogy", "Blended Hands-on Approaches", 
+        "Design Thinking in Curriculum", "Immersive Tech for Practical Learning"
+    ],
+    "A14:Information Literacy and Management": [
+        "Data Mining for Faculty", "AI Tools for Information Management", 
+        "Reference Managers & Literature Maps", "Smart Digital Libraries", 
+        "Evidence-based Information Use", "Scholarly Database Training"
+    ],
+    "A15:Languages": [
+        "Scholarly Writing & Technical English", "AI-based Language Tools", 
+        "Academic Presentation Skills", "Discipline-specific Communication", 
+        "Language Models for Research", "Multilingual Digital Tools"
+    ],
+    "A16:Academic Literacy and Numeracy": [
+        "Quantitative Reasoning in Academia", "AI for Research Methods", 
+        "Data Interpretation Skills", "Academic Integrity & Writing", 
+        "Survey Design & Analysis", "Numeracy in Social Sciences"
+    ],
+
+    "A21:Analyzing": [
+        "AI for Critical Analysis", "Root Cause & Data-driven Analysis", 
+        "Analytical Thinking Labs", "Systems Thinking Approaches", 
+        "Data Visualization & Interpretation", "Strategic Problem Dissection"
+    ],
+    "A22:Synthesizing": [
+        "Synthesis & Concept Mapping", "Interdisciplinary Integration", 
+        "AI to Discover Connections", "Thematic Reviews & Meta-analysis", 
+        "Big Picture Thinking", "Synthesizing Evidence & Policy"
+    ],
+    "A23:Critical Thinking": [
+        "Debate & Argumentation Workshops", "Logic & Reasoning Bootcamps", 
+        "Reflective Inquiry with AI", "Case & Scenario Analysis", 
+        "Bias & Fallacy Awareness", "Building Intellectual Autonomy"
+    ],
+    "A24:Evaluating": [
+        "Outcome Assessment Tools", "AI-driven Rubric Design", 
+        "Evaluating Impact & ROI", "Peer Review & Feedback Loops", 
+        "Digital Assessment Platforms", "Evaluation in Accreditation Contexts"
+    ],
+    "A25:Problem Solving": [
+        "AI for Decision Support", "Creative Problem Solving Frameworks", 
+        "Hackathons & Solution Labs", "Scenario Planning", 
+        "Collaborative Problem Solving", "Complex Systems Solutions"
+    ],
+
+    "A31:Inquiring Mind": [
+        "Cultivating Curiosity", "Research Question Design", 
+        "AI Tools to Explore Ideas", "Inquiry-based Teaching", 
+        "Creative Thinking Labs", "Exploratory Learning Pathways"
+    ],
+    "A32:Intellectual Insight": [
+        "Advanced Conceptual Frameworks", "Strategic Scenario Building", 
+        "Abstract Modelling with AI", "Futures & Foresight", 
+        "Analytical Depth Workshops", "Strategic Research Visioning"
+    ],
+    "A33:Innovation": [
+        "Innovation & Design Sprints", "AI-driven Creativity", 
+        "Startup Ecosystems for Faculty", "Patents & Prototyping", 
+        "Entrepreneurial Mindset", "EdTech Innovations"
+    ],
+    "A34:Argument Construction": [
+        "Evidence-based Argumentation", "Position Papers with AI Support", 
+        "Ethics in Debates", "Structuring Research Arguments", 
+        "Critical Dialogues", "Policy Argument Labs"
+    ],
+
+    "B11:Enthusiasm": [
+        "Gamification & Motivation", "Fostering Passion in Teaching", 
+        "AI Tools to Engage Learners", "Positive Pedagogy Practices", 
+        "Energy Management", "Joyful Learning Approaches"
+    ],
+    "B12:Perseverance": [
+        "Building Academic Resilience", "Overcoming Teaching Challenges", 
+        "Goal Mapping for Long-term Impact", "Grit & Growth Mindset", 
+        "Handling Failures in Research", "Sustaining Motivation"
+    ],
+    "B13:Integrity": [
+        "Academic & Research Ethics", "Plagiarism Tools & AI Checkers", 
+        "Responsible Data Use", "Integrity in Publications", 
+        "Moral Reasoning in Teaching", "AI Bias & Ethics"
+    ],
+    "B14:Responsibility": [
+        "Owning the Learning Process", "Self-directed Faculty Development", 
+        "Portfolio-driven Growth", "Accountability in Projects", 
+        "Ethical Leadership", "Service Commitments"
+    ],
+
+    "B21:Preparation and Prioritization": [
+        "Data-informed Lesson Planning", "Timeboxing for Faculty", 
+        "AI Tools for Planning", "Strategic Prioritization", 
+        "Curriculum Blueprints", "Outcome-aligned Planning"
+    ],
+    "B22:Commitment to Teaching": [
+        "Professional Accountability", "Aligning Personal & Institutional Goals", 
+        "Reflective Teaching Practices", "Long-term Teaching Strategies", 
+        "Continuous Engagement Models", "Leveraging AI for Improvement"
+    ],
+    "B23:Time Management": [
+        "Digital Time Management Tools", "Efficient Academic Workflows", 
+        "AI-based Scheduling", "Deadline Management Strategies", 
+        "Balanced Research & Teaching", "Overcoming Procrastination"
+    ],
+    "B24:Responsiveness to Change": [
+        "Change Management Frameworks", "Adapting to EdTech & AI", 
+        "Risk-taking in Pedagogy", "Flexible Curriculum Approaches", 
+        "Navigating Policy Shifts", "Scenario-based Adaptability"
+    ],
+
+    "B31:Continuing Professional Development": [
+        "Career Progression Paths", "Certifications in AI & EdTech", 
+        "Global Fellowship Opportunities", "Showcasing in Digital Portfolios", 
+        "Professional Learning Networks", "Research Leadership"
+    ],
+    "B32:Student Feedback": [
+        "Collecting & Acting on Feedback", "AI Sentiment Analysis", 
+        "Closing the Feedback Loop", "Designing Effective Surveys", 
+        "Feedback for Curriculum Tuning", "Reflective Student Dialogues"
+    ],
+    "B33:Networking": [
+        "Building Inter-institutional Networks", "Collaborative Platforms", 
+        "AI-driven Professional Connects", "Conference Ecosystems", 
+        "Online Academic Communities", "Global Partnerships"
+    ],
+    "B34:Reputation and Esteem": [
+        "Thought Leadership via Digital Media", "Public Speaking Excellence", 
+        "AI-assisted Profile Building", "Awards & Recognition Prep", 
+        "Research Visibility", "Media Engagement Strategies"
+    ],
+
+    "C11:Ethics, Principles, and Sustainability": [
+        "Ethics in AI & Research", "Green Campuses & Teaching", 
+        "Sustainable Development Goals in Curriculum", "Responsible Innovations", 
+        "Equity-focused Pedagogy", "AI for Social Good"
+    ],
+    "C12:Intellectual Property Rights and Copyright": [
+        "IPR & Patents Filing", "Copyright Compliance", 
+        "AI-generated Content Ethics", "Creative Commons Licenses", 
+        "Fair Use in Academia", "Data Sharing Agreements"
+    ],
+    "C21:Research Strategy": [
+        "Aligning with Institutional Missions", "Data-driven Strategic Planning", 
+        "AI to Spot Research Gaps", "Collaborative Strategy Labs", 
+        "Foresight-driven Research", "NEP 2020 & Beyond"
+    ],
+    "C31:Income and Funding Generation": [
+        "Grant Proposal Writing", "AI Tools for Funding Match", 
+        "Budget Planning Workshops", "CSR & Industry Funding", 
+        "International Grants", "Revenue Diversification Strategies"
+    ],
+
+    "D11:Team Working": [
+        "High-performing Academic Teams", "Collaborative Research Tools", 
+        "AI for Team Dynamics", "Shared Vision Development", 
+        "Cross-functional Synergies", "Joint Faculty Development"
+    ],
+    "D12:People Management": [
+        "Delegation & Empowerment", "Negotiating & Influencing", 
+        "Conflict Resolution", "Mentoring Diverse Teams", 
+        "AI Tools for HR & Planning", "Building Psychological Safety"
+    ],
+    "D13:Supervision": [
+        "Effective Research Supervision", "AI for Plagiarism & Review", 
+        "Mentored Assessments", "Outcome-driven Project Management", 
+        "Guided Inquiry Techniques", "Tracking Progress Digitally"
+    ],
+    "D14:Mentoring": [
+        "Structured Mentorship Programs", "Skill Transfer Models", 
+        "Reverse Mentoring", "Inclusive Mentoring Approaches", 
+        "Mentoring for Innovation", "Longitudinal Faculty Mentoring"
+    ],
+    "D15:Influence and Leadership": [
+        "Institutional Leadership Labs", "Strategic Influence Models", 
+        "Policy Advocacy & AI", "Community Engagement", 
+        "Ethical Leadership in AI Era", "Vision & Legacy Building"
+    ],
+    "D16:Collaboration": [
+        "Joint Research Ventures", "Industry-academia Connects", 
+        "Digital Collaboration Tools", "Global Research Consortia", 
+        "Virtual International Teams", "Collaborative Publishing"
+    ],
+    "D17:Equality and Diversity": [
+        "Inclusive Pedagogies", "Diversity Sensitization Labs", 
+        "Equity Audits", "Policy for Inclusion", 
+        "AI & Bias Awareness", "Universal Design for Learning"
+    ],
+
+    "D21:Communication Methods": [
+        "AI-powered Communication Platforms", "Public Engagement", 
+        "Academic Storytelling", "Policy Brief Writing", 
+        "Science Communication", "Stakeholder Reporting"
+    ],
+    "D22:Communication Media": [
+        "Digital Outreach Strategies", "Webinars & MOOCs Design", 
+        "Social Media for Academia", "Video Lecturing Best Practices", 
+        "Podcasting Academic Content", "AI in Media Production"
+    ],
+    "D23:Publication": [
+        "Publishing in High Impact Journals", "Open Access Strategies", 
+        "AI for Manuscript Editing", "Conference Paper Excellence", 
+        "Ethics in Publication", "Boosting Research Visibility"
+    ],
+
+    "D31:Teaching": [
+        "AI-enhanced Teaching Aids", "Capstone & UG Research Projects", 
+        "Industry-driven Seminars", "Outcome-based Education", 
+        "Student-centred Learning", "Hybrid Teaching Environments"
+    ],
+    "D32:Policy": [
+        "NBA/NAAC & Global Benchmarks", "Policy Impact on Teaching", 
+        "Digital Policies in Education", "NEP 2020 Implementation", 
+        "AI in Education Policies", "Accreditation-readiness"
+    ]
+}
+
+# Subdomains in model feature order; codes (A11..D32) match the
+# tna_scores_dataset.csv header
+SUBDOMAIN_INDEX = SubdomainIndex(fdp_topic_map)
+SUBDOMAINS = SUBDOMAIN_INDEX.keys
+SUBDOMAIN_CODES = SUBDOMAIN_INDEX.codes
+
+
+def load_model(path=MODEL_PATH, index=SUBDOMAIN_INDEX, mmap=True):
+    """Load a flat-array artifact directory (memory-mapped) or a pickled forest.
+
+    The feature order is checked against the subdomain registry, including the
+    ``<pickle>.meta.json`` sidecar written by fdp_train when one is present.
+    """
+    with METRICS.span("model_load"):
+        return _load_model(path, index, mmap)
+
+
+def _load_model(path, index, mmap):
+    if os.path.isdir(path):
+        return index.validate(fdp_forest.load_artifact(path, mmap=mmap))
+    meta_path = f"{path}.meta.json"
+    if os.path.exists(meta_path):
+        with open(meta_path, encoding="utf-8") as f:
+            names = json.load(f).get("feature_names")
+        if names is not None and tuple(names) != index.codes:
+            raise ValueError(f"{meta_path} feature order does not match the subdomain registry")
+    with open(path, "rb") as f:
+        return index.validate(pickle.load(f))
+
+
+# Smart rules, compiled once from the declarative table in fdp_rules.json
+RULES = fdp_rules.compile_rules(fdp_rules.load_rule_table(), SUBDOMAINS)
+
+
+def apply_rules(scores, rules=RULES):
+    """Run the smart rules on one {subdomain: score} dict.
+
+    Returns the ``(rule_based_fdps, triggered_rules)`` lists.
+    """
+    hits = rules.evaluate(SUBDOMAIN_INDEX.vector(scores))
+    return rules.lists(hits[0])
+
+
+def predict(classifier, X):
+    """Score an N x 43 matrix with a single ``predict_proba`` pass.
+
+    Returns ``(prediction, probability)``; predictions are derived from the same
+    probabilities the way ``classifier.predict`` does, and ``probability`` is the
+    positive-class (column 1) probability shown in the app.
+    """
+    X = np.atleast_2d(np.asarray(X, dtype=DTYPE))
+    with METRICS.span("predict_proba"), warnings.catch_warnings():
+        # Feature order was checked against feature_names_in_ at load time
+        warnings.filterwarnings("ignore", message="X does not have valid feature names")
+        proba = classifier.predict_proba(X)
+    prediction = classifier.classes_.take(np.argmax(proba, axis=1))
+    return prediction, proba[:, 1]
+
+
+def top_subdomains(X, k=3, index=SUBDOMAIN_INDEX):
+    """Column indices of the ``k`` highest scores per row, highest first."""
+    with METRICS.span("top_k"):
+        return index.top_k(X, k)
+
+
+def score_errors(X, codes=SUBDOMAIN_CODES):
+    """``{row: reason}`` for the rows of an N x 43 matrix that must not be scored.
+
+    Every score must be a finite number from ``SCORE_MIN`` to ``SCORE_MAX``; the
+    reason names the first offending column. batch_score, fdp_service and
+    fdp_stream all validate with this.
+    """
+    X = np.atleast_2d(X)
+    # NaN fails both comparisons, so it is caught here too
+    bad = ~((X >= SCORE_MIN) & (X <= SCORE_MAX))
+    errors = {}
+    for i in np.flatnonzero(bad.any(axis=1)).tolist():
+        j = int(np.argmax(bad[i]))
+        value = X[i, j]
+        errors[i] = (f"{codes[j]} is not a finite number" if not np.isfinite(value)
+                     else f"{codes[j]} = {value:g} is outside {SCORE_MIN:g}-{SCORE_MAX:g}")
+    return errors
+
+
+def score_vector(scores, index=SUBDOMAIN_INDEX):
+    """Validated float32 score vector from one {name or code: score} JSON object.
+
+    Raises KeyError for an unknown subdomain, and ValueError for a duplicate or
+    missing subdomain, a value that is not a JSON number (strings and booleans
+    included) or a score ``score_errors`` rejects. Used by fdp_service and fdp_stream.
+    """
+    if not isinstance(scores, dict):
+        raise ValueError("scores must be an object of subdomain -> score")
+    for key, value in scores.items():
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"Score for {key!r} must be a number, not {type(value).__name__}")
+    try:
+        x = index.vector(scores)
+    except OverflowError:
+        raise ValueError(f"scores must be between {SCORE_MIN:g} and {SCORE_MAX:g}") from None
+    errors = score_errors(x, index.codes)
+    if errors:
+        raise ValueError(errors[0])
+    return x
+
+
+# Array-form scoring result for a batch: prediction and probability (N,),
+# top-k column indices (N, k) and the smart-rule hit matrix (N, n_rules)
+Scored = namedtuple("Scored", "prediction probability top hits")
+
+
+def score(classifier, X, k=3, index=SUBDOMAIN_INDEX, rules=RULES):
+    """Score an N x 43 matrix: one model pass, one top-k pass, one rule pass.
+
+    ``index`` and ``rules`` default to the built-in topic map and rule table;
+    fdp_tenants passes an institution's own.
+    """
+    with METRICS.span("feature_assembly"):
+        X = np.atleast_2d(np.asarray(X, dtype=DTYPE))
+    METRICS.count("rows_scored", len(X))
+    METRICS.observe("batch_size", len(X))
+    prediction, probability = predict(classifier, X)
+    top = top_subdomains(X, k, index)
+    with METRICS.span("rules"):
+        hits = rules.evaluate(X)
+    return Scored(prediction, probability, top, hits)
+
+
+def to_bundles(X, scored, index=SUBDOMAIN_INDEX, rules=RULES):
+    """JSON-serialisable recommendation bundles from a ``Scored`` batch.
+
+    Each bundle holds the prediction, positive-class probability, top-k
+    (subdomain, score) pairs, their FDP topics and the triggered smart rules.
+    """
+    X = np.atleast_2d(X)
+    with METRICS.span("bundle"):
+        return [_bundle(X, scored, i, index, rules) for i in range(len(X))]
+
+
+def _bundle(X, scored, i, index, rules):
+    top = scored.top[i]
+    top_keys = [index.keys[j] for j in top]
+    rule_based_fdps, triggered_rules = rules.lists(scored.hits[i])
+    return {
+        "prediction": scored.prediction[i].item(),
+        "probability": float(scored.probability[i]),
+        "top_subdomains": [[key, round(float(X[i, j]), 2)] for key, j in zip(top_keys, top)],
+        "topics": {key: list(index.topics(j)) for key, j in zip(top_keys, top)},
+        "rule_based_fdps": rule_based_fdps,
+        "triggered_rules": triggered_rules,
+    }
+
+
+def recommend(classifier, X, k=3, index=SUBDOMAIN_INDEX, rules=RULES):
+    """Full recommendation bundle for each row of an N x 43 score matrix."""
+    X = np.atleast_2d(np.asarray(X, dtype=DTYPE))
+    return to_bundles(X, score(classifier, X, k, index, rules), index, rules)
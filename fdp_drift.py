@@ -0,0 +1,341 @@
+"""Drift and data-quality monitoring of incoming TNA scores against the training distribution.
+
+``DriftMonitor`` keeps fixed-size streaming state:
+
+- a 10-bin histogram per subdomain (one bin per whole score 1-10, fractional
+  scores go to the nearest) and a 20-bin histogram of the predicted probability,
+- running count / sum / sum of squares per column (mean and standard deviation),
+- data-quality counters: non-finite and out-of-range (outside 1-10) values, values
+  off the 0.01 grid, straight-lined profiles (all 43 scores equal) and records
+  that could not be parsed at all.
+
+``update`` folds in a batch with one ``bincount``, i.e. O(1) work per record and
+memory independent of the number of records, so it runs inline with
+batch_score, fdp_stream and fdp_service. ``report`` compares the histograms with a
+reference (built from ``tna_scores_dataset.csv`` and shipped as
+``drift_reference.json``):
+
+- PSI, the population stability index; >= 0.1 warns, >= 0.25 alerts,
+- the two-sample Kolmogorov-Smirnov statistic on the binned CDFs, flagged when
+  it exceeds the critical value at alpha = 0.01 for the two sample sizes.
+
+With ``window`` the monitor compares the last complete window of that many
+records instead of everything seen since start.
+
+    python fdp_drift.py reference tna_scores_dataset.csv --output drift_reference.json
+    python fdp_drift.py check round_2025.csv
+    python batch_score.py round_2025.csv scored.csv --drift-report drift.json
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+
+import numpy as np
+
+import fdp_core
+
+REFERENCE_PATH = "drift_reference.json"
+
+SCORE_MIN, SCORE_MAX = fdp_core.SCORE_MIN, fdp_core.SCORE_MAX
+SCORE_EDGES = np.arange(SCORE_MIN - 0.5, SCORE_MAX + 0.51, 1.0)
+PROBABILITY_EDGES = np.linspace(0.0, 1.0, 21)
+
+PSI_WARN = 0.1
+PSI_ALERT = 0.25
+# c(alpha) of the two-sample KS critical value c * sqrt((n + m) / (n * m)), alpha = 0.01
+KS_C = 1.628
+# Below this many records the statistics are reported but never flagged
+MIN_RECORDS = 50
+
+# Laplace smoothing of bin counts, so empty bins do not make PSI infinite
+_SMOOTHING = 0.5
+
+
+class Histograms:
+    """Fixed-bin counts and running moments for ``n_columns`` columns."""
+
+    def __init__(self, edges, n_columns):
+        self.edges = np.asarray(edges, dtype=np.float64)
+        self.counts = np.zeros((n_columns, len(self.edges) - 1), dtype=np.int64)
+        self.total = np.zeros(n_columns)
+        self.sum_sq = np.zeros(n_columns)
+
+    @property
+    def n(self):
+        return self.counts.sum(axis=1)
+
+    def add(self, V, valid):
+        """Fold in (N, columns) values ``V``; only entries where ``valid`` holds are counted."""
+        n_cols, n_bins = self.counts.shape
+        bins = np.clip(np.searchsorted(self.edges, V, side="right") - 1, 0, n_bins - 1)
+        flat = (bins + np.arange(n_cols) * n_bins)[valid]
+        self.counts += np.bincount(flat, minlength=n_cols * n_bins).reshape(n_cols, n_bins)
+        values = np.where(valid, V, 0.0).astype(np.float64)
+        self.total += values.sum(axis=0)
+        self.sum_sq += (values * values).sum(axis=0)
+
+    def mean(self):
+        return self.total / np.maximum(self.n, 1)
+
+    def std(self):
+        n = np.maximum(self.n, 1)
+        return np.sqrt(np.maximum(self.sum_sq / n - (self.total / n) ** 2, 0.0))
+
+    def to_state(self):
+        return {"edges": self.edges.tolist(), "counts": self.counts.tolist(), "total": self.total.tolist(),
+                "sum_sq": self.sum_sq.tolist()}
+
+    @classmethod
+    def from_state(cls, state):
+        hist = cls(state["edges"], len(state["counts"]))
+        hist.counts = np.asarray(state["counts"], dtype=np.int64)
+        hist.total = np.asarray(state["total"], dtype=np.float64)
+        hist.sum_sq = np.asarray(state["sum_sq"], dtype=np.float64)
+        return hist
+
+
+def psi(reference, current):
+    """Population stability index per row of two (columns, bins) count matrices."""
+    p = reference + _SMOOTHING
+    q = current + _SMOOTHING
+    p = p / p.sum(axis=1, keepdims=True)
+    q = q / q.sum(axis=1, keepdims=True)
+    return ((q - p) * np.log(q / p)).sum(axis=1)
+
+
+def ks(reference, current):
+    """Binned two-sample KS statistic per row, and its alpha = 0.01 critical value."""
+    n = reference.sum(axis=1)
+    m = current.sum(axis=1)
+    cdf_p = np.cumsum(reference, axis=1) / np.maximum(n, 1)[:, None]
+    cdf_q = np.cumsum(current, axis=1) / np.maximum(m, 1)[:, None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        critical = KS_C * np.sqrt((n + m) / (n * m))
+    return np.abs(cdf_p - cdf_q).max(axis=1), critical
+
+
+def _status(psi_value, ks_value, critical, n):
+    if n < MIN_RECORDS:
+        return "insufficient"
+    if psi_value >= PSI_ALERT:
+        return "alert"
+    if psi_value >= PSI_WARN or ks_value > critical:
+        return "warn"
+    return "ok"
+
+
+class _Window:
+    """Histograms and quality counters for one stretch of records."""
+
+    def __init__(self, n_columns):
+        self.records = 0
+        self.scores = Histograms(SCORE_EDGES, n_columns)
+        self.probability = Histograms(PROBABILITY_EDGES, 1)
+        self.non_finite = np.zeros(n_columns, dtype=np.int64)
+        self.out_of_range = np.zeros(n_columns, dtype=np.int64)
+        self.off_grid = np.zeros(n_columns, dtype=np.int64)
+        self.straight_lined = 0
+
+    def to_state(self):
+        return {"records": self.records, "scores": self.scores.to_state(),
+                "probability": self.probability.to_state(), "non_finite": self.non_finite.tolist(),
+                "out_of_range": self.out_of_range.tolist(), "off_grid": self.off_grid.tolist(),
+                "straight_lined": self.straight_lined}
+
+    @classmethod
+    def from_state(cls, state):
+        window = cls(len(state["non_finite"]))
+        window.records = state["records"]
+        window.scores = Histograms.from_state(state["scores"])
+        window.probability = Histograms.from_state(state["probability"])
+        for name in ("non_finite", "out_of_range", "off_grid"):
+            setattr(window, name, np.asarray(state[name], dtype=np.int64))
+        window.straight_lined = state["straight_lined"]
+        return window
+
+
+class DriftMonitor:
+    """Streaming score / probability histograms and input checks, compared with a reference."""
+
+    def __init__(self, reference=None, codes=fdp_core.SUBDOMAIN_CODES, window=None):
+        self.reference = reference
+        self.codes = tuple(codes)
+        self.window = window
+        self.malformed = 0
+        self._current = _Window(len(self.codes))
+        self._previous = None
+        self._lock = threading.Lock()
+
+    def update(self, X, probability=None):
+        """Fold in a batch of score rows and (optionally) their predicted probabilities."""
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        with self._lock:
+            if self.window and self._current.records + len(X) > self.window and self._current.records:
+                self._previous, self._current = self._current, _Window(len(self.codes))
+            w = self._current
+            finite = np.isfinite(X)
+            in_range = finite & (X >= SCORE_MIN) & (X <= SCORE_MAX)
+            w.records += len(X)
+            w.non_finite += (~finite).sum(axis=0)
+            w.out_of_range += (finite & ~in_range).sum(axis=0)
+            hundredths = np.where(finite, X, 0.0) * 100
+            w.off_grid += (finite & (np.abs(hundredths - np.round(hundredths)) > 1e-3)).sum(axis=0)
+            w.straight_lined += int((finite.all(axis=1) & (X == X[:, :1]).all(axis=1)).sum())
+            w.scores.add(X, in_range)
+            if probability is not None:
+                p = np.asarray(probability, dtype=np.float64).reshape(-1, 1)
+                w.probability.add(p, np.isfinite(p))
+
+    def record_malformed(self, n=1):
+        """Count records rejected before they had a score vector (bad JSON, unknown keys, ...)."""
+        with self._lock:
+            self.malformed += n
+
+    def report(self):
+        """Drift statistics and data-quality rates of the current (or last complete) window."""
+        with self._lock:
+            w = self._previous if self.window and self._previous is not None else self._current
+            out = {"records": w.records, "malformed": self.malformed, "quality": self._quality(w)}
+            if self.reference is None:
+                return out
+            ref = self.reference
+            subdomains = {}
+            psi_s = psi(ref.scores.counts, w.scores.counts)
+            ks_s, crit_s = ks(ref.scores.counts, w.scores.counts)
+            mean_ref, mean_cur, std_cur = ref.scores.mean(), w.scores.mean(), w.scores.std()
+            n_cur = w.scores.n
+            for j, code in enumerate(self.codes):
+                subdomains[code] = {
+                    "psi": round(float(psi_s[j]), 4), "ks": round(float(ks_s[j]), 4),
+                    "ks_critical": round(float(crit_s[j]), 4),
+                    "mean": round(float(mean_cur[j]), 3), "std": round(float(std_cur[j]), 3),
+                    "reference_mean": round(float(mean_ref[j]), 3),
+                    "status": _status(psi_s[j], ks_s[j], crit_s[j], n_cur[j]),
+                }
+            psi_p = float(psi(ref.probability.counts, w.probability.counts)[0])
+            ks_p, crit_p = (float(v[0]) for v in ks(ref.probability.counts, w.probability.counts))
+            out["probability"] = {
+                "psi": round(psi_p, 4), "ks": round(ks_p, 4), "ks_critical": round(crit_p, 4),
+                "mean": round(float(w.probability.mean()[0]), 4),
+                "reference_mean": round(float(ref.probability.mean()[0]), 4),
+                "status": _status(psi_p, ks_p, crit_p, int(w.probability.n[0])),
+            }
+            out["subdomains"] = subdomains
+            out["alerts"] = [code for code, s in subdomains.items() if s["status"] == "alert"]
+            out["warnings"] = [code for code, s in subdomains.items() if s["status"] == "warn"]
+            return out
+
+    def _quality(self, w):
+        n = max(w.records, 1)
+        counts = {"non_finite": w.non_finite, "out_of_range": w.out_of_range, "off_grid": w.off_grid}
+        quality = {name: {c: int(v) for c, v in zip(self.codes, values) if v}
+                   for name, values in counts.items()}
+        quality["straight_lined"] = w.straight_lined
+        quality["invalid_rate"] = round(float((w.non_finite + w.out_of_range).sum()) / (n * len(self.codes)), 6)
+        return quality
+
+    def to_state(self):
+        with self._lock:
+            return {"codes": list(self.codes), "window": self.window, "malformed": self.malformed,
+                    "current": self._current.to_state(),
+                    "previous": None if self._previous is None else self._previous.to_state()}
+
+    @classmethod
+    def from_state(cls, state, reference=None):
+        monitor = cls(reference, state["codes"], state["window"])
+        monitor.malformed = state["malformed"]
+        monitor._current = _Window.from_state(state["current"])
+        if state["previous"] is not None:
+            monitor._previous = _Window.from_state(state["previous"])
+        return monitor
+
+
+def build_reference(classifier, X):
+    """Reference window: histograms of ``X`` and of the model's probabilities on it."""
+    monitor = DriftMonitor()
+    monitor.update(X, fdp_core.predict(classifier, X)[1])
+    return monitor._current
+
+
+def save_reference(reference, path=REFERENCE_PATH):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(reference.to_state(), f)
+    os.replace(tmp, path)
+
+
+def load_reference(path=REFERENCE_PATH):
+    with open(path, encoding="utf-8") as f:
+        return _Window.from_state(json.load(f))
+
+
+def _read_scores(path, codes):
+    from fdp_store import read_chunks
+
+    for chunk in read_chunks(path, columns=list(codes)):
+        # Unparseable cells become NaN and are counted as non-finite
+        yield chunk[list(codes)].apply(lambda col: col if col.dtype.kind in "fiu" else
+                                       col.map(_to_float)).to_numpy(dtype=np.float64)
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare TNA score distributions with the training reference.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    ref = sub.add_parser("reference", help="build the reference from a score history")
+    ref.add_argument("input", help="CSV with columns A11..D32, or an fdp_store directory")
+    ref.add_argument("--output", default=REFERENCE_PATH)
+    check = sub.add_parser("check", help="drift and data-quality report for a new round")
+    check.add_argument("input", help="CSV with columns A11..D32, or an fdp_store directory")
+    check.add_argument("--reference", default=REFERENCE_PATH)
+    check.add_argument("--json", action="store_true", help="print the full report as JSON")
+    for p in (ref, check):
+        p.add_argument("--model", default=fdp_core.BATCH_MODEL_PATH)
+    args = parser.parse_args(argv)
+
+    codes = fdp_core.SUBDOMAIN_CODES
+    classifier = fdp_core.load_model(args.model)
+    if args.command == "reference":
+        X = np.concatenate(list(_read_scores(args.input, codes)))
+        reference = build_reference(classifier, X.astype(fdp_core.DTYPE))
+        save_reference(reference, args.output)
+        print(f"Reference from {reference.records} profiles -> {args.output}", file=sys.stderr)
+        return
+
+    monitor = DriftMonitor(load_reference(args.reference), codes)
+    for X in _read_scores(args.input, codes):
+        # Only fully valid rows can be scored; every row counts towards quality
+        valid = np.isfinite(X).all(axis=1)
+        monitor.update(X[~valid])
+        if valid.any():
+            monitor.update(X[valid], fdp_core.predict(classifier, X[valid].astype(fdp_core.DTYPE))[1])
+    report = monitor.report()
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    quality = report["quality"]
+    print(f"{report['records']} records; invalid value rate {quality['invalid_rate']:.3%}, "
+          f"straight-lined profiles {quality['straight_lined']}")
+    for name in ("non_finite", "out_of_range", "off_grid"):
+        if quality[name]:
+            print(f"  {name}: " + ", ".join(f"{code} x{n}" for code, n in quality[name].items()))
+    p = report["probability"]
+    print(f"probability: PSI {p['psi']:.3f}, KS {p['ks']:.3f} (critical {p['ks_critical']:.3f}), "
+          f"mean {p['mean']:.3f} vs {p['reference_mean']:.3f} [{p['status']}]")
+    flagged = {c: s for c, s in report["subdomains"].items() if s["status"] not in ("ok", "insufficient")}
+    print(f"{len(flagged)} of {len(codes)} subdomains flagged")
+    for code, s in sorted(flagged.items(), key=lambda kv: -kv[1]["psi"]):
+        print(f"  {code}: PSI {s['psi']:.3f}, KS {s['ks']:.3f}, mean {s['mean']:.2f} vs {s['reference_mean']:.2f} "
+              f"[{s['status']}]")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""Flat-array RandomForest for low-latency inference.
+
+``FlatForest.from_sklearn`` packs every tree's ``tree_`` arrays (feature,
+threshold, children, value) into single NumPy arrays, with child indices made
+absolute so all trees share one node table. ``predict_proba`` then walks every
+tree for a whole batch of rows at once, one vectorized step per tree level,
+without sklearn's per-call validation and joblib dispatch. Missing values are
+not supported: non-finite input raises instead of being routed as sklearn would.
+
+Forests can be saved as a versioned artifact directory of raw ``.npy`` arrays plus
+a ``manifest.json`` and loaded back with ``np.load(mmap_mode="r")``, so worker
+processes share one page-cached copy and nothing is unpickled:
+
+    python fdp_forest.py tna_model.pkl tna_model
+
+This wins on the interactive path (single profiles and small batches); for very
+large batches sklearn's compiled traversal is faster, see benchmarks/bench_forest.py.
+"""
+import json
+import os
+import sys
+
+import numpy as np
+
+ARTIFACT_FORMAT = "fdp-flat-forest"
+ARTIFACT_VERSION = 1
+ARRAYS = ("feature", "threshold", "left", "right", "value", "roots")
+
+# Rows walked together; bounds the (rows x trees) node-index working set
+BLOCK_ROWS = 2048
+
+
+class FlatForest:
+    """Packed node arrays of a fitted single-output forest classifier."""
+
+    def __init__(self, feature, threshold, left, right, value, roots, max_depth,
+                 classes, n_features_in, feature_names_in=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.classes_ = np.asarray(classes)
+        self.n_features_in_ = int(n_features_in)
+        if feature_names_in is not None:
+            self.feature_names_in_ = np.asarray(feature_names_in, dtype=object)
+        # children[2 * node + 1] is the right child, taken when the value > threshold
+        self._children = np.stack([left, right], axis=1).ravel()
+
+    @classmethod
+    def from_sklearn(cls, model):
+        if getattr(model, "n_outputs_", 1) != 1:
+            raise ValueError("Only single-output forests can be flattened")
+        trees = [est.tree_ for est in model.estimators_]
+        sizes = np.array([t.node_count for t in trees])
+        roots = np.concatenate(([0], np.cumsum(sizes)[:-1])).astype(np.int32)
+
+        feature, threshold, left, right, value = [], [], [], [], []
+        for root, t in zip(roots, trees):
+            leaf = t.children_left == -1
+            own = np.arange(t.node_count, dtype=np.int32) + root
+            # Leaves point at themselves, so extra steps past a leaf are no-ops
+            left.append(np.where(leaf, own, t.children_left + root).astype(np.int32))
+            right.append(np.where(leaf, own, t.children_right + root).astype(np.int32))
+            feature.append(np.where(leaf, 0, t.feature).astype(np.int32))
+            threshold.append(t.threshold.astype(np.float64))
+            v = t.value[:, 0, :].astype(np.float64)
+            value.append(v / v.sum(axis=1, keepdims=True))
+
+        forest = cls(
+            feature=np.concatenate(feature),
+            threshold=np.concatenate(threshold),
+            left=np.concatenate(left),
+            right=np.concatenate(right),
+            value=np.concatenate(value),
+            roots=roots,
+            max_depth=max(t.max_depth for t in trees),
+            classes=model.classes_,
+            n_features_in=model.n_features_in_,
+            feature_names_in=getattr(model, "feature_names_in_", None),
+        )
+        # sklearn recomputes these on every attribute access; keep one copy
+        forest.feature_importances_ = model.feature_importances_
+        return forest
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    def apply(self, X):
+        """Leaf node index (into the packed arrays) per row and tree, shape (N, n_trees)."""
+        X = np.ascontiguousarray(np.atleast_2d(X), dtype=np.float32)
+        n_features = self.n_features_in_
+        if X.shape[1] != n_features:
+            raise ValueError(f"X has {X.shape[1]} features, forest expects {n_features}")
+        if not np.isfinite(X).all():
+            # sklearn sends missing values down each node's learned side, which the
+            # packed arrays do not record; refuse rather than route them differently
+            raise ValueError("X contains NaN or infinity, which FlatForest cannot score like sklearn")
+        children = self._children
+        out = np.empty((len(X), self.n_trees), dtype=np.int32)
+        for start in range(0, len(X), BLOCK_ROWS):
+            block = X[start:start + BLOCK_ROWS].ravel()
+            n = len(block) // n_features
+            row_offset = (np.arange(n, dtype=np.int64) * n_features)[:, None]
+            node = np.repeat(self.roots[None, :], n, axis=0)
+            for _ in range(self.max_depth):
+                # Same test as sklearn: float32 feature value <= float64 threshold
+                go_right = block[row_offset + self.feature[node]] > self.threshold[node]
+                node = children[2 * node + go_right]
+            out[start:start + n] = node
+        return out
+
+    def predict_proba(self, X):
+        leaves = self.apply(X)
+        return self.value[leaves].mean(axis=1)
+
+    def predict(self, X):
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
+
+    def node_depths(self):
+        """Depth of every node (roots are at depth 0)."""
+        depth = np.full(self.n_nodes, -1, dtype=np.int32)
+        level = np.asarray(self.roots)
+        d = 0
+        while len(level):
+            depth[level] = d
+            children = np.concatenate([self.left[level], self.right[level]])
+            level = np.unique(children[depth[children] < 0])
+            d += 1
+        return depth
+
+    def _compact(self, keep, left, right, max_depth):
+        new_id = np.cumsum(keep, dtype=np.int32) - 1
+        return FlatForest(
+            feature=np.asarray(self.feature)[keep],
+            threshold=np.asarray(self.threshold)[keep],
+            left=new_id[left[keep]],
+            right=new_id[right[keep]],
+            value=np.asarray(self.value)[keep],
+            roots=new_id[self.roots[:]],
+            max_depth=max_depth,
+            classes=self.classes_,
+            n_features_in=self.n_features_in_,
+            feature_names_in=getattr(self, "feature_names_in_", None),
+        )
+
+    def subset(self, n_trees):
+        """Forest made of the first ``n_trees`` trees."""
+        keep = np.zeros(self.n_nodes, dtype=bool)
+        keep[:self.roots[n_trees] if n_trees < self.n_trees else self.n_nodes] = True
+        sub = FlatForest(
+            feature=self.feature[keep], threshold=self.threshold[keep], left=self.left[keep],
+            right=self.right[keep], value=self.value[keep], roots=self.roots[:n_trees],
+            max_depth=self.max_depth, classes=self.classes_, n_features_in=self.n_features_in_,
+            feature_names_in=getattr(self, "feature_names_in_", None),
+        )
+        sub.max_depth = int(sub.node_depths().max())
+        return sub
+
+    def truncate(self, max_depth):
+        """Forest with every tree cut at ``max_depth``.
+
+        Nodes at the cut become leaves predicting their own class distribution
+        (sklearn stores one on every node); deeper nodes are dropped.
+        """
+        depth = self.node_depths()
+        cut = depth >= max_depth
+        own = np.arange(self.n_nodes, dtype=np.int32)
+        left = np.where(cut, own, self.left)
+        right = np.where(cut, own, self.right)
+        return self._compact(depth <= max_depth, left, right, min(max_depth, self.max_depth))
+
+
+def save_artifact(forest, path, metadata=None):
+    """Write ``forest`` as ``path/<array>.npy`` files plus ``path/manifest.json``.
+
+    ``metadata`` (e.g. training provenance) is stored in the manifest as-is. The
+    manifest is written last, so a directory without one is incomplete.
+    """
+    import sklearn
+
+    os.makedirs(path, exist_ok=True)
+    for name in ARRAYS:
+        np.save(os.path.join(path, f"{name}.npy"), np.ascontiguousarray(getattr(forest, name)))
+    names = getattr(forest, "feature_names_in_", None)
+    manifest = {
+        "format": ARTIFACT_FORMAT,
+        "version": ARTIFACT_VERSION,
+        "sklearn_version": sklearn.__version__,
+        "n_trees": forest.n_trees,
+        "n_nodes": forest.n_nodes,
+        "max_depth": forest.max_depth,
+        "n_features_in": forest.n_features_in_,
+        "feature_names_in": None if names is None else [str(n) for n in names],
+        "classes": forest.classes_.tolist(),
+    }
+    importances = getattr(forest, "feature_importances_", None)
+    if importances is not None:
+        manifest["feature_importances"] = np.asarray(importances).tolist()
+    if metadata is not None:
+        manifest["metadata"] = metadata
+    with open(os.path.join(path, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return path
+
+
+def load_artifact(path, mmap=True):
+    """Load a forest saved by ``save_artifact``; arrays are memory-mapped by default."""
+    with open(os.path.join(path, "manifest.json"), encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format") != ARTIFACT_FORMAT:
+        raise ValueError(f"{path} is not a flat forest artifact")
+    if manifest.get("version") != ARTIFACT_VERSION:
+        raise ValueError(f"Unsupported flat forest artifact version {manifest.get('version')} in {path}")
+
+    arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r" if mmap else None)
+              for name in ARRAYS}
+    if len(arrays["roots"]) != manifest["n_trees"] or len(arrays["feature"]) != manifest["n_nodes"]:
+        raise ValueError(f"Flat forest artifact {path} does not match its manifest")
+    forest = FlatForest(
+        max_depth=manifest["max_depth"],
+        classes=manifest["classes"],
+        n_features_in=manifest["n_features_in"],
+        feature_names_in=manifest["feature_names_in"],
+        **arrays,
+    )
+    if "feature_importances" in manifest:
+        forest.feature_importances_ = np.asarray(manifest["feature_importances"])
+    forest.manifest = manifest
+    return forest
+
+
+def convert_pickle(pickle_path, artifact_path):
+    """One-shot conversion of a pickled sklearn forest into an artifact directory."""
+    import pickle
+
+    with open(pickle_path, "rb") as f:
+        model = pickle.load(f)
+    return save_artifact(FlatForest.from_sklearn(model), artifact_path)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit("usage: python fdp_forest.py MODEL.pkl ARTIFACT_DIR")
+    print(f"Wrote {convert_pickle(sys.argv[1], sys.argv[2])}")
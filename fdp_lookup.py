@@ -0,0 +1,266 @@
+"""Precomputed forest outputs keyed by threshold-interval codes.
+
+A tree only compares each feature with its split thresholds, so the forest's
+output is fixed by which interval between consecutive thresholds every score
+falls in. ``LookupForest`` bins a profile into those intervals (one ``uint8``
+code per subdomain, 43 bytes per profile) and looks the codes up in a hash table
+of precomputed probabilities. Misses fall through to the forest and are added
+to the table. Lookups are exact: two profiles with the same codes get
+bit-identical probabilities from the forest. Profiles that differ only inside
+an interval (e.g. 2 vs 3 when no tree splits between them) share an entry.
+
+Tables are built offline from score histories and saved next to the model as
+``.npy`` arrays plus a ``manifest.json``. The manifest records a digest of the
+forest's split and leaf arrays, so a table is never served with another model:
+
+    python fdp_lookup.py build tna_scores_dataset.csv lookup_table
+    python fdp_lookup.py report tna_scores_dataset.csv
+    python batch_score.py new_round.csv scored.csv --lookup lookup_table
+
+``LookupForest`` has ``predict_proba`` / ``classes_`` like the forest, so it can be
+passed anywhere a classifier is accepted.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+
+import numpy as np
+
+import fdp_core
+from fdp_forest import FlatForest
+
+TABLE_FORMAT = "fdp-lookup-table"
+TABLE_VERSION = 1
+MANIFEST = "manifest.json"
+
+# Rows binned together; bounds the (rows x features x thresholds) comparison
+BLOCK_ROWS = 4096
+
+
+def _flat(forest):
+    return forest if isinstance(forest, FlatForest) else FlatForest.from_sklearn(forest)
+
+
+def split_edges(forest):
+    """(features, max thresholds) float64 matrix of each feature's sorted split thresholds, +inf padded."""
+    forest = _flat(forest)
+    internal = np.asarray(forest.left) != np.arange(forest.n_nodes)
+    feature = np.asarray(forest.feature)[internal]
+    threshold = np.asarray(forest.threshold)[internal]
+    edges = [np.unique(threshold[feature == j]) for j in range(forest.n_features_in_)]
+    out = np.full((len(edges), max(1, max(map(len, edges)))), np.inf)
+    for j, e in enumerate(edges):
+        out[j, :len(e)] = e
+    return out
+
+
+def fingerprint(forest):
+    """Digest of the arrays that decide a forest's output."""
+    forest = _flat(forest)
+    digest = hashlib.sha1()
+    for name in ("feature", "threshold", "left", "right", "value", "roots"):
+        digest.update(np.ascontiguousarray(getattr(forest, name)).tobytes())
+    return digest.hexdigest()[:16]
+
+
+class LookupForest:
+    """Forest wrapper answering ``predict_proba`` from a binned-profile table first."""
+
+    def __init__(self, forest, edges=None, codes=None, proba=None, grow=True, max_entries=1_000_000):
+        self.forest = forest
+        self.edges = split_edges(forest) if edges is None else edges
+        if self.edges.shape[1] >= 255:
+            raise ValueError("More than 254 thresholds on one feature; codes would not fit in uint8")
+        self.classes_ = forest.classes_
+        self.n_features_in_ = forest.n_features_in_
+        for name in ("feature_names_in_", "feature_importances_"):
+            if hasattr(forest, name):
+                setattr(self, name, getattr(forest, name))
+        self.grow = grow
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        codes = np.empty((0, len(self.edges)), dtype=np.uint8) if codes is None else np.asarray(codes, np.uint8)
+        proba = np.empty((0, len(self.classes_))) if proba is None else np.asarray(proba, dtype=np.float64)
+        # Row buffers grow by doubling; a key is published only after its row is written
+        self._codes, self._proba, self._n = codes.copy(), proba.copy(), len(codes)
+        self._row = {key.tobytes(): i for i, key in enumerate(codes)}
+
+    def __len__(self):
+        return len(self._row)
+
+    def bin(self, X):
+        """(N, features) ``uint8`` interval codes: how many thresholds each score exceeds."""
+        X = np.atleast_2d(np.asarray(X, dtype=np.float32))
+        out = np.empty(X.shape, dtype=np.uint8)
+        for start in range(0, len(X), BLOCK_ROWS):
+            # Same test as the forest: float32 score > float64 threshold
+            block = X[start:start + BLOCK_ROWS, :, None] > self.edges[None]
+            out[start:start + BLOCK_ROWS] = block.sum(axis=2)
+        return out
+
+    def predict_proba(self, X):
+        X = np.atleast_2d(np.asarray(X, dtype=np.float32))
+        codes = self.bin(X)
+        keys = [row.tobytes() for row in codes]
+        rows = np.fromiter((self._row.get(key, -1) for key in keys), dtype=np.int64, count=len(keys))
+        missing = np.flatnonzero(rows < 0)
+        proba = np.empty((len(X), len(self.classes_)))
+        proba[rows >= 0] = self._proba[rows[rows >= 0]]
+        if len(missing):
+            # One forest pass over the distinct missing interval patterns
+            _, first, inverse = np.unique(codes[missing], axis=0, return_index=True, return_inverse=True)
+            computed = self.forest.predict_proba(X[missing[first]])
+            proba[missing] = computed[inverse.ravel()]
+            if self.grow:
+                self._add(codes[missing[first]], computed)
+        with self._lock:
+            self.hits += len(X) - len(missing)
+            self.misses += len(missing)
+        return proba
+
+    def predict(self, X):
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
+
+    def _add(self, codes, proba):
+        with self._lock:
+            new, keys = [], set()
+            for i, row in enumerate(codes):
+                key = row.tobytes()
+                if key not in self._row and key not in keys and self._n + len(new) < self.max_entries:
+                    new.append(i)
+                    keys.add(key)
+            if not new:
+                return
+            n, stop = self._n, self._n + len(new)
+            if stop > len(self._codes):
+                size = max(stop, 2 * len(self._codes), 1024)
+                self._codes = np.concatenate([self._codes[:n], np.empty((size - n, self._codes.shape[1]), np.uint8)])
+                self._proba = np.concatenate([self._proba[:n], np.empty((size - n, self._proba.shape[1]))])
+            self._codes[n:stop] = codes[new]
+            self._proba[n:stop] = proba[new]
+            self._n = stop
+            for row, i in zip(codes[new], range(n, stop)):
+                self._row[row.tobytes()] = i
+
+    def precompute(self, X, batch_rows=100_000):
+        """Add the interval patterns of every row of ``X`` to the table."""
+        grow, self.grow = self.grow, True
+        try:
+            for start in range(0, len(X), batch_rows):
+                self.predict_proba(X[start:start + batch_rows])
+        finally:
+            self.grow = grow
+        return self
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"entries": len(self), "hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0}
+
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        with self._lock:
+            n = self._n
+            np.save(os.path.join(path, "edges.npy"), self.edges)
+            np.save(os.path.join(path, "codes.npy"), self._codes[:n])
+            np.save(os.path.join(path, "proba.npy"), self._proba[:n])
+        manifest = {"format": TABLE_FORMAT, "version": TABLE_VERSION, "entries": n,
+                    "model": fingerprint(self.forest)}
+        tmp = os.path.join(path, MANIFEST + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=1)
+        os.replace(tmp, os.path.join(path, MANIFEST))
+
+
+def load_table(path, forest, grow=True):
+    """``LookupForest`` over ``forest`` with the entries saved at ``path``."""
+    with open(os.path.join(path, MANIFEST), encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format") != TABLE_FORMAT or manifest.get("version") != TABLE_VERSION:
+        raise ValueError(f"{path} is not a version {TABLE_VERSION} lookup table")
+    if manifest["model"] != fingerprint(forest):
+        raise ValueError(f"{path} was built for a different model")
+    arrays = {name: np.load(os.path.join(path, f"{name}.npy")) for name in ("edges", "codes", "proba")}
+    return LookupForest(forest, grow=grow, **arrays)
+
+
+def report(forest, X, folds=5, seed=0):
+    """Hit rates and latency of a table on ``X``, printed as text."""
+    from benchmarks.timing import best_of
+
+    def best_ms(fn, repeat):
+        return best_of(fn, repeat) * 1e3
+
+    rng = np.random.default_rng(seed)
+    table = LookupForest(forest)
+    codes = table.bin(X)
+    lines = [f"{len(X)} profiles, {len(np.unique(X, axis=0))} distinct, "
+             f"{len(np.unique(codes, axis=0))} distinct interval patterns",
+             f"reachable intervals per subdomain: {np.mean([len(np.unique(c)) for c in codes.T]):.1f} "
+             f"(of {int(np.isfinite(table.edges).sum(axis=1).mean()) + 1} in the forest)"]
+
+    # Held-out rows looked up in a table built from the other folds
+    fold = rng.permutation(len(X)) % folds
+    held_hits = 0
+    for k in range(folds):
+        built = LookupForest(forest).precompute(X[fold != k])
+        built.predict_proba(X[fold == k])
+        held_hits += built.hits
+    lines.append(f"held-out hit rate ({folds}-fold): {held_hits / len(X):.1%}")
+
+    # Near-identical profiles: one subdomain nudged by +-1 within 1-10
+    nudged = X.copy()
+    cols = rng.integers(0, X.shape[1], len(X))
+    nudged[np.arange(len(X)), cols] = np.clip(X[np.arange(len(X)), cols] + rng.choice([-1, 1], len(X)), 1, 10)
+    built = LookupForest(forest, grow=False).precompute(X)
+    before = built.hits
+    built.predict_proba(nudged)
+    lines.append(f"hit rate for +-1 nudges of one subdomain: {(built.hits - before) / len(X):.1%}")
+
+    exact = np.abs(built.predict_proba(X) - forest.predict_proba(X)).max()
+    lines.append(f"max |table - forest| probability: {exact:.1e}")
+
+    one = X[:1]
+    built.predict_proba(one)
+    lines.append(f"single profile: forest {best_ms(lambda: forest.predict_proba(one), 200):.3f} ms, "
+                 f"table hit {best_ms(lambda: built.predict_proba(one), 200):.3f} ms")
+    lines.append(f"{len(X)} profiles: forest {best_ms(lambda: forest.predict_proba(X), 5):.1f} ms, "
+                 f"table (all hits) {best_ms(lambda: built.predict_proba(X), 5):.1f} ms")
+    size = built.edges.nbytes + len(built) * (built.edges.shape[0] + 8 * len(built.classes_))
+    lines.append(f"table: {len(built)} entries, {size / 1e3:.0f} kB of arrays")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precomputed forest outputs for binned score profiles.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="precompute the table for every profile in a score history")
+    build.add_argument("input", help="CSV with columns A11..D32, or an fdp_store directory")
+    build.add_argument("table", help="output directory")
+    rep = sub.add_parser("report", help="hit-rate and latency report")
+    rep.add_argument("input", help="CSV with columns A11..D32, or an fdp_store directory")
+    rep.add_argument("--folds", type=int, default=5)
+    for p in (build, rep):
+        p.add_argument("--model", default=fdp_core.MODEL_PATH)
+    args = parser.parse_args(argv)
+
+    from fdp_store import read_chunks
+
+    codes = list(fdp_core.SUBDOMAIN_CODES)
+    X = np.concatenate([c[codes].to_numpy(dtype=fdp_core.DTYPE) for c in read_chunks(args.input, columns=codes)])
+    forest = _flat(fdp_core.load_model(args.model))
+    if args.command == "report":
+        print(report(forest, X, args.folds))
+        return
+    table = LookupForest(forest).precompute(X)
+    table.save(args.table)
+    print(f"{len(table)} entries from {len(X)} profiles -> {args.table}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Lightweight timing spans, counters and gauges for the recommendation flow.
+
+Disabled by default; set ``FDP_METRICS=1`` (or call ``METRICS.enable()``). While
+disabled, ``span`` hands back one shared no-op context manager and ``count`` /
+``observe`` return immediately, so instrumented hot paths pay only a method
+call. Metrics are exposed as Prometheus text (``prometheus_text``) or appended
+to a JSONL log by a background flusher (``FDP_METRICS_LOG=path``).
+"""
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+_NOOP = nullcontext()
+
+
+class _Span:
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics._record_span(self.name, time.perf_counter() - self.start)
+
+
+class Metrics:
+    def __init__(self, enabled=False, prefix="fdp"):
+        self.enabled = enabled
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._spans = {}
+        self._counters = {}
+        self._observations = {}
+        self._gauges = {}
+        self._flusher = None
+
+    def enable(self, enabled=True):
+        self.enabled = enabled
+
+    def span(self, name):
+        """Context manager timing one stage, e.g. ``with METRICS.span("rules"):``."""
+        if not self.enabled:
+            return _NOOP
+        return _Span(self, name)
+
+    def _record_span(self, name, seconds):
+        with self._lock:
+            stat = self._spans.get(name)
+            if stat is None:
+                self._spans[name] = [1, seconds, seconds]
+            else:
+                stat[0] += 1
+                stat[1] += seconds
+                stat[2] = max(stat[2], seconds)
+
+    def count(self, name, n=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def observe(self, name, value):
+        """Record a sample of a distribution such as batch size (count, sum, max)."""
+        if not self.enabled:
+            return
+        with self._lock:
+            stat = self._observations.get(name)
+            if stat is None:
+                self._observations[name] = [1, value, value]
+            else:
+                stat[0] += 1
+                stat[1] += value
+                stat[2] = max(stat[2], value)
+
+    def gauge(self, name, fn):
+        """Register ``fn()`` as a gauge read at export time (e.g. cache hit rate)."""
+        with self._lock:
+            self._gauges[name] = fn
+
+    def snapshot(self):
+        with self._lock:
+            spans = {k: {"count": c, "sum_s": s, "max_s": m} for k, (c, s, m) in self._spans.items()}
+            observations = {k: {"count": c, "sum": s, "max": m} for k, (c, s, m) in self._observations.items()}
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+        return {
+            "spans": spans,
+            "counters": counters,
+            "observations": observations,
+            "gauges": {k: float(fn()) for k, fn in gauges.items()},
+        }
+
+    def prometheus_text(self):
+        snap = self.snapshot()
+        p = self.prefix
+        lines = [f"# TYPE {p}_stage_seconds summary"]
+        for name, s in sorted(snap["spans"].items()):
+            lines.append(f'{p}_stage_seconds_count{{stage="{name}"}} {s["count"]}')
+            lines.append(f'{p}_stage_seconds_sum{{stage="{name}"}} {s["sum_s"]:.9f}')
+        lines.append(f"# TYPE {p}_stage_seconds_max gauge")
+        for name, s in sorted(snap["spans"].items()):
+            lines.append(f'{p}_stage_seconds_max{{stage="{name}"}} {s["max_s"]:.9f}')
+        for name, value in sorted(snap["counters"].items()):
+            lines += [f"# TYPE {p}_{name}_total counter", f"{p}_{name}_total {value}"]
+        for name, o in sorted(snap["observations"].items()):
+            lines += [f"# TYPE {p}_{name} summary", f"{p}_{name}_count {o['count']}", f"{p}_{name}_sum {o['sum']}"]
+        for name, value in sorted(snap["gauges"].items()):
+            lines += [f"# TYPE {p}_{name} gauge", f"{p}_{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+    def flush_jsonl(self, path):
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"ts": time.time(), **self.snapshot()}) + "\n")
+
+    def start_flusher(self, path, interval=10.0):
+        """Append a snapshot to ``path`` every ``interval`` seconds from a daemon thread."""
+        if self._flusher is not None:
+            return
+
+        def loop():
+            while True:
+                time.sleep(interval)
+                self.flush_jsonl(path)
+
+        self._flusher = threading.Thread(target=loop, name="fdp-metrics-flusher", daemon=True)
+        self._flusher.start()
+
+    def reset(self):
+        with self._lock:
+            self._spans.clear()
+            self._counters.clear()
+            self._observations.clear()
+
+
+METRICS = Metrics(enabled=os.environ.get("FDP_METRICS", "") not in ("", "0"))
+if METRICS.enabled and os.environ.get("FDP_METRICS_LOG"):
+    METRICS.start_flusher(os.environ["FDP_METRICS_LOG"], float(os.environ.get("FDP_METRICS_INTERVAL", 10)))
@@ -0,0 +1,110 @@
+"""Process-pool batch scoring for multi-million-row TNA exports.
+
+The parent only slices the input into raw CSV text chunks; workers parse, score
+and render them. Each worker loads the model once in its initializer, and with
+the flat-array artifact (the default) those arrays are memory-mapped, so all
+workers share one page-cached copy and nothing model-sized is pickled per task.
+Rendered chunks are written back strictly in input order, so the output is
+identical for any number of workers.
+
+    python fdp_parallel.py national_tna.csv scored.parquet --workers 8
+"""
+import argparse
+import io
+import itertools
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+import batch_score
+import fdp_core
+
+_classifier = None
+_explainer = None
+_index, _rules = fdp_core.SUBDOMAIN_INDEX, fdp_core.RULES
+
+
+def _init_worker(model_path, explain=False, tenant=None, tenants_dir=None):
+    global _classifier, _explainer, _index, _rules
+    if tenant:
+        from fdp_tenants import TENANTS_DIR, TenantRegistry
+
+        bundle = TenantRegistry(tenants_dir or TENANTS_DIR, default_model=model_path).get(tenant)
+        _classifier, _index, _rules = bundle.classifier, bundle.index, bundle.rules
+    else:
+        _classifier = fdp_core.load_model(model_path)
+    if explain:
+        from fdp_explain import PathExplainer
+
+        _explainer = PathExplainer(_classifier)
+
+
+def _score_chunk(index, header, body, fmt, first_row):
+    frame = pd.read_csv(io.BytesIO(header + body))
+    out = batch_score.score_frame(_classifier, frame, explainer=_explainer, index=_index, rules=_rules,
+                                  first_row=first_row)
+    return batch_score.render(out, fmt, header=index == 0), len(out)
+
+
+def iter_csv_chunks(path, chunksize):
+    """Yield ``(header, body)`` byte strings of up to ``chunksize`` data rows.
+
+    Splits on line boundaries, so quoted fields must not contain newlines
+    (true for TNA score exports).
+    """
+    with open(path, "rb") as f:
+        header = f.readline()
+        while True:
+            lines = list(itertools.islice(f, chunksize))
+            if not lines:
+                return
+            yield header, b"".join(lines)
+
+
+def score_file_parallel(input_path, output_path, model_path=fdp_core.BATCH_MODEL_PATH, workers=None,
+                        chunksize=50_000, fmt=None, explain=False, tenant=None, tenants_dir=None):
+    """Score ``input_path`` into ``output_path`` with a pool of ``workers`` processes.
+
+    At most ``2 * workers`` chunks are in flight, so memory stays bounded.
+    With ``tenant`` every worker loads that tenant's bundle (see fdp_tenants.py).
+    Returns the number of rows written.
+    """
+    workers = workers or os.cpu_count() or 1
+    with batch_score.ChunkWriter(output_path, fmt) as writer, \
+            ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(model_path, explain, tenant, tenants_dir)) as pool:
+        pending = deque()
+        for index, (header, body) in enumerate(iter_csv_chunks(input_path, chunksize)):
+            pending.append(pool.submit(_score_chunk, index, header, body, writer.fmt, index * chunksize))
+            if len(pending) >= 2 * workers:
+                writer.write(*pending.popleft().result())
+        while pending:
+            writer.write(*pending.popleft().result())
+    return writer.n_rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a large TNA CSV with a process pool.")
+    parser.add_argument("input", help="CSV with columns A11..D32")
+    parser.add_argument("output", help="output .csv or .parquet file")
+    parser.add_argument("--model", default=fdp_core.BATCH_MODEL_PATH)
+    parser.add_argument("--workers", type=int, default=None, help="defaults to the CPU count")
+    parser.add_argument("--chunksize", type=int, default=50_000)
+    parser.add_argument("--format", choices=("csv", "parquet"), help="defaults to the output extension")
+    parser.add_argument("--explain", action="store_true", help="add per-subdomain probability contributions")
+    parser.add_argument("--tenant", help="score with this tenant's model, topic map and rules")
+    parser.add_argument("--tenants-dir", help="defaults to $FDP_TENANTS_DIR or tenants/")
+    args = parser.parse_args(argv)
+
+    try:
+        n_rows = score_file_parallel(args.input, args.output, args.model, args.workers, args.chunksize, args.format,
+                                     args.explain, args.tenant, args.tenants_dir)
+    except ValueError as exc:
+        sys.exit(f"{args.input}: {exc}")
+    print(f"Scored {n_rows} rows -> {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""Cohort-level FDP demand planning over scored TNA batches.
+
+Every faculty member "needs" the sessions for their top-3 subdomains (each
+subdomain's ``fdp_topic_map`` topics form one session) plus every rule-based FDP
+their profile triggers. ``CohortDemand`` counts those needs per group (e.g.
+department) with sorted segmented sums, chunk by chunk, and keeps the distinct
+need patterns with their multiplicities. ``plan_sessions`` then greedily picks
+the sessions that cover the most not-yet-covered faculty under a session
+budget (the standard greedy for max-coverage).
+
+    python fdp_planner.py tna_scores_dataset.csv --group-by department --budget 8 --output plan.json
+"""
+import argparse
+import json
+import sys
+
+import numpy as np
+import pandas as pd
+
+import fdp_core
+from fdp_store import read_chunks
+
+
+def session_names():
+    """Session labels: one per subdomain, then one per rule-based FDP."""
+    return list(fdp_core.SUBDOMAINS) + list(fdp_core.RULES.fdps)
+
+
+def need_matrix(scored):
+    """Boolean (N, n_sessions) matrix of each faculty member's needed sessions."""
+    n, n_sub = len(scored.top), len(fdp_core.SUBDOMAINS)
+    needs = np.zeros((n, n_sub + scored.hits.shape[1]), dtype=bool)
+    needs[np.arange(n)[:, None], scored.top] = True
+    needs[:, n_sub:] = scored.hits
+    return needs
+
+
+class CohortDemand:
+    """Per-group session demand and need patterns, accumulated chunk by chunk."""
+
+    def __init__(self, n_sessions):
+        self.n_sessions = n_sessions
+        self.group_keys = []
+        self._group_id = {}
+        self._demand = np.zeros((0, n_sessions), dtype=np.int64)
+        self._faculty = np.zeros(0, dtype=np.int64)
+        self._key_dtype = np.dtype((np.void, 8 + (n_sessions + 7) // 8))
+        self._pattern_keys = np.empty(0, dtype=self._key_dtype)
+        self._pattern_counts = np.zeros(0, dtype=np.int64)
+
+    def _ids(self, keys):
+        ids = np.empty(len(keys), dtype=np.intp)
+        for i, key in enumerate(keys):
+            if key not in self._group_id:
+                self._group_id[key] = len(self.group_keys)
+                self.group_keys.append(key)
+            ids[i] = self._group_id[key]
+        grow = len(self.group_keys) - len(self._faculty)
+        if grow:
+            self._demand = np.vstack([self._demand, np.zeros((grow, self.n_sessions), dtype=np.int64)])
+            self._faculty = np.concatenate([self._faculty, np.zeros(grow, dtype=np.int64)])
+        return ids
+
+    def update(self, needs, group_codes, group_keys):
+        """Fold in a chunk: ``needs`` rows labelled by ``group_codes`` into ``group_keys``."""
+        gid = self._ids(group_keys)[group_codes]
+        order = np.argsort(gid, kind="stable")
+        sorted_gid = gid[order]
+        starts = np.flatnonzero(np.r_[True, sorted_gid[1:] != sorted_gid[:-1]])
+        groups = sorted_gid[starts]
+        self._demand[groups] += np.add.reduceat(needs[order], starts, axis=0, dtype=np.int64)
+        self._faculty[groups] += np.diff(np.r_[starts, len(gid)])
+
+        # Distinct need patterns per group, with counts, for the coverage planner.
+        # Each row is keyed as big-endian group id + packed need bits, viewed as
+        # one fixed-width void scalar, and merged with the running table.
+        keys = np.concatenate([self._pattern_keys, self._pattern_key(gid, needs)])
+        counts = np.concatenate([self._pattern_counts, np.ones(len(gid), dtype=np.int64)])
+        self._pattern_keys, inverse = np.unique(keys, return_inverse=True)
+        self._pattern_counts = np.bincount(inverse.ravel(), weights=counts).astype(np.int64)
+
+    def _pattern_key(self, gid, needs):
+        keyed = np.hstack([gid.astype(">i8")[:, None].view(np.uint8), np.packbits(needs, axis=1)])
+        return np.ascontiguousarray(keyed).view(self._key_dtype).ravel()
+
+    def demand_table(self, names=None):
+        """Long table of group, session and number of faculty needing it."""
+        names = names or session_names()
+        n_sub = len(fdp_core.SUBDOMAINS)
+        rows = []
+        for g, key in enumerate(self.group_keys):
+            for s, count in enumerate(self._demand[g].tolist()):
+                if count:
+                    rows.append((*key, "subdomain" if s < n_sub else "rule", names[s], count,
+                                 count / self._faculty[g]))
+        return rows
+
+    def topic_table(self):
+        """Long table of group, subdomain, topic and how many faculty get it recommended.
+
+        Each ``fdp_topic_map`` topic inherits the demand of its subdomain.
+        """
+        index = fdp_core.SUBDOMAIN_INDEX
+        rows = []
+        for g, key in enumerate(self.group_keys):
+            for j in range(len(index)):
+                count = int(self._demand[g, j])
+                rows.extend((*key, index.keys[j], topic, count) for topic in index.topics(j) if count)
+        return rows
+
+    def patterns(self, g):
+        """``(needs matrix, counts)`` of the distinct need patterns of group ``g``."""
+        raw = self._pattern_keys.view(np.uint8).reshape(len(self._pattern_keys), -1)
+        mine = raw[:, :8].copy().view(">i8").ravel() == g
+        needs = np.unpackbits(raw[mine, 8:], axis=1)[:, :self.n_sessions].astype(bool)
+        return needs, self._pattern_counts[mine]
+
+    def faculty(self, g):
+        return int(self._faculty[g])
+
+
+def plan_sessions(needs, counts, budget):
+    """Greedy max-coverage: pick up to ``budget`` sessions covering the most faculty.
+
+    ``needs`` is a (patterns, sessions) boolean matrix and ``counts`` the number
+    of faculty sharing each pattern. Stops early once no session adds coverage,
+    so the returned plan is also the smallest the greedy finds. Returns a list of
+    ``(session index, newly covered faculty)``.
+    """
+    weights = needs.astype(np.float64) * counts[:, None]
+    uncovered = np.ones(len(needs), dtype=bool)
+    plan = []
+    for _ in range(budget):
+        gains = weights[uncovered].sum(axis=0)
+        best = int(np.argmax(gains))
+        if gains[best] <= 0:
+            break
+        plan.append((best, int(gains[best])))
+        uncovered &= ~needs[:, best]
+    return plan
+
+
+def plan_file(path, group_by=(), budget=10, classifier=None, chunksize=100_000):
+    """Demand and greedy session plan per group for a TNA scores CSV or fdp_store directory."""
+    classifier = classifier or fdp_core.load_model(fdp_core.BATCH_MODEL_PATH)
+    names = session_names()
+    demand = CohortDemand(len(names))
+    columns = [*fdp_core.SUBDOMAIN_CODES, *group_by]
+    for chunk in read_chunks(path, chunksize, columns):
+        X = chunk[list(fdp_core.SUBDOMAIN_CODES)].to_numpy(dtype=fdp_core.DTYPE)
+        scored = fdp_core.score(classifier, X)
+        if group_by:
+            codes, keys = pd.MultiIndex.from_frame(chunk[list(group_by)].astype(str)).factorize()
+            keys = [tuple(k) for k in keys]
+        else:
+            codes, keys = np.zeros(len(chunk), dtype=np.intp), [()]
+        demand.update(need_matrix(scored), codes, keys)
+
+    plans = []
+    for g, key in enumerate(demand.group_keys):
+        needs, counts = demand.patterns(g)
+        plan = plan_sessions(needs, counts, budget)
+        covered = sum(gain for _, gain in plan)
+        plans.append({
+            "group": dict(zip(group_by, key)),
+            "faculty": demand.faculty(g),
+            "covered": covered,
+            "coverage": covered / max(demand.faculty(g), 1),
+            "sessions": [{"session": names[s], "new_faculty": gain} for s, gain in plan],
+        })
+    return demand, plans
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Plan FDP sessions for a cohort.")
+    parser.add_argument("input", help="CSV (or fdp_store directory) with columns A11..D32 plus any grouping columns")
+    parser.add_argument("--group-by", nargs="*", default=[], help="columns to plan separately, e.g. department")
+    parser.add_argument("--budget", type=int, default=10, help="maximum sessions per group")
+    parser.add_argument("--model", default=fdp_core.BATCH_MODEL_PATH)
+    parser.add_argument("--chunksize", type=int, default=100_000)
+    parser.add_argument("--demand-csv", help="write per-group session demand here")
+    parser.add_argument("--topics-csv", help="write per-group fdp_topic_map topic demand here")
+    parser.add_argument("--output", help="write the session plan JSON here (default stdout)")
+    args = parser.parse_args(argv)
+
+    demand, plans = plan_file(args.input, args.group_by, args.budget, fdp_core.load_model(args.model),
+                              args.chunksize)
+    if args.demand_csv:
+        columns = [*args.group_by, "kind", "session", "faculty", "share"]
+        pd.DataFrame(demand.demand_table(), columns=columns).to_csv(args.demand_csv, index=False)
+    if args.topics_csv:
+        columns = [*args.group_by, "subdomain", "topic", "faculty"]
+        pd.DataFrame(demand.topic_table(), columns=columns).to_csv(args.topics_csv, index=False)
+    text = json.dumps(plans, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+    print(f"Planned {len(plans)} group(s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,336 @@
+"""Personal FDP reports for every faculty member of a TNA file, rendered in a process pool.
+
+One document per input row: prediction and probability, the top-3 focus areas
+with their ``fdp_topic_map`` topics, triggered smart rules and a chart of all 43
+subdomain scores (top-3 highlighted).
+
+- HTML: a ``string.Template`` compiled once at import, with the chart inlined as SVG.
+- PDF: one A4 page drawn with matplotlib, using the core PDF fonts (not embedded).
+
+Each worker loads the model and sets up matplotlib once in the pool initializer:
+for HTML the chart frame (axes, ticks, labels) is rendered to SVG once and each
+report only adds its bars; for PDF one page figure is reused, updating bar
+widths, colours and text before ``savefig``. The parent keeps at
+most ``2 * workers`` chunks in flight and writes reports in input order to a
+directory or, when the output ends in ``.zip``, a single archive, so memory stays
+bounded for any number of rows:
+
+    python fdp_reports.py tna_scores_dataset.csv reports.zip --format pdf --workers 8
+    python fdp_reports.py faculty.csv reports/ --id-column faculty_id
+"""
+import argparse
+import html
+import io
+import os
+import re
+import string
+import sys
+import textwrap
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import fdp_core
+from fdp_store import read_chunks
+
+FORMATS = ("html", "pdf")
+CHUNK_ROWS = 200
+
+# Characters per line of PDF body text at 8.5 pt on A4
+PDF_LINE_CHARS = 110
+
+HIGHLIGHT = "#d1495b"
+BAR = "#8fb8c9"
+
+_TEMPLATE = string.Template("""<!DOCTYPE html>
+<html lang="en"><head><meta charset="utf-8"><title>FDP report: $title</title>
+<style>
+body{font-family:system-ui,sans-serif;max-width:52rem;margin:2rem auto;color:#222}
+h1{font-size:1.5rem}h2{font-size:1.15rem;margin-top:1.6rem}.need{font-weight:600}
+li{margin:.15rem 0}.rule{color:#555;font-style:italic}svg{width:100%;height:auto}
+</style></head><body>
+<h1>FDP recommendations: $title</h1>
+<p class="need">High FDP need: $need (probability $probability)</p>
+<h2>Top 3 focus areas</h2>
+$focus
+<h2>Smart rule-based FDPs</h2>
+$rules
+<h2>Subdomain scores</h2>
+$chart
+</body></html>
+""")
+
+# Per-worker state, set up once by _init_worker
+_classifier = None
+_index, _rules = fdp_core.SUBDOMAIN_INDEX, fdp_core.RULES
+_figure = None
+
+
+def _pyplot():
+    import logging
+
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    # Core PDF fonts are not embedded (several times faster to save); the
+    # font manager then warns on every text layout that no Helvetica file exists
+    logging.getLogger("matplotlib.font_manager").setLevel(logging.ERROR)
+    plt.rcParams.update({"svg.fonttype": "none", "svg.hashsalt": "fdp", "pdf.use14corefonts": True})
+    return plt
+
+
+def _score_axes(ax, labels):
+    bars = ax.barh(np.arange(len(labels)), np.zeros(len(labels)), color=BAR)
+    ax.set_yticks(np.arange(len(labels)), [label[:48] for label in labels], fontsize=6.5)
+    ax.invert_yaxis()
+    ax.set_xlim(0, 10)
+    ax.set_xlabel("Score")
+    return bars
+
+
+class _SvgChart:
+    """Score chart frame (axes, ticks, labels) rendered to SVG once per worker.
+
+    Drawing the axes is nearly all of matplotlib's cost, so each report only
+    appends its 43 bars as ``<rect>`` elements placed with the axes' transform.
+    """
+
+    def __init__(self, labels):
+        plt = _pyplot()
+        fig = plt.figure(figsize=(7.5, 8))
+        ax = fig.add_axes([0.45, 0.05, 0.52, 0.92])
+        bars = _score_axes(ax, labels)
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format="svg")
+        svg = buffer.getvalue().decode("utf-8")
+        svg = svg[svg.index("<svg"):]  # drop the XML prolog and doctype
+        cut = svg.rindex("</svg>")
+        self._head, self._tail = svg[:cut], svg[cut:]
+
+        # SVG user units are points with y pointing down
+        to_pt = 72.0 / fig.dpi
+        height_pt = fig.get_figheight() * 72.0
+        origin = ax.transData.transform([(0.0, bar.get_y() + bar.get_height()) for bar in bars])
+        top = ax.transData.transform([(0.0, bar.get_y()) for bar in bars])
+        self._x0 = origin[0, 0] * to_pt
+        self._unit = (ax.transData.transform((1.0, 0.0))[0] - ax.transData.transform((0.0, 0.0))[0]) * to_pt
+        self._y = height_pt - top[:, 1] * to_pt
+        self._h = (top[:, 1] - origin[:, 1]) * to_pt
+        plt.close(fig)
+
+    def render(self, x, top):
+        colors = np.full(len(x), BAR, dtype=object)
+        colors[top] = HIGHLIGHT
+        bars = "".join(
+            f'<rect x="{self._x0:.2f}" y="{y:.2f}" width="{v * self._unit:.2f}" height="{h:.2f}" fill="{c}"/>'
+            for y, h, v, c in zip(self._y, self._h, np.asarray(x, dtype=np.float64), colors)
+        )
+        return f"{self._head}<g id=\"scores\">{bars}</g>{self._tail}"
+
+
+class _PdfPage:
+    """One reusable A4 figure: title and body text above the score chart.
+
+    Per report only bar widths, colours and the two text artists change.
+    """
+
+    def __init__(self, labels, chart=True):
+        plt = _pyplot()
+        self.fig = plt.figure(figsize=(8.27, 11.69))
+        self.title = self.fig.text(0.06, 0.95, "", fontsize=15, weight="bold", va="top")
+        self.body = self.fig.text(0.06, 0.91, "", fontsize=8.5, va="top", linespacing=1.35)
+        self.bars = None
+        if chart:
+            self.bars = _score_axes(self.fig.add_axes([0.42, 0.04, 0.53, 0.38]), labels)
+
+    def render(self, title, body, x, top):
+        self.title.set_text(title)
+        self.body.set_text(body)
+        if self.bars is not None:
+            for bar, value in zip(self.bars, x):
+                bar.set_width(value)
+                bar.set_color(BAR)
+            for j in top:
+                self.bars[j].set_color(HIGHLIGHT)
+        buffer = io.BytesIO()
+        self.fig.savefig(buffer, format="pdf")
+        return buffer.getvalue()
+
+
+def _init_worker(model_path, fmt, chart, tenant=None, tenants_dir=None):
+    global _classifier, _index, _rules, _figure
+    if tenant:
+        from fdp_tenants import TENANTS_DIR, TenantRegistry
+
+        bundle = TenantRegistry(tenants_dir or TENANTS_DIR, default_model=model_path).get(tenant)
+        _classifier, _index, _rules = bundle.classifier, bundle.index, bundle.rules
+    else:
+        _classifier = fdp_core.load_model(model_path)
+    if fmt == "pdf":
+        _figure = _PdfPage(_index.keys, chart)
+    else:
+        _figure = _SvgChart(_index.keys) if chart else None
+
+
+def _html(title, bundle, svg):
+    focus = "\n".join(
+        f"<h3>{html.escape(key)} (score {score:g})</h3><ul>"
+        + "".join(f"<li>{html.escape(t)}</li>" for t in bundle["topics"][key]) + "</ul>"
+        for key, score in bundle["top_subdomains"]
+    )
+    if bundle["rule_based_fdps"]:
+        rules = "<ul>" + "".join(
+            f"<li>{html.escape(fdp)} <span class=\"rule\">(triggered by: {html.escape(rule)})</span></li>"
+            for fdp, rule in zip(bundle["rule_based_fdps"], bundle["triggered_rules"])
+        ) + "</ul>"
+    else:
+        rules = "<p>No special rules triggered.</p>"
+    return _TEMPLATE.substitute(
+        title=html.escape(title), need="YES" if bundle["prediction"] == 1 else "NO",
+        probability=f"{bundle['probability']:.1%}", focus=focus, rules=rules, chart=svg,
+    ).encode("utf-8")
+
+
+def _pdf_text(bundle):
+    lines = [f"High FDP need: {'YES' if bundle['prediction'] == 1 else 'NO'} "
+             f"(probability {bundle['probability']:.1%})", "", "Top 3 focus areas"]
+    for key, score in bundle["top_subdomains"]:
+        lines.append(f"  {key} (score {score:g})")
+        lines += [f"      - {t}" for t in bundle["topics"][key]]
+    lines += ["", "Smart rule-based FDPs"]
+    for fdp, rule in zip(bundle["rule_based_fdps"], bundle["triggered_rules"]):
+        lines += textwrap.wrap(f"- {fdp} (triggered by: {rule})", PDF_LINE_CHARS,
+                               initial_indent="  ", subsequent_indent="    ")
+    if not bundle["rule_based_fdps"]:
+        lines.append("  None triggered")
+    return "\n".join(lines)
+
+
+def _render_chunk(frame, ids, fmt):
+    """[(file name, document bytes)] for one chunk of TNA rows."""
+    X = frame[list(_index.codes)].to_numpy(dtype=fdp_core.DTYPE)
+    scored = fdp_core.score(_classifier, X, 3, _index, _rules)
+    bundles = fdp_core.to_bundles(X, scored, _index, _rules)
+    out = []
+    for i, (name, bundle) in enumerate(zip(ids, bundles)):
+        if fmt == "pdf":
+            document = _figure.render(f"FDP recommendations: {name}", _pdf_text(bundle), X[i], scored.top[i])
+        else:
+            svg = _figure.render(X[i], scored.top[i]) if _figure is not None else ""
+            document = _html(str(name), bundle, svg)
+        out.append((f"report_{_safe(name)}.{fmt}", document))
+    return out
+
+
+def _safe(name):
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", str(name)).strip("._") or "unnamed"
+
+
+class _Sink:
+    """Writes reports to a directory, or to a zip archive when the path ends in .zip."""
+
+    def __init__(self, path, fmt):
+        self.count = 0
+        self._names = set()
+        self._repeats = {}
+        if path.lower().endswith(".zip"):
+            # PDF pages are already compressed; HTML shrinks several times
+            self._zip = zipfile.ZipFile(path, "w", zipfile.ZIP_STORED if fmt == "pdf" else zipfile.ZIP_DEFLATED)
+            self._dir = None
+        else:
+            self._zip = None
+            self._dir = path
+            os.makedirs(path, exist_ok=True)
+
+    def _unique(self, name):
+        # Repeated ids (e.g. a department column) get -2, -3, ... suffixes
+        stem, ext = os.path.splitext(name)
+        n = self._repeats.get(name, 1)
+        unique = name
+        while unique in self._names:
+            n += 1
+            unique = f"{stem}-{n}{ext}"
+        self._repeats[name] = n
+        self._names.add(unique)
+        return unique
+
+    def write(self, reports):
+        for name, document in reports:
+            name = self._unique(name)
+            if self._zip is not None:
+                self._zip.writestr(name, document)
+            else:
+                with open(os.path.join(self._dir, name), "wb") as f:
+                    f.write(document)
+            self.count += 1
+
+    def close(self):
+        if self._zip is not None:
+            self._zip.close()
+
+
+def _chunks(input_path, id_column, chunksize):
+    start = 0
+    for frame in read_chunks(input_path, chunksize):
+        if id_column:
+            ids = frame[id_column].astype(str).tolist()
+        else:
+            ids = [str(i) for i in range(start, start + len(frame))]
+        start += len(frame)
+        yield frame, ids
+
+
+def generate_reports(input_path, output_path, fmt="html", model_path=fdp_core.BATCH_MODEL_PATH, workers=None,
+                     id_column=None, chart=True, chunksize=CHUNK_ROWS, tenant=None, tenants_dir=None):
+    """Render one report per row of ``input_path`` into ``output_path`` (directory or .zip).
+
+    Returns the number of reports written.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of {FORMATS}")
+    workers = workers or os.cpu_count() or 1
+    sink = _Sink(output_path, fmt)
+    try:
+        with ProcessPoolExecutor(workers, initializer=_init_worker,
+                                 initargs=(model_path, fmt, chart, tenant, tenants_dir)) as pool:
+            pending = deque()
+            for frame, ids in _chunks(input_path, id_column, chunksize):
+                pending.append(pool.submit(_render_chunk, frame, ids, fmt))
+                if len(pending) >= 2 * workers:
+                    sink.write(pending.popleft().result())
+            while pending:
+                sink.write(pending.popleft().result())
+    finally:
+        sink.close()
+    return sink.count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render a personal FDP report for every faculty member.")
+    parser.add_argument("input", help="CSV with columns A11..D32 (extra columns allowed), or an fdp_store directory")
+    parser.add_argument("output", help="output directory, or a .zip archive")
+    parser.add_argument("--format", choices=FORMATS, default="html")
+    parser.add_argument("--id-column", help="column naming each report (default: row number)")
+    parser.add_argument("--no-chart", action="store_true", help="skip the subdomain score chart")
+    parser.add_argument("--model", default=fdp_core.BATCH_MODEL_PATH)
+    parser.add_argument("--workers", type=int, default=None, help="defaults to the CPU count")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_ROWS, help="reports per worker task")
+    parser.add_argument("--tenant", help="use this tenant's model, topic map and rules")
+    parser.add_argument("--tenants-dir", help="defaults to $FDP_TENANTS_DIR or tenants/")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    n = generate_reports(args.input, args.output, args.format, args.model, args.workers, args.id_column,
+                         not args.no_chart, args.chunksize, args.tenant, args.tenants_dir)
+    elapsed = time.perf_counter() - start
+    print(f"{n} {args.format} reports -> {args.output} in {elapsed:.1f}s ({n / max(elapsed, 1e-9):.0f}/s)",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
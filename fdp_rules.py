@@ -0,0 +1,152 @@
+"""Declarative smart-rule table compiled into vectorized NumPy masks.
+
+Each rule in the table (``fdp_rules.json`` by default) is a dict::
+
+    {"conditions": [[subdomain, op, threshold], ...],
+     "combine": "and" | "or" | "count",
+     "min_count": 2,            # only for "count"
+     "label": "...",            # optional, generated from the conditions otherwise
+     "fdp": "Recommended FDP text"}
+
+A subdomain of ``"*"`` expands to every subdomain. ``compile_rules`` turns the
+table into one gather + compare over all conditions followed by a segmented sum,
+so every rule is evaluated against an N x 43 score matrix in a single pass.
+"""
+import hashlib
+import json
+import os
+
+import numpy as np
+
+RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fdp_rules.json")
+
+_OPS = {
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "<": np.less,
+    "<=": np.less_equal,
+    "==": np.equal,
+    "!=": np.not_equal,
+}
+_JOINERS = {"and": " & ", "or": " or "}
+
+
+def load_rule_table(path=RULES_PATH):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _label(rule):
+    if "label" in rule:
+        return rule["label"]
+    if rule["combine"] not in _JOINERS:
+        raise ValueError(f"Rule {rule['fdp']!r} needs an explicit label")
+    return _JOINERS[rule["combine"]].join(f"{key} {op} {thr:g}" for key, op, thr in rule["conditions"])
+
+
+class CompiledRules:
+    """A rule table compiled against a fixed subdomain (column) order."""
+
+    def __init__(self, table, subdomains):
+        subdomains = list(subdomains)
+        col_of = {k: i for i, k in enumerate(subdomains)}
+
+        cols, ops, thresholds, starts, need = [], [], [], [], []
+        for rule in table:
+            combine = rule["combine"]
+            conds = []
+            for key, op, thr in rule["conditions"]:
+                if op not in _OPS:
+                    raise ValueError(f"Unknown comparison {op!r} in rule {rule['fdp']!r}")
+                if key == "*":
+                    conds.extend((i, op, thr) for i in range(len(subdomains)))
+                elif key in col_of:
+                    conds.append((col_of[key], op, thr))
+                else:
+                    raise KeyError(f"Unknown subdomain {key!r} in rule {rule['fdp']!r}")
+            if not conds:
+                raise ValueError(f"Rule {rule['fdp']!r} has no conditions")
+
+            # Every combinator reduces to "at least n conditions hold"
+            if combine == "and":
+                n = len(conds)
+            elif combine == "or":
+                n = 1
+            elif combine == "count":
+                n = int(rule["min_count"])
+            else:
+                raise ValueError(f"Unknown combinator {combine!r} in rule {rule['fdp']!r}")
+
+            starts.append(len(cols))
+            need.append(n)
+            for col, op, thr in conds:
+                cols.append(col)
+                ops.append(op)
+                thresholds.append(thr)
+
+        self.n_features = len(subdomains)
+        self.fdps = [rule["fdp"] for rule in table]
+        self.labels = [_label(rule) for rule in table]
+        self._cols = np.asarray(cols, dtype=np.intp)
+        self._thresholds = np.asarray(thresholds, dtype=np.float64)
+        self._starts = np.asarray(starts, dtype=np.intp)
+        self._need = np.asarray(need, dtype=np.int32)
+        # Condition positions grouped by comparison so each op is one ufunc call
+        ops = np.asarray(ops)
+        self._op_groups = [(_OPS[op], np.flatnonzero(ops == op)) for op in _OPS if (ops == op).any()]
+        self._single_op = len(self._op_groups) == 1
+
+    def __len__(self):
+        return len(self.fdps)
+
+    def fingerprint(self):
+        """Digest of everything that decides the rule output, e.g. to namespace caches."""
+        digest = hashlib.sha1(repr((self.n_features, self.fdps, self.labels)).encode())
+        for a in (self._cols, self._thresholds, self._starts, self._need):
+            digest.update(a.tobytes())
+        for ufunc, pos in self._op_groups:
+            digest.update(ufunc.__name__.encode())
+            digest.update(pos.tobytes())
+        return digest.hexdigest()[:16]
+
+    def evaluate(self, X):
+        """Boolean hit matrix of shape (N, n_rules) for an N x n_features matrix."""
+        X = np.atleast_2d(X)
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"Expected {self.n_features} score columns, got {X.shape[1]}")
+        thresholds = self._thresholds.astype(X.dtype, copy=False) if X.dtype.kind == "f" else self._thresholds
+
+        gathered = X[:, self._cols]
+        if self._single_op:
+            cond = self._op_groups[0][0](gathered, thresholds)
+        else:
+            cond = np.empty(gathered.shape, dtype=bool)
+            for ufunc, pos in self._op_groups:
+                cond[:, pos] = ufunc(gathered[:, pos], thresholds[pos])
+        counts = np.add.reduceat(cond, self._starts, axis=1, dtype=np.int32)
+        return counts >= self._need
+
+    def lists(self, hits_row):
+        """The ``(rule_based_fdps, triggered_rules)`` lists for one row of hits."""
+        idx = np.flatnonzero(hits_row)
+        return [self.fdps[i] for i in idx], [self.labels[i] for i in idx]
+
+    def joined(self, hits, sep="; "):
+        """Per-row ``sep``-joined FDP and label strings for a hit matrix.
+
+        Strings are built once per distinct hit pattern rather than per row.
+        """
+        packed = np.packbits(hits, axis=1)
+        patterns, inverse = np.unique(packed, axis=0, return_inverse=True)
+        fdp_strings, label_strings = [], []
+        for pattern in patterns:
+            fdps, labels = self.lists(np.unpackbits(pattern)[:len(self)])
+            fdp_strings.append(sep.join(fdps))
+            label_strings.append(sep.join(labels))
+        inverse = inverse.reshape(-1)
+        return (np.array(fdp_strings, dtype=object)[inverse],
+                np.array(label_strings, dtype=object)[inverse])
+
+
+def compile_rules(table, subdomains):
+    return CompiledRules(table, subdomains)
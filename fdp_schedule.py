@@ -0,0 +1,371 @@
+"""FDP calendar builder: assign faculty to topic sessions under capacity limits.
+
+Inputs are a (faculty x topics) need matrix (each faculty member's recommended
+``fdp_topic_map`` topics plus triggered rule FDPs), a (faculty x slots)
+availability matrix, the rooms open in each slot, how many runs each topic's
+trainers can give, and the seats per room. A session is one run of a topic in
+one slot and room. Faculty attend at most one session per slot, only when
+available, and each needed topic at most once; the objective is the number of
+covered (faculty, topic) needs.
+
+``schedule`` is a greedy plus local search:
+
+1. Greedy: the gain of opening topic t in slot s is the number of faculty who
+   still need t and are free at s (capped at the room size). The gain matrix is
+   one (topics x faculty) @ (faculty x slots) product, then updated
+   incrementally after each opened session. Seats go to the least flexible
+   eligible faculty first (fewest free slots relative to remaining needs).
+2. Local search: single-faculty moves that free a slot for another need (move f
+   to another run of the same topic, then seat f in a session with spare
+   seats), and close-and-refill of the weakest sessions, kept only when
+   coverage increases.
+
+``exact_schedule`` solves the same model as a MILP with ``scipy.optimize.milp``
+for small instances; benchmarks/bench_schedule.py reports the gap.
+
+    python fdp_schedule.py tna_scores_dataset.csv --slots 10 --rooms 6 --room-capacity 30 \\
+        --runs 2 --availability availability.csv --output schedule.csv
+"""
+import argparse
+import sys
+import time
+from collections import namedtuple
+
+import numpy as np
+
+import fdp_core
+
+# sessions: (n, 2) int array of (topic, slot); assignments: (m, 2) int array of
+# (faculty, session); covered: number of covered (faculty, topic) needs
+Schedule = namedtuple("Schedule", "sessions assignments covered")
+
+
+def topic_needs(scored, index=fdp_core.SUBDOMAIN_INDEX, rules=fdp_core.RULES):
+    """(faculty x topics) needs from a ``fdp_core.Scored`` batch, plus topic names.
+
+    Topics are every ``fdp_topic_map`` topic (needed when its subdomain is in the
+    faculty member's top-k) followed by the rule-based FDPs.
+    """
+    n_sub = len(index)
+    topic_of = [(j, t) for j in range(n_sub) for t in index.topics(j)]
+    membership = np.zeros((n_sub, len(topic_of)), dtype=bool)
+    membership[[j for j, _ in topic_of], np.arange(len(topic_of))] = True
+    chosen = np.zeros((len(scored.top), n_sub), dtype=bool)
+    chosen[np.arange(len(scored.top))[:, None], scored.top] = True
+    needs = np.hstack([(chosen.astype(np.uint8) @ membership.astype(np.uint8)) > 0, scored.hits])
+    names = [f"{index.keys[j]} / {t}" for j, t in topic_of] + list(rules.fdps)
+    return needs, names
+
+
+class _State:
+    """Mutable assignment state with the incrementally maintained gain matrix."""
+
+    def __init__(self, needs, available, rooms, runs, capacity):
+        self.capacity = capacity
+        self.uncovered = np.array(needs, dtype=bool)
+        self.free = np.array(available, dtype=bool)
+        self.rooms_left = np.array(rooms, dtype=np.int64)
+        self.runs_left = np.array(runs, dtype=np.int64)
+        self.gain = (self.uncovered.T.astype(np.float32) @ self.free.astype(np.float32)).astype(np.int64)
+        self.n_free = self.free.sum(axis=1)
+        self.n_needs = self.uncovered.sum(axis=1)
+        # busy[f, s]: session f attends in slot s, or -1
+        self.busy = np.full(self.free.shape, -1, dtype=np.int64)
+        self.topics = []
+        self.slots = []
+        self.members = []
+        self.covered = 0
+
+    def copy(self):
+        other = object.__new__(_State)
+        for name, value in vars(self).items():
+            setattr(other, name, value.copy() if isinstance(value, (np.ndarray, list)) else value)
+        other.members = [m.copy() for m in self.members]
+        return other
+
+    def _seat(self, i, faculty):
+        t, s = self.topics[i], self.slots[i]
+        self.gain[:, s] -= self.uncovered[faculty].sum(axis=0)
+        self.free[faculty, s] = False
+        self.gain[t, :] -= self.free[faculty].sum(axis=0)
+        self.uncovered[faculty, t] = False
+        self.busy[faculty, s] = i
+        self.n_free[faculty] -= 1
+        self.n_needs[faculty] -= 1
+        self.members[i] = np.concatenate([self.members[i], faculty])
+        self.covered += len(faculty)
+
+    def _unseat(self, i, faculty):
+        t, s = self.topics[i], self.slots[i]
+        self.uncovered[faculty, t] = True
+        self.gain[t, :] += self.free[faculty].sum(axis=0)
+        self.free[faculty, s] = True
+        self.gain[:, s] += self.uncovered[faculty].sum(axis=0)
+        self.busy[faculty, s] = -1
+        self.n_free[faculty] += 1
+        self.n_needs[faculty] += 1
+        self.members[i] = self.members[i][~np.isin(self.members[i], faculty)]
+        self.covered -= len(faculty)
+
+    def _pick(self, t, s, seats):
+        eligible = np.flatnonzero(self.uncovered[:, t] & self.free[:, s])
+        if len(eligible) > seats:
+            slack = self.n_free[eligible] - self.n_needs[eligible]
+            eligible = eligible[np.argsort(slack, kind="stable")[:seats]]
+        return eligible
+
+    def open(self, t, s):
+        self.topics.append(t)
+        self.slots.append(s)
+        self.members.append(np.empty(0, dtype=np.int64))
+        self.rooms_left[s] -= 1
+        self.runs_left[t] -= 1
+        self._seat(len(self.topics) - 1, self._pick(t, s, self.capacity))
+
+    def close(self, i):
+        self._unseat(i, self.members[i])
+        self.rooms_left[self.slots[i]] += 1
+        self.runs_left[self.topics[i]] += 1
+        # Keep the session as an empty placeholder so indices stay valid
+        self.topics[i] = self.slots[i] = -1
+
+    def greedy(self, tabu=(), rng=None):
+        """Open the best remaining session until none adds coverage.
+
+        ``tabu`` (topic, slot) pairs are skipped while anything else has a gain;
+        ``rng`` breaks ties between equal gains at random.
+        """
+        while True:
+            gain = np.minimum(self.gain, self.capacity).astype(np.float64)
+            gain[self.runs_left <= 0, :] = 0
+            gain[:, self.rooms_left <= 0] = 0
+            for t, s in tabu:
+                gain[t, s] = min(gain[t, s], 0.5)
+            if rng is not None:
+                gain += rng.random(gain.shape) * 0.25 * (gain > 0)
+            best = int(np.argmax(gain))
+            t, s = divmod(best, gain.shape[1])
+            if gain[t, s] <= 0:
+                return
+            self.open(t, s)
+
+    def fill(self):
+        """Seat eligible faculty in open sessions that still have spare seats."""
+        for i, t in enumerate(self.topics):
+            if t >= 0 and len(self.members[i]) < self.capacity:
+                faculty = self._pick(t, self.slots[i], self.capacity - len(self.members[i]))
+                if len(faculty):
+                    self._seat(i, faculty)
+
+    def move_and_seat(self):
+        """Two-step moves that cover one more need; returns how many were made.
+
+        - f needs the topic of session j but sits in session k in j's slot: move f
+          to another run of k's topic in a slot where f is free, then seat f in j.
+        - j is full but someone uncovered could attend: move a member of j to
+          another run of the same topic, then seat the newcomer in j.
+        """
+        moves = 0
+        by_topic = {}
+        for i, t in enumerate(self.topics):
+            if t >= 0:
+                by_topic.setdefault(t, []).append(i)
+
+        def relocate(f, k):
+            for k2 in by_topic[self.topics[k]]:
+                if k2 != k and len(self.members[k2]) < self.capacity and self.free[f, self.slots[k2]]:
+                    self._unseat(k, np.array([f]))
+                    self._seat(k2, np.array([f]))
+                    return True
+            return False
+
+        for j, t in enumerate(self.topics):
+            if t < 0:
+                continue
+            s = self.slots[j]
+            for f in np.flatnonzero(self.uncovered[:, t] & (self.busy[:, s] >= 0)):
+                if len(self.members[j]) >= self.capacity:
+                    break
+                if relocate(f, self.busy[f, s]):
+                    self._seat(j, np.array([f]))
+                    moves += 1
+            if len(self.members[j]) < self.capacity or len(by_topic[t]) < 2:
+                continue
+            waiting = np.flatnonzero(self.uncovered[:, t] & self.free[:, s])
+            for g in waiting:
+                if not any(relocate(f, j) for f in self.members[j]):
+                    break
+                self._seat(j, np.array([g]))
+                moves += 1
+        return moves
+
+    def schedule(self):
+        keep = [i for i, t in enumerate(self.topics) if t >= 0 and len(self.members[i])]
+        remap = {i: n for n, i in enumerate(keep)}
+        sessions = np.array([(self.topics[i], self.slots[i]) for i in keep], dtype=np.int64).reshape(-1, 2)
+        pairs = [(f, remap[i]) for i in keep for f in self.members[i].tolist()]
+        assignments = np.array(sorted(pairs), dtype=np.int64).reshape(-1, 2)
+        return Schedule(sessions, assignments, self.covered)
+
+
+def _validate(needs, available, rooms, runs):
+    needs = np.asarray(needs, dtype=bool)
+    available = np.asarray(available, dtype=bool)
+    if available.shape[0] != needs.shape[0]:
+        raise ValueError("needs and availability must have one row per faculty member")
+    rooms = np.broadcast_to(np.asarray(rooms, dtype=np.int64), available.shape[1])
+    runs = np.broadcast_to(np.asarray(runs, dtype=np.int64), needs.shape[1])
+    return needs, available, rooms, runs
+
+
+def upper_bound(needs, available, rooms, runs, capacity):
+    """Coverage no schedule can beat: total seats, and per member min(needs, available slots)."""
+    needs, available, rooms, runs = _validate(needs, available, rooms, runs)
+    return min(capacity * int(min(rooms.sum(), runs.sum())),
+               int(np.minimum(needs.sum(axis=1), available.sum(axis=1)).sum()))
+
+
+def _improve(state):
+    """Move-and-seat and spare-seat filling until neither helps."""
+    while True:
+        before = state.covered
+        state.move_and_seat()
+        state.fill()
+        if state.covered == before:
+            return state
+
+
+def schedule(needs, available, rooms, runs, capacity, time_limit=5.0, max_stale=200, seed=0):
+    """Greedy + local-search schedule; ``rooms`` per slot and ``runs`` per topic may be scalars.
+
+    After the greedy pass, iterated local search closes one or two sessions
+    (biased towards the emptiest), refills greedily and keeps the result when
+    coverage does not drop. Stops after ``time_limit`` seconds or ``max_stale``
+    perturbations without improving the best schedule.
+    """
+    needs, available, rooms, runs = _validate(needs, available, rooms, runs)
+    deadline = time.perf_counter() + time_limit
+    rng = np.random.default_rng(seed)
+    state = _State(needs, available, rooms, runs, capacity)
+    state.greedy()
+    best = _improve(state).copy()
+    bound = upper_bound(needs, available, rooms, runs, capacity)
+    stale = 0
+    while best.covered < bound and stale < max_stale and time.perf_counter() < deadline:
+        open_ = [i for i, t in enumerate(state.topics) if t >= 0]
+        if not open_:
+            break
+        size = np.array([len(state.members[i]) for i in open_], dtype=np.float64)
+        weight = (capacity + 1 - size) ** 2
+        drop = rng.choice(open_, size=min(len(open_), rng.integers(1, 3)), replace=False, p=weight / weight.sum())
+        trial = state.copy()
+        tabu = [(trial.topics[i], trial.slots[i]) for i in drop]
+        for i in drop:
+            trial.close(i)
+        trial.greedy(tabu, rng)
+        _improve(trial)
+        if trial.covered >= state.covered:
+            state = trial
+        if state.covered > best.covered:
+            best, stale = state.copy(), 0
+        else:
+            stale += 1
+    return best.schedule()
+
+
+def exact_schedule(needs, available, rooms, runs, capacity, time_limit=60.0):
+    """Optimal schedule of the same model via ``scipy.optimize.milp`` (small instances only).
+
+    Variables are n[t, s], the number of runs of topic t in slot s, and a binary
+    x for every (faculty, topic, slot) with a need and availability. Returns
+    ``(covered, status message)``.
+    """
+    from scipy.optimize import Bounds, LinearConstraint, milp
+    from scipy.sparse import coo_matrix
+
+    needs, available, rooms, runs = _validate(needs, available, rooms, runs)
+    F, T = needs.shape
+    S = available.shape[1]
+    f_idx, t_idx = np.nonzero(needs)
+    f_x = np.repeat(f_idx, S)
+    t_x = np.repeat(t_idx, S)
+    s_x = np.tile(np.arange(S), len(f_idx))
+    ok = available[f_x, s_x]
+    f_x, t_x, s_x = f_x[ok], t_x[ok], s_x[ok]
+    n_x, n_n = len(f_x), T * S
+    x_col = n_n + np.arange(n_x)
+
+    rows, cols, vals, lo, hi = [], [], [], [], []
+
+    def add(row_ids, col_ids, values, n_rows, upper):
+        base = len(lo)
+        rows.append(base + np.asarray(row_ids))
+        cols.append(np.asarray(col_ids))
+        vals.append(np.asarray(values, dtype=np.float64))
+        lo.extend([-np.inf] * n_rows)
+        hi.extend(np.broadcast_to(upper, n_rows).tolist())
+
+    n_col = np.arange(n_n)
+    add(n_col % S, n_col, np.ones(n_n), S, rooms)                                   # rooms per slot
+    add(n_col // S, n_col, np.ones(n_n), T, runs)                                   # runs per topic
+    ts = t_x * S + s_x
+    add(np.r_[ts, n_col], np.r_[x_col, n_col], np.r_[np.ones(n_x), -capacity * np.ones(n_n)], n_n, 0)  # seats
+    add(f_x * S + s_x, x_col, np.ones(n_x), F * S, 1)                               # one session per slot
+    add(f_x * T + t_x, x_col, np.ones(n_x), F * T, 1)                               # each need once
+
+    A = coo_matrix((np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))),
+                   shape=(len(lo), n_n + n_x)).tocsr()
+    c = np.r_[np.zeros(n_n), -np.ones(n_x)]
+    upper = np.r_[np.minimum(rooms.max(), runs.max()) * np.ones(n_n), np.ones(n_x)]
+    result = milp(c, constraints=LinearConstraint(A, lo, hi), integrality=np.ones(n_n + n_x),
+                  bounds=Bounds(0, upper), options={"time_limit": time_limit})
+    covered = int(round(-result.fun)) if result.x is not None else 0
+    return covered, result.message
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build an FDP session calendar from TNA scores.")
+    parser.add_argument("input", help="CSV (or fdp_store directory) with columns A11..D32")
+    parser.add_argument("--slots", type=int, default=10, help="number of time slots")
+    parser.add_argument("--rooms", type=int, default=6, help="rooms open in every slot")
+    parser.add_argument("--room-capacity", type=int, default=30, help="seats per session")
+    parser.add_argument("--runs", type=int, default=2, help="sessions each topic's trainers can run")
+    parser.add_argument("--availability", help="CSV with one 0/1 column per slot, one row per faculty (default: all)")
+    parser.add_argument("--time-limit", type=float, default=5.0, help="local search budget in seconds")
+    parser.add_argument("--model", default=fdp_core.BATCH_MODEL_PATH)
+    parser.add_argument("--output", help="write faculty,topic,slot,room assignments here (default stdout)")
+    args = parser.parse_args(argv)
+
+    import pandas as pd
+
+    from fdp_store import read_chunks
+
+    codes = list(fdp_core.SUBDOMAIN_CODES)
+    X = np.concatenate([c[codes].to_numpy(dtype=fdp_core.DTYPE) for c in read_chunks(args.input, columns=codes)])
+    needs, names = topic_needs(fdp_core.score(fdp_core.load_model(args.model), X))
+    if args.availability:
+        available = pd.read_csv(args.availability).to_numpy() > 0
+        args.slots = available.shape[1]
+    else:
+        available = np.ones((len(X), args.slots), dtype=bool)
+
+    start = time.perf_counter()
+    result = schedule(needs, available, args.rooms, args.runs, args.room_capacity, args.time_limit)
+    elapsed = time.perf_counter() - start
+
+    sessions = result.sessions
+    # Rooms are interchangeable; number the sessions within each slot
+    room = np.zeros(len(sessions), dtype=np.int64)
+    for s in np.unique(sessions[:, 1]):
+        mine = np.flatnonzero(sessions[:, 1] == s)
+        room[mine] = np.arange(len(mine))
+    f, i = result.assignments[:, 0], result.assignments[:, 1]
+    out = pd.DataFrame({"faculty": f, "topic": np.array(names, dtype=object)[sessions[i, 0]],
+                        "slot": sessions[i, 1], "room": room[i]})
+    out.to_csv(args.output or sys.stdout, index=False)
+    print(f"{len(sessions)} sessions, {result.covered} of {int(needs.sum())} needs covered "
+          f"({result.covered / max(int(needs.sum()), 1):.1%}) in {elapsed:.2f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+"""Headless JSON recommendation service (asyncio, standard library only).
+
+Endpoints:
+
+    GET  /health
+    GET  /metrics          Prometheus text (stage timings, batch sizes, cache hit rate)
+    GET  /drift            score / probability drift and input quality (with --drift-reference)
+    POST /recommend        {"scores": {"A11": 7.5, ...}}           -> bundle
+    POST /recommend/batch  {"profiles": [{"A11": 7.5, ...}, ...]}  -> {"results": [bundle, ...]}
+
+Scores may be keyed by short code (A11..D32) or full subdomain name; every
+subdomain must be given once, as a JSON number from 1 to 10 (not a string or
+boolean), or the request is rejected with 400 (``fdp_core.score_vector``).
+Concurrent single requests are collected for up to ``--max-wait-ms`` and scored
+together as one batched ``predict_proba`` call per tenant.
+
+Either POST body may name a ``"tenant"`` (a directory under ``--tenants-dir``,
+see fdp_tenants.py); without one the built-in model, topic map and rules are used.
+
+    python fdp_service.py --port 8080
+"""
+import argparse
+import asyncio
+import json
+
+import numpy as np
+
+import fdp_core
+from fdp_cache import RecommendationCache
+from fdp_drift import REFERENCE_PATH, DriftMonitor, load_reference
+from fdp_metrics import METRICS
+from fdp_tenants import DEFAULT_TENANT, MAX_BYTES, TENANTS_DIR, TenantRegistry
+
+MAX_BODY = 64 * 1024 * 1024
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class MicroBatcher:
+    """Collects single score vectors and scores them as one batch.
+
+    A batch is flushed when ``max_batch`` vectors are waiting or ``max_wait``
+    seconds after its first vector arrived, whichever comes first. Vectors
+    submitted with different ``key`` objects are scored as separate groups via
+    ``score_batch(X, key)``.
+    """
+
+    def __init__(self, score_batch, max_batch=256, max_wait=0.005):
+        self.score_batch = score_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.batches = 0
+        self.batched_rows = 0
+        self._queue = asyncio.Queue()
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def submit(self, x, key=None):
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((key, x, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(pending) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    pending.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            groups = {}
+            for item in pending:
+                groups.setdefault(id(item[0]), []).append(item)
+            for group in groups.values():
+                await self._score_group(loop, group)
+
+    async def _score_group(self, loop, group):
+        X = np.stack([x for _, x, _ in group])
+        METRICS.observe("service_batch_size", len(group))
+        try:
+            bundles = await loop.run_in_executor(None, self.score_batch, X, group[0][0])
+        except Exception as exc:  # surface the failure to every waiting request
+            for _, _, future in group:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        self.batches += 1
+        self.batched_rows += len(group)
+        for (_, _, future), bundle in zip(group, bundles):
+            if not future.done():
+                future.set_result(bundle)
+
+
+class RecommendationService:
+    def __init__(self, registry, cache_size=0, max_batch=256, max_wait=0.005, monitor=None):
+        self.registry = registry
+        self.cache_size = cache_size
+        self.monitor = monitor
+        self.batcher = MicroBatcher(self.score_batch, max_batch, max_wait)
+        # Tenant name -> cache for its current bundle; a reload starts a fresh one
+        self._caches = {}
+
+    def cache_for(self, tenant):
+        if not self.cache_size:
+            return None
+        namespace = f"{tenant.name}:{tenant.version}"
+        cache = self._caches.get(tenant.name)
+        if cache is None or cache.namespace != namespace:
+            cache = self._caches[tenant.name] = RecommendationCache(self.cache_size, namespace=namespace)
+        return cache
+
+    def cache_stats(self):
+        caches = list(self._caches.values())
+        hits = sum(c.hits for c in caches)
+        total = hits + sum(c.misses for c in caches)
+        return {"entries": sum(len(c) for c in caches), "hits": hits, "hit_rate": hits / total if total else 0.0}
+
+    def score_batch(self, X, tenant):
+        cache = self.cache_for(tenant)
+        bundles = cache.get_many(X, tenant.recommend) if cache is not None else tenant.recommend(X)
+        if self.monitor is not None:
+            self.monitor.update(X, [b["probability"] for b in bundles])
+        return bundles
+
+    async def tenant(self, payload):
+        name = payload.get("tenant", DEFAULT_TENANT)
+        if not isinstance(name, str):
+            raise HTTPError(400, "tenant must be a string")
+        if name not in self.registry:
+            raise HTTPError(404, f"Unknown tenant {name!r}")
+        # First use of a tenant loads its model; keep that off the event loop
+        return await asyncio.get_running_loop().run_in_executor(None, self.registry.get, name)
+
+    def _vector(self, scores, index):
+        try:
+            try:
+                return fdp_core.score_vector(scores, index)
+            except KeyError as exc:
+                raise HTTPError(400, f"Unknown subdomain {exc.args[0]!r}") from None
+            except ValueError as exc:
+                raise HTTPError(400, str(exc)) from None
+        except HTTPError:
+            if self.monitor is not None:
+                self.monitor.record_malformed()
+            raise
+
+    async def handle(self, method, path, body):
+        if path == "/metrics":
+            return METRICS.prometheus_text()
+        if path == "/health":
+            stats = {"batches": self.batcher.batches, "batched_rows": self.batcher.batched_rows,
+                     "tenants": self.registry.stats()}
+            if self.cache_size:
+                stats["cache"] = self.cache_stats()
+            return {"status": "ok", **stats}
+        if path == "/drift":
+            if self.monitor is None:
+                raise HTTPError(404, "Drift monitoring is off (start with --drift-reference)")
+            return self.monitor.report()
+        if path not in ("/recommend", "/recommend/batch"):
+            raise HTTPError(404, f"No route for {path}")
+        if method != "POST":
+            raise HTTPError(405, f"{path} only accepts POST")
+        try:
+            payload = json.loads(body or b"{}")
+        except ValueError:
+            raise HTTPError(400, "Body is not valid JSON") from None
+        if not isinstance(payload, dict):
+            raise HTTPError(400, "Body must be a JSON object")
+
+        tenant = await self.tenant(payload)
+        if path == "/recommend":
+            return await self.batcher.submit(self._vector(payload.get("scores"), tenant.index), tenant)
+
+        profiles = payload.get("profiles")
+        if not isinstance(profiles, list):
+            raise HTTPError(400, "profiles must be a list")
+        if not profiles:
+            return {"results": []}
+        X = np.stack([self._vector(p, tenant.index) for p in profiles])
+        loop = asyncio.get_running_loop()
+        return {"results": await loop.run_in_executor(None, self.score_batch, X, tenant)}
+
+    async def serve_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, path, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                try:
+                    length = int(headers.get("content-length", 0))
+                    if length > MAX_BODY:
+                        raise HTTPError(413, "Request body too large")
+                    body = await reader.readexactly(length) if length else b""
+                    with METRICS.span("http_request"):
+                        status, result = 200, await self.handle(method, path.split("?", 1)[0], body)
+                except HTTPError as exc:
+                    status, result = exc.status, {"error": str(exc)}
+                except Exception as exc:
+                    status, result = 500, {"error": f"{type(exc).__name__}: {exc}"}
+
+                if isinstance(result, str):
+                    data, content_type = result.encode(), "text/plain; version=0.0.4"
+                else:
+                    data, content_type = json.dumps(result).encode(), "application/json"
+                writer.write(
+                    f"HTTP/1.1 {status} {_REASONS[status]}\r\n"
+                    f"Content-Type: {content_type}\r\nContent-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(host="127.0.0.1", port=8080, model_path=fdp_core.MODEL_PATH, cache_size=0,
+                max_batch=256, max_wait=0.005, tenants_dir=TENANTS_DIR, tenant_max_bytes=MAX_BYTES,
+                drift_reference=None, drift_window=None):
+    registry = TenantRegistry(tenants_dir, default_model=model_path, max_bytes=tenant_max_bytes)
+    registry.get(DEFAULT_TENANT)
+    monitor = None
+    if drift_reference:
+        monitor = DriftMonitor(load_reference(drift_reference), window=drift_window)
+        METRICS.gauge("drift_alerts", lambda: len(monitor.report().get("alerts", [])))
+    service = RecommendationService(registry, cache_size, max_batch, max_wait, monitor)
+    if cache_size:
+        METRICS.gauge("cache_hit_rate", lambda: service.cache_stats()["hit_rate"])
+        METRICS.gauge("cache_entries", lambda: service.cache_stats()["entries"])
+    METRICS.gauge("tenants_loaded", lambda: len(registry.stats()["loaded"]))
+    service.batcher.start()
+    server = await asyncio.start_server(service.serve_connection, host, port)
+    print(f"Serving FDP recommendations on http://{host}:{port}", flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.batcher.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve FDP recommendations over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--model", default=fdp_core.MODEL_PATH)
+    parser.add_argument("--cache-size", type=int, default=0, help="LRU entries per tenant, 0 disables the cache")
+    parser.add_argument("--tenants-dir", default=TENANTS_DIR, help="one sub-directory per tenant")
+    parser.add_argument("--tenant-max-mb", type=float, default=MAX_BYTES / 2**20,
+                        help="evict least recently used tenants above this total model size")
+    parser.add_argument("--max-batch", type=int, default=256)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--metrics", action="store_true", help="collect stage timings for /metrics (or set FDP_METRICS=1)")
+    parser.add_argument("--drift-reference", nargs="?", const=REFERENCE_PATH,
+                        help=f"monitor input drift against this reference (default {REFERENCE_PATH})")
+    parser.add_argument("--drift-window", type=int, default=10_000, help="records per drift comparison window")
+    args = parser.parse_args(argv)
+    if args.metrics:
+        METRICS.enable()
+    try:
+        asyncio.run(serve(args.host, args.port, args.model, args.cache_size, args.max_batch, args.max_wait_ms / 1000,
+                          args.tenants_dir, int(args.tenant_max_mb * 2**20), args.drift_reference,
+                          args.drift_window))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""'Faculty like me': nearest historical TNA profiles for a score vector.
+
+Profiles are stored as a contiguous float32 matrix scaled to [-1, 1] with cached
+squared norms, and searched by Euclidean distance. Modes:
+
+* ``exact``    - blocked matrix multiply over the whole corpus.
+* ``ivf``      - coarse k-means quantizer; a query scans only the ``nprobe``
+                 closest cells (approximate, sub-millisecond at 1M profiles).
+* ``balltree`` - ``sklearn.neighbors.BallTree`` over the scaled profiles.
+
+``add`` appends new profiles in amortized O(1); derived structures (cell lists,
+ball tree) are rebuilt lazily on the next query.
+
+    python fdp_similarity.py --k 5 --scores 7 8 6 ...   # 43 scores, A11..D32
+"""
+import argparse
+
+import numpy as np
+
+import fdp_core
+
+BLOCK_ROWS = 65_536
+LOW, HIGH = 1.0, 10.0
+
+
+def scale(X):
+    """Map scores from [1, 10] onto [-1, 1] as float32."""
+    X = np.atleast_2d(np.asarray(X, dtype=np.float32))
+    return (X - (LOW + HIGH) / 2) / ((HIGH - LOW) / 2)
+
+
+def _merge_topk(dist, idx, new_dist, new_idx, k):
+    dist = np.concatenate([dist, new_dist], axis=1)
+    idx = np.concatenate([idx, new_idx], axis=1)
+    keep = np.argpartition(dist, k - 1, axis=1)[:, :k] if dist.shape[1] > k else np.argsort(dist, axis=1)
+    return np.take_along_axis(dist, keep, axis=1), np.take_along_axis(idx, keep, axis=1)
+
+
+class ProfileIndex:
+    def __init__(self, n_features=len(fdp_core.SUBDOMAINS), mode="exact", n_cells=None, nprobe=8, seed=0):
+        if mode not in ("exact", "ivf", "balltree"):
+            raise ValueError(f"Unknown mode {mode!r}")
+        self.n_features = n_features
+        self.mode = mode
+        self.n_cells = n_cells
+        self.nprobe = nprobe
+        self.seed = seed
+        self._data = np.empty((0, n_features), dtype=np.float32)
+        self._norms = np.empty(0, dtype=np.float32)
+        self._size = 0
+        self._centroids = None
+        self._cell_of = np.empty(0, dtype=np.int32)
+        self._cell_order = None
+        self._cell_start = None
+        self._tree = None
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def data(self):
+        """Stored profiles, scaled to [-1, 1]."""
+        return self._data[:self._size]
+
+    def profiles(self, idx):
+        """Original 1-10 scores of stored profiles ``idx``."""
+        return self._data[idx] * ((HIGH - LOW) / 2) + (LOW + HIGH) / 2
+
+    def add(self, X):
+        """Append score rows; returns their ids (positions) in the index."""
+        Z = scale(X)
+        if Z.shape[1] != self.n_features:
+            raise ValueError(f"Expected {self.n_features} scores per profile, got {Z.shape[1]}")
+        n = len(Z)
+        if self._size + n > len(self._data):
+            capacity = max(2 * len(self._data), self._size + n, 1024)
+            grown = np.empty((capacity, self.n_features), dtype=np.float32)
+            grown[:self._size] = self.data
+            norms = np.empty(capacity, dtype=np.float32)
+            norms[:self._size] = self._norms[:self._size]
+            self._data, self._norms = grown, norms
+        self._data[self._size:self._size + n] = Z
+        self._norms[self._size:self._size + n] = np.einsum("ij,ij->i", Z, Z)
+        ids = np.arange(self._size, self._size + n)
+        self._size += n
+
+        if self.mode == "ivf" and self._centroids is not None:
+            self._cell_of = np.concatenate([self._cell_of, self._assign(Z)])
+            self._cell_order = None
+        self._tree = None
+        return ids
+
+    # -- exact -----------------------------------------------------------------
+
+    def _distances(self, Q, q_norms, lo, hi):
+        block = self._data[lo:hi]
+        return q_norms[:, None] + self._norms[lo:hi][None, :] - 2 * Q @ block.T
+
+    def _search_exact(self, Q, k):
+        q_norms = np.einsum("ij,ij->i", Q, Q)
+        dist = np.empty((len(Q), 0), dtype=np.float32)
+        idx = np.empty((len(Q), 0), dtype=np.intp)
+        for lo in range(0, self._size, BLOCK_ROWS):
+            hi = min(lo + BLOCK_ROWS, self._size)
+            d = self._distances(Q, q_norms, lo, hi)
+            kk = min(k, hi - lo)
+            part = np.argpartition(d, kk - 1, axis=1)[:, :kk]
+            dist, idx = _merge_topk(dist, idx, np.take_along_axis(d, part, axis=1), part + lo, k)
+        return dist, idx
+
+    # -- ivf -------------------------------------------------------------------
+
+    def _assign(self, Z):
+        c_norms = np.einsum("ij,ij->i", self._centroids, self._centroids)
+        return np.argmin(c_norms[None, :] - 2 * Z @ self._centroids.T, axis=1).astype(np.int32)
+
+    def train(self, n_iter=10, sample=100_000):
+        """Fit the coarse quantizer (k-means on a sample) and assign every profile."""
+        rng = np.random.default_rng(self.seed)
+        n_cells = self.n_cells or max(1, int(np.sqrt(self._size)))
+        data = self.data
+        sample_rows = data[rng.choice(self._size, min(sample, self._size), replace=False)]
+        self._centroids = sample_rows[rng.choice(len(sample_rows), min(n_cells, len(sample_rows)), replace=False)].copy()
+        for _ in range(n_iter):
+            cells = self._assign(sample_rows)
+            counts = np.bincount(cells, minlength=len(self._centroids))
+            sums = np.zeros_like(self._centroids)
+            np.add.at(sums, cells, sample_rows)
+            filled = counts > 0
+            self._centroids[filled] = sums[filled] / counts[filled, None]
+        self._cell_of = np.concatenate([self._assign(data[lo:lo + BLOCK_ROWS])
+                                        for lo in range(0, self._size, BLOCK_ROWS)])
+        self._cell_order = None
+
+    def _cells(self):
+        # Cell-sorted copy of the profiles so every probed cell is a contiguous slice
+        if self._cell_order is None:
+            self._cell_order = np.argsort(self._cell_of, kind="stable")
+            counts = np.bincount(self._cell_of, minlength=len(self._centroids))
+            self._cell_start = np.concatenate([[0], np.cumsum(counts)])
+            self._cell_data = self.data[self._cell_order]
+            self._cell_norms = self._norms[:self._size][self._cell_order]
+        return self._cell_order, self._cell_start
+
+    def _search_ivf(self, Q, k):
+        if self._centroids is None:
+            self.train()
+        order, start = self._cells()
+        probe = np.argpartition(self._assign_dist(Q), min(self.nprobe, len(self._centroids)) - 1,
+                                axis=1)[:, :self.nprobe]
+        q_norms = np.einsum("ij,ij->i", Q, Q)
+        dist = np.full((len(Q), k), np.inf, dtype=np.float32)
+        idx = np.full((len(Q), k), -1, dtype=np.intp)
+        for i, cells in enumerate(probe):
+            spans = [(start[c], start[c + 1]) for c in cells if start[c] < start[c + 1]]
+            if not spans:
+                continue
+            q = Q[i]
+            d = np.concatenate([self._cell_norms[lo:hi] - 2 * (self._cell_data[lo:hi] @ q) for lo, hi in spans])
+            rows = np.concatenate([order[lo:hi] for lo, hi in spans])
+            kk = min(k, len(d))
+            part = np.argpartition(d, kk - 1)[:kk]
+            dist[i, :kk], idx[i, :kk] = d[part] + q_norms[i], rows[part]
+        return dist, idx
+
+    def _assign_dist(self, Q):
+        c_norms = np.einsum("ij,ij->i", self._centroids, self._centroids)
+        return c_norms[None, :] - 2 * Q @ self._centroids.T
+
+    # -- search ----------------------------------------------------------------
+
+    def search(self, X, k=5):
+        """``(distances, ids)`` of the ``k`` nearest stored profiles per query row, nearest first."""
+        if not self._size:
+            raise ValueError("The index is empty")
+        Q = scale(X)
+        k = min(k, self._size)
+        if self.mode == "balltree":
+            if self._tree is None:
+                from sklearn.neighbors import BallTree
+
+                self._tree = BallTree(self.data)
+            dist, idx = self._tree.query(Q, k=k)
+            return (dist ** 2).astype(np.float32), idx
+        dist, idx = self._search_ivf(Q, k) if self.mode == "ivf" else self._search_exact(Q, k)
+        order = np.argsort(dist, axis=1, kind="stable")
+        return np.maximum(np.take_along_axis(dist, order, axis=1), 0), np.take_along_axis(idx, order, axis=1)
+
+
+def load_history(path="tna_scores_dataset.csv", mode="exact"):
+    """Index of the historical profiles in a TNA scores CSV or fdp_store directory."""
+    import fdp_store
+
+    index = ProfileIndex(mode=mode)
+    if fdp_store.is_store(path):
+        index.add(fdp_store.ScoreStore(path).score_matrix(dtype=np.float32))
+    else:
+        import pandas as pd
+
+        codes = list(fdp_core.SUBDOMAIN_CODES)
+        index.add(pd.read_csv(path, usecols=codes)[codes].to_numpy(dtype=np.float32))
+    return index
+
+
+def similar_faculty(index, classifier, x, k=5, subdomains=fdp_core.SUBDOMAIN_INDEX, rules=fdp_core.RULES):
+    """The ``k`` most similar past profiles with the FDPs recommended for them.
+
+    The scores dataset carries no outcome column, so "FDPs that worked" are the
+    recommendations the model and rules (a tenant's, if given) produce for each
+    neighbour. Also returns how many neighbours each FDP was recommended to.
+    """
+    dist, ids = index.search(x, k)
+    ids = ids[0][ids[0] >= 0]
+    neighbours = fdp_core.recommend(classifier, index.profiles(ids), 3, subdomains, rules)
+    votes = {}
+    for bundle in neighbours:
+        for fdp in [key for key, _ in bundle["top_subdomains"]] + bundle["rule_based_fdps"]:
+            votes[fdp] = votes.get(fdp, 0) + 1
+    for profile_id, d, bundle in zip(ids.tolist(), np.sqrt(dist[0]).tolist(), neighbours):
+        bundle["profile_id"] = profile_id
+        bundle["distance"] = d
+    return neighbours, dict(sorted(votes.items(), key=lambda kv: -kv[1]))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find historical TNA profiles similar to a score vector.")
+    parser.add_argument("--history", default="tna_scores_dataset.csv")
+    parser.add_argument("--scores", type=float, nargs=len(fdp_core.SUBDOMAINS), required=True,
+                        help="43 scores in A11..D32 order")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--mode", choices=("exact", "ivf", "balltree"), default="exact")
+    args = parser.parse_args(argv)
+
+    index = load_history(args.history, args.mode)
+    neighbours, votes = similar_faculty(index, fdp_core.load_model(), np.array(args.scores), args.k)
+    for bundle in neighbours:
+        print(f"#{bundle['profile_id']} (distance {bundle['distance']:.3f}): "
+              + ", ".join(key for key, _ in bundle["top_subdomains"]))
+    print("FDPs among neighbours:")
+    for fdp, count in votes.items():
+        print(f"  {count} x {fdp}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Cold-start helpers: background warm-up of slow resources and an import-time report.
+
+``Warmup`` starts a loader (model, similarity history) on a daemon thread so the
+app can draw its input UI while the load runs; ``result()`` blocks only when the
+value is actually needed.
+
+The report runs a fresh interpreter with ``python -X importtime`` and groups the
+cumulative import cost by top-level package:
+
+    python fdp_startup.py
+    python fdp_startup.py --modules streamlit fdp_core pandas --json
+"""
+import argparse
+import json
+import re
+import subprocess
+import sys
+import threading
+import time
+
+# What the app process imports before its first render
+APP_MODULES = ("streamlit", "numpy", "fdp_core", "fdp_cache", "fdp_explain", "fdp_metrics", "fdp_similarity",
+               "fdp_startup", "fdp_tenants", "fdp_whatif")
+
+_IMPORTTIME = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+class Warmup:
+    """Run ``fn()`` once on a daemon thread and hand back its result on demand."""
+
+    def __init__(self, name, fn):
+        self.name = name
+        self.seconds = None
+        self._value = None
+        self._error = None
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(fn,), name=f"fdp-warmup-{name}", daemon=True)
+        self._thread.start()
+
+    def _run(self, fn):
+        start = time.perf_counter()
+        try:
+            self._value = fn()
+        except BaseException as exc:  # re-raised in the caller's thread by result()
+            self._error = exc
+        finally:
+            self.seconds = time.perf_counter() - start
+            self._done.set()
+
+    @property
+    def ready(self):
+        return self._done.is_set()
+
+    def result(self, timeout=None):
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"{self.name} still loading after {timeout}s")
+        if self._error is not None:
+            raise self._error
+        return self._value
+
+
+def import_times(modules=APP_MODULES, python=sys.executable):
+    """Per-package cumulative import time (seconds) for importing ``modules`` cold.
+
+    Only top-level entries of the ``-X importtime`` tree are counted, so each
+    package's cost includes the dependencies it was first to pull in.
+    """
+    code = "".join(f"import {m}\n" for m in modules)
+    proc = subprocess.run([python, "-X", "importtime", "-c", code], capture_output=True, text=True, check=True)
+    totals = {}
+    for line in proc.stderr.splitlines():
+        match = _IMPORTTIME.match(line)
+        if match is None or len(match.group(3)) != 1:
+            continue
+        package = match.group(4).split(".")[0]
+        totals[package] = totals.get(package, 0.0) + int(match.group(2)) / 1e6
+    return dict(sorted(totals.items(), key=lambda kv: -kv[1]))
+
+
+def startup_report(modules=APP_MODULES, load_model=True):
+    """Import-time breakdown plus model load time, each measured in a fresh interpreter."""
+    report = {"imports_s": import_times(modules)}
+    report["imports_total_s"] = sum(report["imports_s"].values())
+    if load_model:
+        code = (
+            "import time, fdp_core\n"
+            "t = time.perf_counter(); fdp_core.load_model()\n"
+            "print(time.perf_counter() - t, fdp_core.MODEL_PATH)\n"
+        )
+        out = subprocess.run([sys.executable, "-W", "ignore", "-c", code], capture_output=True, text=True, check=True)
+        seconds, path = out.stdout.split(maxsplit=1)
+        report["model_load_s"] = float(seconds)
+        report["model_path"] = path.strip()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time breakdown for the app's cold start.")
+    parser.add_argument("--modules", nargs="+", default=list(APP_MODULES))
+    parser.add_argument("--no-model", action="store_true", help="skip timing the model load")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    report = startup_report(args.modules, load_model=not args.no_model)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    for package, seconds in list(report["imports_s"].items())[: args.top]:
+        print(f"{package:<24} {seconds * 1e3:8.1f} ms")
+    print(f"{'imports total':<24} {report['imports_total_s'] * 1e3:8.1f} ms")
+    if "model_load_s" in report:
+        print(f"{'model load':<24} {report['model_load_s'] * 1e3:8.1f} ms  ({report['model_path']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""Columnar store for TNA score histories.
+
+A store is a directory of partitions, one per value of the partition columns
+(e.g. ``round`` or ``institution``), each holding append-only parts. Every part
+stores each column as its own raw ``.npy`` file:
+
+- subdomain scores as ``uint8`` when every value in the part is a whole number in
+  0-255 (the usual 1-10 TNA scores), else ``float16``, which keeps 0.01-step
+  scores exact after rounding to hundredths;
+- other numeric columns as-is;
+- text columns dictionary-encoded (``<col>.codes.npy`` plus ``<col>.labels.json``).
+
+``manifest.json`` lists the parts and is replaced atomically after each append.
+Reads project columns (only the requested ``.npy`` files are opened) and
+memory-map them, so e.g. the planner reads 43 bytes of scores plus one group
+code per row instead of parsing CSV text:
+
+    python fdp_store.py convert tna_scores_dataset.csv tna_store --partition-by department
+    python fdp_store.py append new_round.csv tna_store --set round=2025
+    python fdp_store.py info tna_store
+
+``read_chunks`` yields DataFrames from either a store or a CSV, so batch_score,
+fdp_planner and fdp_similarity accept both.
+"""
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+import fdp_core
+
+STORE_FORMAT = "fdp-score-store"
+STORE_VERSION = 1
+MANIFEST = "manifest.json"
+
+
+def is_store(path):
+    return os.path.isfile(os.path.join(path, MANIFEST))
+
+
+def _partition_dir(partition):
+    """``key=value`` path segments, e.g. ``round=2024/department=MBA``."""
+    if not partition:
+        return "all"
+    # A "/" in a value would nest directories
+    return os.path.join(*(f"{k}={str(v).replace('/', '_').replace(os.sep, '_')}" for k, v in partition.items()))
+
+
+def _encode_scores(values):
+    finite = np.isfinite(values).all()
+    if finite and (values == np.round(values)).all() and values.min() >= 0 and values.max() <= 255:
+        return values.astype(np.uint8)
+    return values.astype(np.float16)
+
+
+class ScoreStore:
+    """Partitioned, column-per-file TNA score history (see module docstring)."""
+
+    def __init__(self, path, partition_by=()):
+        self.path = path
+        if is_store(path):
+            with open(os.path.join(path, MANIFEST), encoding="utf-8") as f:
+                self.manifest = json.load(f)
+            if self.manifest.get("format") != STORE_FORMAT:
+                raise ValueError(f"{path} is not a score store")
+            if self.manifest.get("version") != STORE_VERSION:
+                raise ValueError(f"Unsupported score store version {self.manifest.get('version')} in {path}")
+            if partition_by and list(partition_by) != self.manifest["partition_by"]:
+                raise ValueError(f"{path} is partitioned by {self.manifest['partition_by']}, not {list(partition_by)}")
+        else:
+            self.manifest = {
+                "format": STORE_FORMAT,
+                "version": STORE_VERSION,
+                "score_columns": list(fdp_core.SUBDOMAIN_CODES),
+                "partition_by": list(partition_by),
+                "columns": None,
+                "parts": [],
+            }
+
+    @property
+    def columns(self):
+        """Stored columns in input order, partition columns included."""
+        return self.manifest["columns"] or []
+
+    @property
+    def n_rows(self):
+        return sum(part["rows"] for part in self.manifest["parts"])
+
+    def partitions(self):
+        """Distinct partition value dicts, in first-written order."""
+        seen = []
+        for part in self.manifest["parts"]:
+            if part["partition"] not in seen:
+                seen.append(part["partition"])
+        return seen
+
+    def append(self, frame, partition=None):
+        """Write ``frame`` as new part(s); ``partition`` fixes values for every row.
+
+        Without ``partition``, rows are split by the store's ``partition_by``
+        columns, which must then be present in ``frame``.
+        """
+        frame = frame.reset_index(drop=True)
+        if partition:
+            frame = frame.assign(**{k: v for k, v in partition.items()})
+        by = self.manifest["partition_by"]
+        missing = [c for c in [*self.manifest["score_columns"], *by] if c not in frame.columns]
+        if missing:
+            raise ValueError(f"Input is missing columns: {', '.join(missing)}")
+        if self.manifest["columns"] is None:
+            self.manifest["columns"] = list(frame.columns)
+        elif set(frame.columns) != set(self.columns):
+            raise ValueError("Appended rows must have the same columns as the store")
+
+        groups = frame.groupby(by, sort=False, dropna=False).indices.items() if by else [((), np.arange(len(frame)))]
+        for key, rows in groups:
+            key = key if isinstance(key, tuple) else (key,)
+            values = {k: (v.item() if hasattr(v, "item") else v) for k, v in zip(by, key)}
+            self._write_part(frame.iloc[rows], values)
+        self._save_manifest()
+        return self
+
+    def _write_part(self, frame, partition):
+        part_dir = os.path.join(_partition_dir(partition), f"part-{len(self.manifest['parts']):05d}")
+        full = os.path.join(self.path, part_dir)
+        os.makedirs(full, exist_ok=True)
+        scores = set(self.manifest["score_columns"])
+        dtypes = {}
+        for col in frame.columns:
+            if col in partition:
+                continue
+            values = frame[col]
+            if col in scores:
+                data = _encode_scores(values.to_numpy(dtype=np.float64))
+            elif pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values):
+                data = values.to_numpy()
+            else:
+                codes, labels = pd.factorize(values.astype(str), use_na_sentinel=False)
+                data = codes.astype(np.uint16 if len(labels) < 2**16 else np.uint32)
+                with open(os.path.join(full, f"{col}.labels.json"), "w", encoding="utf-8") as f:
+                    json.dump(list(labels), f)
+                col = f"{col}.codes"
+            np.save(os.path.join(full, f"{col}.npy"), np.ascontiguousarray(data))
+            dtypes[col] = str(data.dtype)
+        self.manifest["parts"].append({"path": part_dir, "partition": partition, "rows": len(frame), "dtypes": dtypes})
+
+    def _save_manifest(self):
+        os.makedirs(self.path, exist_ok=True)
+        tmp = os.path.join(self.path, MANIFEST + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, indent=1)
+        os.replace(tmp, os.path.join(self.path, MANIFEST))
+
+    def _parts(self, where):
+        for part in self.manifest["parts"]:
+            if where and any(str(part["partition"].get(k)) != str(v) for k, v in where.items()):
+                continue
+            yield part
+
+    def _column(self, part, col, mmap):
+        base = os.path.join(self.path, part["path"])
+        if col in part["partition"]:
+            return np.full(part["rows"], part["partition"][col], dtype=object)
+        mode = "r" if mmap else None
+        if f"{col}.codes" in part["dtypes"]:
+            with open(os.path.join(base, f"{col}.labels.json"), encoding="utf-8") as f:
+                labels = np.array(json.load(f), dtype=object)
+            return labels[np.load(os.path.join(base, f"{col}.codes.npy"), mmap_mode=mode)]
+        return np.load(os.path.join(base, f"{col}.npy"), mmap_mode=mode)
+
+    def score_matrix(self, where=None, dtype=fdp_core.DTYPE, codes=None):
+        """(N, 43) score matrix over the selected partitions, decoded to ``dtype``.
+
+        Filled column by column straight from the memory-mapped files into one
+        preallocated array.
+        """
+        codes = list(codes or self.manifest["score_columns"])
+        parts = list(self._parts(where))
+        out = np.empty((sum(part["rows"] for part in parts), len(codes)), dtype=dtype)
+        start = 0
+        for part in parts:
+            stop = start + part["rows"]
+            for j, col in enumerate(codes):
+                data = self._column(part, col, mmap=True)
+                out[start:stop, j] = data if data.dtype == np.uint8 else np.round(data.astype(np.float32), 2)
+            start = stop
+        return out
+
+    def iter_frames(self, columns=None, where=None, mmap=True):
+        """One DataFrame per part with only ``columns`` (default: all), scores as float32."""
+        columns = list(columns or self.columns)
+        scores = set(self.manifest["score_columns"])
+        for part in self._parts(where):
+            data = {}
+            for col in columns:
+                values = self._column(part, col, mmap)
+                if col in scores and values.dtype == np.float16:
+                    values = np.round(values.astype(np.float32), 2)
+                data[col] = values
+            yield pd.DataFrame(data, columns=columns)
+
+    def read(self, columns=None, where=None):
+        frames = list(self.iter_frames(columns, where))
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns or self.columns)
+
+    def nbytes(self):
+        total = 0
+        for root, _, files in os.walk(self.path):
+            total += sum(os.path.getsize(os.path.join(root, f)) for f in files)
+        return total
+
+
+def read_chunks(path, chunksize=100_000, columns=None):
+    """DataFrames from a score store (one or more per part) or a CSV (``chunksize`` rows)."""
+    if not is_store(path):
+        yield from pd.read_csv(path, chunksize=chunksize, usecols=columns)
+        return
+    for frame in ScoreStore(path).iter_frames(columns):
+        for start in range(0, len(frame), chunksize):
+            yield frame.iloc[start:start + chunksize]
+
+
+def convert_csv(csv_path, store_path, partition_by=(), partition=None, chunksize=200_000):
+    """Append every row of a TNA scores CSV to a (new or existing) store."""
+    store = ScoreStore(store_path, partition_by)
+    for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+        store.append(chunk, partition)
+    return store
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Columnar storage for TNA score rounds.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name in ("convert", "append"):
+        p = sub.add_parser(name, help=f"{name} a TNA scores CSV into a store")
+        p.add_argument("input", help="CSV with columns A11..D32")
+        p.add_argument("store", help="store directory")
+        p.add_argument("--partition-by", nargs="*", default=[], help="columns to partition on, e.g. round")
+        p.add_argument("--set", nargs="*", default=[], metavar="COL=VALUE",
+                       help="constant column(s) for every appended row, e.g. round=2025")
+        p.add_argument("--chunksize", type=int, default=200_000)
+    info = sub.add_parser("info", help="summarise a store")
+    info.add_argument("store")
+    args = parser.parse_args(argv)
+
+    if args.command == "info":
+        store = ScoreStore(args.store)
+        print(json.dumps({"rows": store.n_rows, "parts": len(store.manifest["parts"]), "bytes": store.nbytes(),
+                          "partition_by": store.manifest["partition_by"], "partitions": store.partitions()}, indent=2))
+        return
+
+    partition = dict(item.split("=", 1) for item in args.set)
+    partition_by = args.partition_by
+    if args.command == "convert":
+        if is_store(args.store):
+            sys.exit(f"{args.store} already exists; use append")
+        partition_by = partition_by or list(partition)
+    store = convert_csv(args.input, args.store, partition_by, partition, args.chunksize)
+    print(f"{store.n_rows} rows in {len(store.manifest['parts'])} part(s), {store.nbytes() / 1e6:.1f} MB -> {args.store}",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""Streaming ingestion of TNA survey responses with incremental cohort aggregates.
+
+Consumes JSONL records from a file (optionally following it like ``tail -f``) or
+stdin. A record is either ``{"id": ..., "scores": {"A11": 7, ...}}`` or a flat
+object with the score codes/names as keys. Records are scored in small batches
+with the shared model and rule table, results are appended to an output JSONL
+and running per-subdomain aggregates are updated in O(1) per record; history is
+never re-read. With ``--state`` the aggregates and input offset are persisted,
+so a restarted consumer resumes where it stopped. ``--drift-reference`` also
+folds every batch into a ``fdp_drift.DriftMonitor`` whose report is saved with
+the state. Records that cannot be scored (malformed JSON, unknown or missing
+subdomains, scores that are not numbers from 1 to 10) are skipped; with
+``--rejected`` they are appended there with the reason.
+
+    python fdp_stream.py responses.jsonl --follow --output scored.jsonl --state stream_state.json
+    python fdp_stream.py responses.jsonl --state stream_state.json --drift-reference drift_reference.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+import fdp_core
+
+
+class CohortAggregates:
+    """Running counts and sums over every scored record."""
+
+    def __init__(self, n_subdomains=len(fdp_core.SUBDOMAINS), n_rules=len(fdp_core.RULES)):
+        self.count = 0
+        self.positives = 0
+        self.probability_sum = 0.0
+        self.score_sum = np.zeros(n_subdomains)
+        self.top_counts = np.zeros(n_subdomains, dtype=np.int64)
+        self.rule_counts = np.zeros(n_rules, dtype=np.int64)
+
+    def update(self, X, scored):
+        """Fold in a scored batch (``fdp_core.Scored``) of score rows ``X``."""
+        self.count += len(X)
+        self.positives += int(np.count_nonzero(scored.prediction == 1))
+        self.probability_sum += float(scored.probability.sum())
+        self.score_sum += X.sum(axis=0, dtype=np.float64)
+        self.top_counts += np.bincount(scored.top.ravel(), minlength=len(self.top_counts))
+        self.rule_counts += scored.hits.sum(axis=0)
+
+    def snapshot(self):
+        """Cohort-level view: means, rule trigger frequencies and topic demand."""
+        n = max(self.count, 1)
+        index = fdp_core.SUBDOMAIN_INDEX
+        topic_demand = {}
+        for j, demand in enumerate(self.top_counts.tolist()):
+            for topic in index.topics(j):
+                # A topic listed under several subdomains sums their demand
+                topic_demand[topic] = topic_demand.get(topic, 0) + demand
+        return {
+            "count": self.count,
+            "high_need_rate": self.positives / n,
+            "mean_probability": self.probability_sum / n,
+            "mean_scores": dict(zip(index.codes, (self.score_sum / n).round(4).tolist())),
+            "top3_frequency": dict(zip(index.codes, (self.top_counts / n).round(4).tolist())),
+            "rule_frequency": dict(zip(fdp_core.RULES.labels, (self.rule_counts / n).round(4).tolist())),
+            "topic_demand": dict(sorted(topic_demand.items(), key=lambda kv: -kv[1])),
+        }
+
+    def to_state(self):
+        return {
+            "count": self.count,
+            "positives": self.positives,
+            "probability_sum": self.probability_sum,
+            "score_sum": self.score_sum.tolist(),
+            "top_counts": self.top_counts.tolist(),
+            "rule_counts": self.rule_counts.tolist(),
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        agg = cls(len(state["score_sum"]), len(state["rule_counts"]))
+        agg.count = state["count"]
+        agg.positives = state["positives"]
+        agg.probability_sum = state["probability_sum"]
+        agg.score_sum = np.asarray(state["score_sum"], dtype=np.float64)
+        agg.top_counts = np.asarray(state["top_counts"], dtype=np.int64)
+        agg.rule_counts = np.asarray(state["rule_counts"], dtype=np.int64)
+        return agg
+
+
+def parse_record(line):
+    """``(id, score vector)`` from one JSONL line; raises ValueError if malformed.
+
+    Scores are checked with ``fdp_core.score_vector``, the same rules as fdp_service.
+    """
+    try:
+        record = json.loads(line)
+    except ValueError:
+        raise ValueError("not valid JSON") from None
+    if not isinstance(record, dict):
+        raise ValueError("record is not an object")
+    scores = record.get("scores")
+    if scores is None:
+        scores = {k: v for k, v in record.items() if k != "id"}
+    if not isinstance(scores, dict):
+        raise ValueError("scores is not an object")
+    try:
+        x = fdp_core.score_vector(scores)
+    except KeyError as exc:
+        raise ValueError(f"unknown subdomain {exc.args[0]!r}") from None
+    return record.get("id"), x
+
+
+def read_lines(f, follow=False, poll=0.5):
+    """Yield complete lines from binary file ``f``; yields ``None`` when idle.
+
+    With ``follow`` the file is polled for appended data instead of stopping at
+    EOF; a partially written last line is held back until it is complete.
+    """
+    partial = b""
+    while True:
+        line = f.readline()
+        if line:
+            partial += line
+            if partial.endswith(b"\n"):
+                yield partial
+                partial = b""
+            continue
+        if not follow:
+            if partial:
+                yield partial
+            return
+        yield None
+        time.sleep(poll)
+
+
+class StreamConsumer:
+    """Scores JSONL lines in small batches and keeps ``CohortAggregates`` current."""
+
+    def __init__(self, classifier, output=None, aggregates=None, batch_size=64, monitor=None, rejected=None):
+        self.classifier = classifier
+        self.output = output
+        self.rejected = rejected
+        self.aggregates = aggregates or CohortAggregates()
+        self.monitor = monitor
+        self.batch_size = batch_size
+        self.errors = 0
+        self.offset = 0
+        self._ids = []
+        self._rows = []
+
+    def feed(self, line):
+        """Queue one raw line; scores the batch once ``batch_size`` records are queued."""
+        self.offset += len(line)
+        if not line.strip():
+            return
+        try:
+            record_id, x = parse_record(line)
+        except ValueError as exc:
+            self.reject(line, exc)
+            return
+        self._ids.append(record_id)
+        self._rows.append(x)
+        if len(self._rows) >= self.batch_size:
+            self.flush()
+
+    def reject(self, line, reason):
+        """Count a record that cannot be scored; with ``rejected`` set, dead-letter it there."""
+        self.errors += 1
+        if self.monitor is not None:
+            self.monitor.record_malformed()
+        offset = self.offset - len(line)
+        if self.rejected is None:
+            print(f"Skipping malformed record at byte {offset}: {reason}", file=sys.stderr)
+            return
+        if isinstance(line, bytes):
+            line = line.decode("utf-8", errors="replace")
+        self.rejected.write(json.dumps({"offset": offset, "reason": str(reason), "record": line.rstrip("\r\n")}) + "\n")
+        self.rejected.flush()
+
+    def flush(self):
+        if not self._rows:
+            return 0
+        X = np.stack(self._rows)
+        scored = fdp_core.score(self.classifier, X)
+        self.aggregates.update(X, scored)
+        if self.monitor is not None:
+            self.monitor.update(X, scored.probability)
+        if self.output is not None:
+            for record_id, bundle in zip(self._ids, fdp_core.to_bundles(X, scored)):
+                self.output.write(json.dumps({"id": record_id, **bundle}) + "\n")
+            self.output.flush()
+        n = len(self._rows)
+        self._ids, self._rows = [], []
+        return n
+
+    def save_state(self, path):
+        state = {
+            "offset": self.offset,
+            "errors": self.errors,
+            "aggregates": self.aggregates.to_state(),
+            "snapshot": self.aggregates.snapshot(),
+        }
+        if self.monitor is not None:
+            state["drift"] = self.monitor.to_state()
+            state["drift_report"] = self.monitor.report()
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp, path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a stream of TNA JSONL records.")
+    parser.add_argument("input", nargs="?", default="-", help="JSONL file, or - for stdin")
+    parser.add_argument("--follow", action="store_true", help="keep polling the file for new records")
+    parser.add_argument("--output", help="append scored records to this JSONL file (default stdout)")
+    parser.add_argument("--state", help="persist aggregates and input offset here, and resume from it")
+    parser.add_argument("--model", default=fdp_core.MODEL_PATH)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--drift-reference", help="monitor drift against this fdp_drift reference JSON")
+    parser.add_argument("--rejected", help="append records that cannot be scored, with the reason, to this JSONL file")
+    args = parser.parse_args(argv)
+
+    from fdp_drift import DriftMonitor, load_reference
+
+    reference = load_reference(args.drift_reference) if args.drift_reference else None
+    monitor = DriftMonitor(reference) if reference is not None else None
+    aggregates, offset, errors = None, 0, 0
+    if args.state and os.path.exists(args.state):
+        with open(args.state, encoding="utf-8") as f:
+            state = json.load(f)
+        aggregates = CohortAggregates.from_state(state["aggregates"])
+        offset = state["offset"] if args.input != "-" else 0
+        errors = state["errors"]
+        if monitor is not None and "drift" in state:
+            monitor = DriftMonitor.from_state(state["drift"], reference)
+
+    output = open(args.output, "a", encoding="utf-8") if args.output else sys.stdout
+    source = sys.stdin.buffer if args.input == "-" else open(args.input, "rb")
+    rejected = open(args.rejected, "a", encoding="utf-8") if args.rejected else None
+    consumer = StreamConsumer(fdp_core.load_model(args.model), output, aggregates, args.batch_size, monitor, rejected)
+    consumer.errors = errors
+    if offset:
+        source.seek(offset)
+        consumer.offset = offset
+    try:
+        for line in read_lines(source, follow=args.follow):
+            if line is None:
+                # Idle: score whatever is queued so aggregates stay live
+                if consumer.flush() and args.state:
+                    consumer.save_state(args.state)
+                continue
+            consumer.feed(line)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        consumer.flush()
+        if args.state:
+            consumer.save_state(args.state)
+        if output is not sys.stdout:
+            output.close()
+        if rejected is not None:
+            rejected.close()
+    print(json.dumps(consumer.aggregates.snapshot()["rule_frequency"], indent=2), file=sys.stderr)
+    if monitor is not None:
+        report = monitor.report()
+        for kind in ("alerts", "warnings"):
+            if report.get(kind):
+                print(f"Drift {kind}: {', '.join(report[kind])}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Immutable subdomain registry: column indices, short codes and topic arrays.
+
+The registry fixes the feature order once, so scoring, rules and top-k all work
+on contiguous float32 score vectors/matrices instead of dicts keyed by the long
+subdomain names.
+"""
+import hashlib
+
+import numpy as np
+
+DTYPE = np.float32
+
+
+def _readonly(a):
+    a.setflags(write=False)
+    return a
+
+
+class SubdomainIndex:
+    """Subdomains in model feature order.
+
+    ``keys`` are the display names ("C11:Ethics, ..."), ``codes`` the short CSV
+    header codes (A11..D32). Topics are stored flat with per-subdomain offsets.
+    """
+
+    __slots__ = ("keys", "codes", "_position", "_topics", "_topic_offsets")
+
+    def __init__(self, topic_map):
+        keys = tuple(topic_map)
+        codes = tuple(k.split(":", 1)[0] for k in keys)
+        if len(set(codes)) != len(codes):
+            raise ValueError("Subdomain codes are not unique")
+        position = {k: i for i, k in enumerate(keys)}
+        position.update((c, i) for i, c in enumerate(codes))
+
+        lengths = [len(topic_map[k]) for k in keys]
+        topics = np.empty(sum(lengths), dtype=object)
+        topics[:] = [t for k in keys for t in topic_map[k]]
+
+        set_ = object.__setattr__
+        set_(self, "keys", keys)
+        set_(self, "codes", codes)
+        set_(self, "_position", position)
+        set_(self, "_topics", _readonly(topics))
+        set_(self, "_topic_offsets", _readonly(np.concatenate(([0], np.cumsum(lengths)))))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("SubdomainIndex is immutable")
+
+    def __len__(self):
+        return len(self.keys)
+
+    def fingerprint(self):
+        """Digest of the subdomain order and topic map, e.g. to namespace caches."""
+        digest = hashlib.sha1(repr(self.keys).encode())
+        digest.update(repr(self._topics.tolist()).encode())
+        digest.update(self._topic_offsets.tobytes())
+        return digest.hexdigest()[:16]
+
+    def position(self, key_or_code):
+        """Column index of a subdomain given its display name or short code."""
+        return self._position[key_or_code]
+
+    def topics(self, i):
+        """FDP topics of the subdomain in column ``i``."""
+        return self._topics[self._topic_offsets[i]:self._topic_offsets[i + 1]]
+
+    def vector(self, scores):
+        """Contiguous float32 score vector from a {name or code: score} mapping.
+
+        Every subdomain must be given exactly once, by either its name or its code.
+        """
+        x = np.full(len(self), np.nan, dtype=DTYPE)
+        filled = np.zeros(len(self), dtype=bool)
+        for k, v in scores.items():
+            i = self._position[k]
+            if filled[i]:
+                raise ValueError(f"Subdomain {self.codes[i]} given more than once")
+            x[i] = v
+            filled[i] = True
+        if not filled.all():
+            missing = [self.codes[i] for i in np.flatnonzero(~filled)]
+            raise ValueError(f"Expected {len(self)} subdomain scores, missing {', '.join(missing)}")
+        return x
+
+    def top_k(self, X, k=3):
+        """Column indices of the ``k`` highest scores per row, highest first.
+
+        Uses ``np.argpartition`` (linear per row) and breaks ties by column order,
+        matching ``sorted(scores.items(), key=..., reverse=True)``.
+        """
+        X = np.atleast_2d(X)
+        n, m = X.shape
+        k = min(k, m)
+        if k == 0:
+            return np.empty((n, 0), dtype=np.intp)
+        # k-th largest value per row, then all strictly greater columns plus the
+        # earliest tied columns needed to fill k slots
+        kth = np.take_along_axis(X, np.argpartition(-X, k - 1, axis=1)[:, k - 1:k], axis=1)
+        greater = X > kth
+        tied = X == kth
+        take_tied = np.cumsum(tied, axis=1) <= (k - greater.sum(axis=1, keepdims=True))
+        selected = greater | (tied & take_tied)
+        cols = np.nonzero(selected)[1].reshape(n, k)
+        # Order the k picks by score descending; stable sort keeps column order on ties
+        order = np.argsort(-np.take_along_axis(X, cols, axis=1), axis=1, kind="stable")
+        return np.take_along_axis(cols, order, axis=1)
+
+    def validate(self, model):
+        """Check that ``model`` expects exactly these features in this order."""
+        n_features = getattr(model, "n_features_in_", None)
+        if n_features is not None and n_features != len(self):
+            raise ValueError(f"Model expects {n_features} features, registry has {len(self)}")
+        names = getattr(model, "feature_names_in_", None)
+        if names is not None and tuple(str(n) for n in names) != self.codes:
+            mismatched = [f"{i}:{a}!={b}" for i, (a, b) in enumerate(zip(names, self.codes)) if a != b]
+            raise ValueError(f"Model feature order does not match the subdomain registry ({', '.join(mismatched[:5])})")
+        return model
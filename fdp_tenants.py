@@ -0,0 +1,230 @@
+"""Per-institution model / topic-map / rule bundles with LRU eviction and hot reload.
+
+A tenant is a directory under ``$FDP_TENANTS_DIR`` (default ``tenants/``)::
+
+    tenants/<name>/topic_map.json   {"A11:Subject Knowledge": ["topic", ...], ...}
+    tenants/<name>/rules.json       rule table in the fdp_rules.json format
+    tenants/<name>/model/           flat forest artifact, or
+    tenants/<name>/model.pkl        pickled forest (+ optional model.pkl.meta.json)
+
+Every file is optional and falls back to the built-in topic map, rule table and
+model; the ``default`` tenant uses only the built-ins. ``TenantRegistry.get``
+loads tenants on demand and keeps them in LRU order, evicting the least
+recently used once their combined on-disk size passes ``max_bytes``.
+
+At most every ``check_interval`` seconds a request re-stats the tenant's files.
+When they changed, one caller builds the complete new bundle while the others
+keep getting the old one, then the registry entry is swapped in one step. A
+request that already holds a ``Tenant`` finishes on it, and a failed reload (e.g.
+a half-copied model) leaves the previous bundle serving. A tenant's own
+``model/`` artifact is loaded into memory rather than memory-mapped, so rewriting
+it in place cannot disturb a bundle still in use; the shared default model is
+memory-mapped as everywhere else, one page-cached copy for all tenants and workers.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+import fdp_core
+import fdp_rules
+from fdp_subdomains import SubdomainIndex
+
+DEFAULT_TENANT = "default"
+TENANTS_DIR = os.environ.get("FDP_TENANTS_DIR", "tenants")
+MAX_BYTES = int(float(os.environ.get("FDP_TENANT_MAX_MB", 1024)) * 2**20)
+
+# First loads retry a few times while a tenant's files are being replaced
+LOAD_ATTEMPTS = 3
+RETRY_DELAY = 0.2
+
+_NAME = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]*$")
+
+# Where a tenant's parts come from; topic_map is None for the built-in map, and
+# mmap is False for a model inside the tenant's directory (hot-reloaded in place)
+TenantFiles = namedtuple("TenantFiles", "topic_map rules model mmap", defaults=(True,))
+
+
+class Tenant(namedtuple("Tenant", "name index rules classifier signature nbytes")):
+    """One institution's subdomain registry, compiled rules and model."""
+
+    __slots__ = ()
+
+    @property
+    def version(self):
+        """Stable digest of the tenant's files, e.g. to namespace cached bundles."""
+        return hashlib.sha1(repr(self.signature).encode()).hexdigest()[:12]
+
+    def score(self, X, k=3):
+        return fdp_core.score(self.classifier, X, k, self.index, self.rules)
+
+    def recommend(self, X, k=3):
+        return fdp_core.recommend(self.classifier, X, k, self.index, self.rules)
+
+
+def _paths(path):
+    """Files making up ``path``: itself, or everything inside an artifact directory."""
+    if os.path.isdir(path):
+        return sorted(os.path.join(path, f) for f in os.listdir(path))
+    sidecar = f"{path}.meta.json"
+    return [path, sidecar] if os.path.exists(sidecar) else [path]
+
+
+def signature(files):
+    """(path, mtime_ns, size) of every file behind a tenant, for change detection."""
+    sig = []
+    for part in files:
+        if part is None:
+            continue
+        for path in _paths(part):
+            st = os.stat(path)
+            sig.append((path, st.st_mtime_ns, st.st_size))
+    return tuple(sig)
+
+
+def load_tenant(name, files):
+    """Build a complete ``Tenant`` from ``files``; raises if any part is invalid."""
+    sig = signature(files)
+    if files.topic_map is None:
+        index = fdp_core.SUBDOMAIN_INDEX
+    else:
+        with open(files.topic_map, encoding="utf-8") as f:
+            index = SubdomainIndex(json.load(f))
+    if files.rules == fdp_rules.RULES_PATH and index is fdp_core.SUBDOMAIN_INDEX:
+        rules = fdp_core.RULES
+    else:
+        rules = fdp_rules.compile_rules(fdp_rules.load_rule_table(files.rules), index.keys)
+    classifier = fdp_core.load_model(files.model, index, mmap=files.mmap)
+    # Stat again after loading: a file replaced mid-load must trigger another reload
+    if signature(files) != sig:
+        raise RuntimeError(f"Tenant {name!r} changed while loading")
+    return Tenant(name, index, rules, classifier, sig, sum(size for _, _, size in sig))
+
+
+class TenantRegistry:
+    """Named tenants loaded on demand, LRU-evicted by size and hot-reloaded."""
+
+    def __init__(self, root=TENANTS_DIR, default_model=fdp_core.MODEL_PATH, max_bytes=MAX_BYTES,
+                 check_interval=2.0):
+        self.root = root
+        self.default_model = default_model
+        self.max_bytes = max_bytes
+        self.check_interval = check_interval
+        self.loads = 0
+        self.reloads = 0
+        self.evictions = 0
+        self.errors = {}
+        self._tenants = OrderedDict()
+        self._checked = {}
+        self._lock = threading.Lock()
+        self._load_locks = {}
+
+    def names(self):
+        found = [DEFAULT_TENANT]
+        if os.path.isdir(self.root):
+            found += sorted(n for n in os.listdir(self.root)
+                            if n != DEFAULT_TENANT and _NAME.match(n) and os.path.isdir(os.path.join(self.root, n)))
+        return found
+
+    def __contains__(self, name):
+        return name == DEFAULT_TENANT or (bool(_NAME.match(name)) and os.path.isdir(os.path.join(self.root, name)))
+
+    def files(self, name):
+        """Resolve the topic map, rule table and model behind tenant ``name``."""
+        if name not in self:
+            raise KeyError(name)
+        if name == DEFAULT_TENANT:
+            return TenantFiles(None, fdp_rules.RULES_PATH, self.default_model)
+        base = os.path.join(self.root, name)
+        topic_map = os.path.join(base, "topic_map.json")
+        rules = os.path.join(base, "rules.json")
+        model = os.path.join(base, "model")
+        if not os.path.isdir(model):
+            model = model + ".pkl" if os.path.exists(model + ".pkl") else self.default_model
+        return TenantFiles(
+            topic_map if os.path.exists(topic_map) else None,
+            rules if os.path.exists(rules) else fdp_rules.RULES_PATH,
+            model,
+            mmap=model == self.default_model,
+        )
+
+    def get(self, name=DEFAULT_TENANT):
+        """The current bundle for ``name``, loading or reloading it if needed."""
+        now = time.monotonic()
+        with self._lock:
+            tenant = self._tenants.get(name)
+            if tenant is not None:
+                self._tenants.move_to_end(name)
+                if now - self._checked.get(name, 0.0) < self.check_interval:
+                    return tenant
+            load_lock = self._load_locks.setdefault(name, threading.Lock())
+
+        # Only the first caller re-checks; with a bundle in hand the rest don't wait
+        if not load_lock.acquire(blocking=tenant is None):
+            return tenant
+        try:
+            with self._lock:
+                current = self._tenants.get(name)
+            if current is not None and current is not tenant:
+                return current
+            tenant = current  # None again if it was evicted meanwhile
+            self._checked[name] = time.monotonic()
+            try:
+                files = self.files(name)
+                if tenant is not None and signature(files) == tenant.signature:
+                    return tenant
+                fresh = self._load(name, files, attempts=1 if tenant is not None else LOAD_ATTEMPTS)
+            except Exception as exc:
+                if tenant is None:
+                    raise
+                self.errors[name] = f"{type(exc).__name__}: {exc}"
+                return tenant
+            with self._lock:
+                self._tenants[name] = fresh
+                self._tenants.move_to_end(name)
+                self.errors.pop(name, None)
+                if tenant is None:
+                    self.loads += 1
+                else:
+                    self.reloads += 1
+                self._evict(keep=name)
+            return fresh
+        finally:
+            load_lock.release()
+
+    @staticmethod
+    def _load(name, files, attempts):
+        # A first load has nothing to fall back on, so ride out a copy in progress
+        for attempt in range(attempts):
+            try:
+                return load_tenant(name, files)
+            except Exception:
+                if attempt == attempts - 1:
+                    raise
+                time.sleep(RETRY_DELAY)
+
+    def _evict(self, keep):
+        total = sum(t.nbytes for t in self._tenants.values())
+        for name in list(self._tenants):
+            if total <= self.max_bytes:
+                break
+            if name == keep:
+                continue
+            total -= self._tenants.pop(name).nbytes
+            self._checked.pop(name, None)
+            self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "loaded": list(self._tenants),
+                "bytes": sum(t.nbytes for t in self._tenants.values()),
+                "max_bytes": self.max_bytes,
+                "loads": self.loads,
+                "reloads": self.reloads,
+                "evictions": self.evictions,
+                "errors": dict(self.errors),
+            }
@@ -0,0 +1,150 @@
+"""What-if sensitivity: how far each subdomain score must move to change a recommendation.
+
+For every profile, each of the 43 subdomains is swept across a grid of values
+(1-10 by default) with the other scores held fixed. The whole grid, plus the
+unperturbed profiles, goes through one ``fdp_core.score`` call (one
+``predict_proba`` and one rule-table evaluation). For each subdomain the report
+gives the nearest value above and below the current score at which
+
+- the prediction flips,
+- the top-3 focus set changes,
+- the set of triggered rules changes.
+
+Cohorts are processed in chunks of profiles so the grid never exceeds
+``max_rows`` rows:
+
+    python fdp_whatif.py tna_scores_dataset.csv --row 0
+    python fdp_whatif.py tna_scores_dataset.csv --cohort sensitivity.csv --max-rows 200000
+"""
+import argparse
+import sys
+
+import numpy as np
+
+import fdp_core
+
+OUTCOMES = ("prediction", "top3", "rules")
+
+# Default sweep: 1.0, 1.5, ..., 10.0
+DEFAULT_VALUES = np.arange(1.0, 10.01, 0.5, dtype=fdp_core.DTYPE)
+
+# Grid rows scored per classifier call
+MAX_ROWS = 100_000
+
+
+def perturbation_grid(X, values):
+    """(P * F * V, F) grid: profile p with subdomain f set to values[v], in that order."""
+    P, F = X.shape
+    grid = np.broadcast_to(X[:, None, None, :], (P, F, len(values), F)).copy()
+    features = np.arange(F)
+    grid[:, features, :, features] = values
+    return grid.reshape(-1, F)
+
+
+def _thresholds(changed, values, current):
+    """Nearest sweep value above / below ``current`` where ``changed`` holds (NaN if none).
+
+    ``changed`` is (P, F, V); ``current`` is (P, F). Values are sorted ascending.
+    """
+    up = changed & (values > current[..., None])
+    down = changed & (values < current[..., None])
+    first_up = np.argmax(up, axis=-1)
+    last_down = len(values) - 1 - np.argmax(down[..., ::-1], axis=-1)
+    return (np.where(up.any(axis=-1), values[first_up], np.nan),
+            np.where(down.any(axis=-1), values[last_down], np.nan))
+
+
+def sensitivity(classifier, X, values=DEFAULT_VALUES, index=fdp_core.SUBDOMAIN_INDEX, rules=fdp_core.RULES):
+    """Flip thresholds for a batch of profiles in one scoring call.
+
+    Returns ``{outcome: (up, down)}`` with (P, F) arrays of sweep values, NaN
+    where no value in that direction changes the outcome.
+    """
+    X = np.ascontiguousarray(np.atleast_2d(X), dtype=fdp_core.DTYPE)
+    values = np.sort(np.asarray(values, dtype=fdp_core.DTYPE))
+    P, F = X.shape
+    V = len(values)
+    scored = fdp_core.score(classifier, np.concatenate([perturbation_grid(X, values), X]), 3, index, rules)
+
+    n = P * F * V
+    shape = (P, F, V)
+    prediction = scored.prediction[:n].reshape(shape)
+    top = np.sort(scored.top[:n], axis=1).reshape(*shape, -1)
+    hits = scored.hits[:n].reshape(*shape, -1)
+    base_top = np.sort(scored.top[n:], axis=1)[:, None, None, :]
+    changed = {
+        "prediction": prediction != scored.prediction[n:, None, None],
+        "top3": (top != base_top).any(axis=-1),
+        "rules": (hits != scored.hits[n:, None, None, :]).any(axis=-1),
+    }
+    return {outcome: _thresholds(changed[outcome], values, X) for outcome in OUTCOMES}
+
+
+def iter_cohort(classifier, X, values=DEFAULT_VALUES, max_rows=MAX_ROWS, index=fdp_core.SUBDOMAIN_INDEX,
+                rules=fdp_core.RULES):
+    """Yield ``(start, result)`` for consecutive profile chunks whose grids fit in ``max_rows``."""
+    per_profile = X.shape[1] * len(values) + 1
+    step = max(1, max_rows // per_profile)
+    for start in range(0, len(X), step):
+        yield start, sensitivity(classifier, X[start:start + step], values, index, rules)
+
+
+def to_frame(result, X, profile_ids, keys=fdp_core.SUBDOMAINS):
+    """Long table: one row per (profile, subdomain) with the up/down thresholds."""
+    import pandas as pd
+
+    P, F = X.shape
+    out = pd.DataFrame({
+        "profile": np.repeat(profile_ids, F),
+        "subdomain": np.tile(np.array(keys, dtype=object), P),
+        "score": X.ravel(),
+    })
+    for outcome in OUTCOMES:
+        up, down = result[outcome]
+        out[f"{outcome}_up"] = up.ravel()
+        out[f"{outcome}_down"] = down.ravel()
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score thresholds that change the FDP recommendations.")
+    parser.add_argument("input", help="CSV with columns A11..D32")
+    parser.add_argument("--row", type=int, default=0, help="profile to sweep (single-profile mode)")
+    parser.add_argument("--cohort", help="sweep every row and write the long table here (.csv or .parquet)")
+    parser.add_argument("--step", type=float, default=0.5, help="sweep step over 1-10")
+    parser.add_argument("--max-rows", type=int, default=MAX_ROWS, help="grid rows per scoring call")
+    parser.add_argument("--model", default=fdp_core.BATCH_MODEL_PATH)
+    parser.add_argument("--tenant", help="use this tenant's model, topic map and rules")
+    parser.add_argument("--tenants-dir", help="defaults to $FDP_TENANTS_DIR or tenants/")
+    args = parser.parse_args(argv)
+
+    import pandas as pd
+
+    if args.tenant:
+        from fdp_tenants import TENANTS_DIR, TenantRegistry
+
+        tenant = TenantRegistry(args.tenants_dir or TENANTS_DIR, default_model=args.model).get(args.tenant)
+        classifier, index, rules = tenant.classifier, tenant.index, tenant.rules
+    else:
+        classifier, index, rules = fdp_core.load_model(args.model), fdp_core.SUBDOMAIN_INDEX, fdp_core.RULES
+    values = np.arange(1.0, 10.0 + args.step / 2, args.step, dtype=fdp_core.DTYPE)
+    frame = pd.read_csv(args.input)
+    X = frame[list(index.codes)].to_numpy(dtype=fdp_core.DTYPE)
+
+    if args.cohort:
+        from batch_score import ChunkWriter
+
+        with ChunkWriter(args.cohort) as writer:
+            for start, result in iter_cohort(classifier, X, values, args.max_rows, index, rules):
+                chunk = X[start:start + len(result["prediction"][0])]
+                writer.write_frame(to_frame(result, chunk, np.arange(start, start + len(chunk)), index.keys))
+        print(f"Swept {len(X)} profiles -> {args.cohort}", file=sys.stderr)
+        return
+
+    result = sensitivity(classifier, X[args.row], values, index, rules)
+    out = to_frame(result, X[args.row:args.row + 1], [args.row], index.keys)
+    print(out.drop(columns="profile").to_string(index=False, na_rep="-"))
+
+
+if __name__ == "__main__":
+    main()
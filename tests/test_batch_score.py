@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import fdp_core
+from batch_score import score_file
+
+CODES = list(fdp_core.SUBDOMAIN_CODES)
+
+
+@pytest.fixture(scope="module")
+def classifier():
+    return fdp_core.load_model()
+
+
+@pytest.fixture()
+def frame():
+    return pd.read_csv("tna_scores_dataset.csv").head(20)
+
+
+def _score(tmp_path, frame, classifier, chunksize=8):
+    frame.to_csv(tmp_path / "in.csv", index=False)
+    return score_file(str(tmp_path / "in.csv"), str(tmp_path / "out.csv"), classifier, chunksize)
+
+
+def test_scores_valid_file(tmp_path, frame, classifier):
+    assert _score(tmp_path, frame, classifier) == len(frame)
+    out = pd.read_csv(tmp_path / "out.csv")
+    np.testing.assert_allclose(out["probability"], fdp_core.predict(classifier, frame[CODES].to_numpy())[1])
+
+
+@pytest.mark.parametrize("value, reason", [
+    (np.nan, "A12 is not a finite number"),   # blank cell
+    ("abc", "A12 is not a finite number"),
+    (11, "A12 = 11 is outside 1-10"),
+    (0.5, "A12 = 0.5 is outside 1-10"),
+])
+def test_rejects_invalid_score_with_row_number(tmp_path, frame, classifier, value, reason):
+    frame["A12"] = frame["A12"].astype(object)
+    frame.loc[10, "A12"] = value
+    with pytest.raises(ValueError, match=f"Input row 11: {reason}"):
+        _score(tmp_path, frame, classifier)
+
+
+def test_rejects_all_blank_row(tmp_path, frame, classifier):
+    frame.loc[3, CODES] = np.nan
+    with pytest.raises(ValueError, match="Input row 4: A11 is not a finite number"):
+        _score(tmp_path, frame, classifier)
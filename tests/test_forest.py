@@ -0,0 +1,52 @@
+"""FlatForest artifacts must score exactly like the pickled sklearn forest."""
+import numpy as np
+import pandas as pd
+import pytest
+
+import fdp_core
+from fdp_forest import FlatForest, convert_pickle, load_artifact
+
+
+@pytest.fixture(scope="module")
+def sklearn_forest():
+    return fdp_core.load_model(fdp_core.PICKLE_PATH)
+
+
+@pytest.fixture(scope="module")
+def X():
+    scores = pd.read_csv("tna_scores_dataset.csv")[list(fdp_core.SUBDOMAIN_CODES)]
+    return scores.to_numpy(dtype=fdp_core.DTYPE)
+
+
+def _assert_same(forest, reference, X):
+    np.testing.assert_allclose(forest.predict_proba(X), reference.predict_proba(X), rtol=0, atol=1e-12)
+    np.testing.assert_array_equal(forest.predict(X), reference.predict(X))
+    np.testing.assert_array_equal(forest.classes_, reference.classes_)
+
+
+def test_from_sklearn(sklearn_forest, X):
+    _assert_same(FlatForest.from_sklearn(sklearn_forest), sklearn_forest, X)
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_shipped_artifact(sklearn_forest, X, mmap):
+    forest = fdp_core.load_model(fdp_core.ARTIFACT_PATH, mmap=mmap)
+    assert isinstance(forest.feature, np.memmap) is mmap
+    _assert_same(forest, sklearn_forest, X)
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_convert_pickle_round_trip(sklearn_forest, X, tmp_path, mmap):
+    path = convert_pickle(fdp_core.PICKLE_PATH, str(tmp_path / "model"))
+    _assert_same(load_artifact(path, mmap=mmap), sklearn_forest, X)
+
+
+@pytest.mark.parametrize("value", [np.nan, np.inf])
+def test_rejects_non_finite(X, value):
+    forest = fdp_core.load_model(fdp_core.ARTIFACT_PATH)
+    bad = X[:5].copy()
+    bad[2, 7] = value
+    with pytest.raises(ValueError, match="NaN or infinity"):
+        forest.predict_proba(bad)
+    with pytest.raises(ValueError, match="NaN or infinity"):
+        forest.predict(bad)
@@ -0,0 +1,53 @@
+"""Lookup-table probabilities must equal the forest's on hits and misses alike."""
+import numpy as np
+import pandas as pd
+import pytest
+
+import fdp_core
+from fdp_lookup import LookupForest, load_table
+
+
+@pytest.fixture(scope="module")
+def forest():
+    return fdp_core.load_model(fdp_core.ARTIFACT_PATH)
+
+
+@pytest.fixture(scope="module")
+def X():
+    scores = pd.read_csv("tna_scores_dataset.csv")[list(fdp_core.SUBDOMAIN_CODES)]
+    return scores.to_numpy(dtype=fdp_core.DTYPE)
+
+
+def test_misses_then_hits(forest, X):
+    table = LookupForest(forest)
+    expected = forest.predict_proba(X)
+    np.testing.assert_array_equal(table.predict_proba(X), expected)
+    assert table.misses == len(X) and table.hits == 0
+    np.testing.assert_array_equal(table.predict_proba(X), expected)
+    assert table.hits == len(X)
+
+
+def test_mixed_batch(forest, X):
+    rng = np.random.default_rng(0)
+    table = LookupForest(forest, grow=False).precompute(X[::2])
+    nudged = X.copy()
+    cols = rng.integers(0, X.shape[1], len(X))
+    nudged[np.arange(len(X)), cols] += rng.choice(np.array([-0.5, 0.5], dtype=X.dtype), len(X))
+    batch = np.concatenate([X, nudged])
+    before = table.hits
+    np.testing.assert_array_equal(table.predict_proba(batch), forest.predict_proba(batch))
+    np.testing.assert_array_equal(table.predict(batch), forest.predict(batch))
+    assert 0 < table.hits - before < len(batch)
+
+
+def test_saved_table(forest, X, tmp_path):
+    LookupForest(forest).precompute(X).save(str(tmp_path))
+    table = load_table(str(tmp_path), forest, grow=False)
+    np.testing.assert_array_equal(table.predict_proba(X), forest.predict_proba(X))
+    assert table.misses == 0
+
+
+def test_saved_table_refuses_other_model(forest, X, tmp_path):
+    LookupForest(forest).precompute(X[:10]).save(str(tmp_path))
+    with pytest.raises(ValueError, match="different model"):
+        load_table(str(tmp_path), forest.subset(forest.n_trees // 2))
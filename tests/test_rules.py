@@ -0,0 +1,44 @@
+"""The compiled rule table must reproduce the app's original if-chain exactly."""
+import numpy as np
+import pandas as pd
+import pytest
+
+import fdp_core
+from benchmarks.baseline_rules import original_chain
+
+# Around both thresholds used by the chain (> 7 and > 8), plus the scale ends
+EDGE_VALUES = np.array([1.0, 6.99, 7.0, 7.01, 7.99, 8.0, 8.01, 10.0])
+
+
+def _assert_matches_chain(X):
+    hits = fdp_core.RULES.evaluate(X.astype(fdp_core.DTYPE))
+    for row, hit_row in zip(X, hits):
+        expected = original_chain(dict(zip(fdp_core.SUBDOMAINS, row.tolist())))
+        assert fdp_core.RULES.lists(hit_row) == expected
+
+
+def test_dataset_profiles():
+    X = pd.read_csv("tna_scores_dataset.csv")[list(fdp_core.SUBDOMAIN_CODES)].to_numpy(np.float64)
+    _assert_matches_chain(X)
+
+
+def test_threshold_edges():
+    rng = np.random.default_rng(0)
+    X = rng.choice(EDGE_VALUES, size=(5000, len(fdp_core.SUBDOMAINS)))
+    # float32 round-trip so both engines see the value the app scores
+    _assert_matches_chain(X.astype(fdp_core.DTYPE).astype(np.float64))
+
+
+@pytest.mark.parametrize("value, triggered", [(8.0, False), (8.01, True)])
+def test_strict_threshold(value, triggered):
+    X = np.ones((1, len(fdp_core.SUBDOMAINS)))
+    X[0, fdp_core.SUBDOMAINS.index("A31:Inquiring Mind")] = value
+    fdps, labels = fdp_core.RULES.lists(fdp_core.RULES.evaluate(X.astype(fdp_core.DTYPE))[0])
+    assert ("A31:Inquiring Mind > 8" in labels) is triggered
+    _assert_matches_chain(X)
+
+
+def test_labels_and_fdps():
+    fdps, labels = original_chain({name: 10.0 for name in fdp_core.SUBDOMAINS})
+    assert list(fdp_core.RULES.fdps) == fdps
+    assert list(fdp_core.RULES.labels) == labels
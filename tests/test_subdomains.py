@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+
+import fdp_core
+
+INDEX = fdp_core.SUBDOMAIN_INDEX
+
+
+def test_vector_by_code_and_name():
+    by_code = INDEX.vector({code: i + 1 for i, code in enumerate(INDEX.codes)})
+    by_name = INDEX.vector({name: i + 1 for i, name in enumerate(INDEX.keys)})
+    np.testing.assert_array_equal(by_code, np.arange(1, len(INDEX) + 1, dtype=fdp_core.DTYPE))
+    np.testing.assert_array_equal(by_code, by_name)
+
+
+def test_vector_rejects_alias_standing_in_for_missing_column():
+    scores = {code: 5 for code in INDEX.codes if code != "A12"}
+    scores[INDEX.keys[0]] = 5  # A11 again, by name
+    with pytest.raises(ValueError, match="more than once"):
+        INDEX.vector(scores)
+
+
+def test_vector_rejects_missing_column():
+    with pytest.raises(ValueError, match="missing A12"):
+        INDEX.vector({code: 5 for code in INDEX.codes if code != "A12"})
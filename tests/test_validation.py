@@ -0,0 +1,48 @@
+"""One score validator for batch files, the HTTP service and the stream."""
+import numpy as np
+import pytest
+
+import fdp_core
+
+CODES = fdp_core.SUBDOMAIN_CODES
+
+
+def _scores(**changes):
+    scores = {code: 5 for code in CODES}
+    scores.update(changes)
+    return scores
+
+
+def test_score_errors_names_first_bad_column():
+    X = np.full((4, len(CODES)), 5.0)
+    X[1, 3] = np.nan
+    X[2, [0, 5]] = [1.0, 10.5]
+    X[3, 2] = -np.inf
+    assert fdp_core.score_errors(X) == {
+        1: f"{CODES[3]} is not a finite number",
+        2: f"{CODES[5]} = 10.5 is outside 1-10",
+        3: f"{CODES[2]} is not a finite number",
+    }
+
+
+def test_score_vector_accepts_numbers_on_the_scale():
+    x = fdp_core.score_vector(_scores(A11=1, A12=10.0, A13=7.25))
+    assert x.dtype == fdp_core.DTYPE and x[:3].tolist() == [1.0, 10.0, 7.25]
+
+
+@pytest.mark.parametrize("value, message", [
+    ("7", "must be a number, not str"),
+    (True, "must be a number, not bool"),
+    (None, "must be a number, not NoneType"),
+    (float("nan"), "A11 is not a finite number"),
+    (0.5, "A11 = 0.5 is outside 1-10"),
+    (1e9, "outside 1-10"),
+])
+def test_score_vector_rejects(value, message):
+    with pytest.raises(ValueError, match=message):
+        fdp_core.score_vector(_scores(A11=value))
+
+
+def test_score_vector_unknown_subdomain():
+    with pytest.raises(KeyError):
+        fdp_core.score_vector(_scores(Z99=5))